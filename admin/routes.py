@@ -1,21 +1,25 @@
-from datetime import timedelta, datetime
+from datetime import datetime
 
-from typing import Annotated, Optional
+from typing import Optional
 
-from fastapi import APIRouter, Depends, Request, Cookie, Form, Response
+from fastapi import APIRouter, Depends, Request, Form, Response
 from fastapi import HTTPException
-from fastapi.responses import HTMLResponse
-from sqlalchemy import func
+from fastapi.responses import HTMLResponse, JSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy.orm import joinedload, selectinload
 
 from settings import EnvSettings
 from auth.auth import Authentication
-from db_models.db import get_session
+from auth.principal import Principal, get_principal, principal_cache
+from db_models.db import get_session, get_read_session
 from schemas.auth import User
-from db_models.orms import UserORM, ParkingHistoryORM, BillingORM, CarORM, TariffORM
+from db_models.orms import UserORM, ParkingHistoryORM, CarORM, TariffORM
 from frontend.routes import templates
+from cameras.plate_registry import plate_registry
+from cameras.timeline import tariff_timeline
+from cameras.lots import lot_allocator
+import admin.stats as stats
 
 auth = Authentication()
 
@@ -30,8 +34,7 @@ router = APIRouter(prefix='/admin',
 @router.get("/", response_class=HTMLResponse)
 async def get_admin_page(
         request: Request,
-        db: AsyncSession = Depends(get_session),
-        access_token: Annotated[str | None, Cookie()] = None
+        current_user: Optional[Principal] = Depends(get_principal)
 ):
     """
         Get the admin page.
@@ -42,8 +45,7 @@ async def get_admin_page(
 
         Args:
             request (Request): The HTTP request object.
-            db (AsyncSession): The database session dependency.
-            access_token (Annotated[str | None, Cookie()]): The access token from cookies, if available.
+            current_user (Optional[Principal]): The signed-in user, None without an access token.
 
         Returns:
             HTMLResponse:
@@ -54,24 +56,18 @@ async def get_admin_page(
         Raises:
             None
         """
-    if not access_token:
+    if current_user is None:
         return templates.TemplateResponse('auth/login_form.html', {'request': request, 'user': None})
 
-    current_username = auth.get_current_user(request)
-
-    result = await db.execute(select(UserORM).where(UserORM.username == current_username))
-    user_db = result.scalar()
-
-    if not user_db or not user_db.is_admin:
+    if not current_user.is_admin:
         return templates.TemplateResponse("admin/mistake.html", {"request": request, "message": "Access denied. "
                                                                                                 "Admins only."})
 
-    return templates.TemplateResponse("admin/admin.html", {"request": request, "user": user_db})
+    return templates.TemplateResponse("admin/admin.html", {"request": request, "user": current_user})
 
 
 @router.get("/user_management", response_class=HTMLResponse, name="get_user_management")
-async def get_user_management(request: Request, db: AsyncSession = Depends(get_session),
-                              access_token: Annotated[str | None, Cookie()] = None):
+async def get_user_management(request: Request, current_user: Optional[Principal] = Depends(get_principal)):
     """
         Retrieves the user management page for admin users.
 
@@ -80,8 +76,7 @@ async def get_user_management(request: Request, db: AsyncSession = Depends(get_s
 
         Args:
             request (Request): The current request object.
-            db (AsyncSession): The asynchronous database session, injected by FastAPI dependency.
-            access_token (Annotated[str | None, Cookie]): The JWT access token stored in cookies. Defaults to None if not provided.
+            current_user (Optional[Principal]): The signed-in user, None without an access token.
 
         Returns:
             HTMLResponse:
@@ -91,14 +86,10 @@ async def get_user_management(request: Request, db: AsyncSession = Depends(get_s
         Raises:
             None
         """
-    if not access_token:
+    if current_user is None:
         return templates.TemplateResponse('auth/login_form.html', {'request': request, 'user': None})
 
-    current_username = auth.get_current_user(request)
-    res = await db.execute(select(UserORM).where(UserORM.username == current_username))
-    current_user = res.scalar()
-
-    if not current_user or not current_user.is_admin:
+    if not current_user.is_admin:
         return templates.TemplateResponse('auth/login_form.html',
                                           {'request': request, 'user': None, 'error': 'Admin access required'})
 
@@ -110,8 +101,7 @@ async def get_user_management(request: Request, db: AsyncSession = Depends(get_s
 
 
 @router.get("/tariff_management", response_class=HTMLResponse, name="get_tariff_management")
-async def get_tariff_management(request: Request, db: AsyncSession = Depends(get_session),
-                                access_token: Annotated[str | None, Cookie()] = None):
+async def get_tariff_management(request: Request, current_user: Optional[Principal] = Depends(get_principal)):
     """
         Handles the GET request for the tariff management page.
 
@@ -120,8 +110,7 @@ async def get_tariff_management(request: Request, db: AsyncSession = Depends(get
 
         Args:
             request (Request): The request object containing details of the current request.
-            db (AsyncSession): The asynchronous database session used to fetch the user data.
-            access_token (str, optional): The access token stored in cookies to identify the logged-in user.
+            current_user (Optional[Principal]): The signed-in user, None without an access token.
 
         Returns:
             TemplateResponse:
@@ -132,14 +121,10 @@ async def get_tariff_management(request: Request, db: AsyncSession = Depends(get
         Raises:
             None.
         """
-    if not access_token:
+    if current_user is None:
         return templates.TemplateResponse('auth/login_form.html', {'request': request, 'user': None})
 
-    current_username = auth.get_current_user(request)
-    res = await db.execute(select(UserORM).where(UserORM.username == current_username))
-    current_user = res.scalar()
-
-    if not current_user or not current_user.is_admin:
+    if not current_user.is_admin:
         return templates.TemplateResponse('auth/login_form.html',
                                           {'request': request, 'user': None, 'error': 'Admin access required'})
 
@@ -151,8 +136,7 @@ async def get_tariff_management(request: Request, db: AsyncSession = Depends(get
 
 
 @router.get("/blacklist_management", response_class=HTMLResponse, name="get_blacklist_management")
-async def get_blacklist_management(request: Request, access_token: Annotated[str | None, Cookie()] = None,
-                                   db: AsyncSession = Depends(get_session)):
+async def get_blacklist_management(request: Request, current_user: Optional[Principal] = Depends(get_principal)):
     """
         Renders the blacklist management page for an admin user.
 
@@ -161,8 +145,7 @@ async def get_blacklist_management(request: Request, access_token: Annotated[str
 
         Args:
             request (Request): The incoming HTTP request object.
-            access_token (str | None, optional): The access token from the user's cookie. Defaults to None.
-            db (AsyncSession): The database session for querying user data. Defaults to an asynchronous session from `get_session`.
+            current_user (Optional[Principal]): The signed-in user, None without an access token.
 
         Returns:
             TemplateResponse: The HTML response to render the appropriate template, either the login form or the blacklist management page.
@@ -170,14 +153,10 @@ async def get_blacklist_management(request: Request, access_token: Annotated[str
         Raises:
             None
         """
-    if not access_token:
+    if current_user is None:
         return templates.TemplateResponse('auth/login_form.html', {'request': request, 'user': None})
 
-    current_username = auth.get_current_user(request)
-    res = await db.execute(select(UserORM).where(UserORM.username == current_username))
-    current_user = res.scalar()
-
-    if not current_user or not current_user.is_admin:
+    if not current_user.is_admin:
         return templates.TemplateResponse('auth/login_form.html',
                                           {'request': request, 'user': None, 'error': 'Admin access required'})
 
@@ -188,8 +167,8 @@ async def get_blacklist_management(request: Request, access_token: Annotated[str
 
 
 @router.get("/stats_management", response_class=HTMLResponse, name="get_stats_management")
-async def get_stats_management(request: Request, db: AsyncSession = Depends(get_session),
-                               access_token: Annotated[str | None, Cookie()] = None):
+async def get_stats_management(request: Request, db: AsyncSession = Depends(get_read_session),
+                               current_user: Optional[Principal] = Depends(get_principal)):
     """
         Renders the admin statistics management page. If the user is not authenticated or is not an admin,
         they will be redirected to the login page or receive a 403 error.
@@ -197,7 +176,7 @@ async def get_stats_management(request: Request, db: AsyncSession = Depends(get_
         Args:
             request (Request): The incoming HTTP request object.
             db (AsyncSession, optional): The database session dependency for querying data.
-            access_token (str | None, optional): The access token extracted from cookies to identify the user.
+            current_user (Optional[Principal]): The signed-in user, None without an access token.
 
         Returns:
             TemplateResponse: The response with the rendered HTML page for stats management if the user is authorized.
@@ -206,14 +185,10 @@ async def get_stats_management(request: Request, db: AsyncSession = Depends(get_
         Raises:
             HTTPException: If the user is not an admin or if authorization fails.
         """
-    if not access_token:
+    if current_user is None:
         return templates.TemplateResponse('auth/login_form.html', {'request': request, 'user': None})
 
-    current_username = auth.get_current_user(request)
-    res = await db.execute(select(UserORM).where(UserORM.username == current_username))
-    current_user = res.scalar()
-
-    if not current_user or not current_user.is_admin:
+    if not current_user.is_admin:
         raise HTTPException(status_code=403, detail="Not authorized")
 
     cars = await db.execute(select(CarORM))
@@ -231,7 +206,7 @@ async def get_stats_management(request: Request, db: AsyncSession = Depends(get_
 
 @router.get("/user_list", response_class=HTMLResponse, name="get_user_list")
 async def get_user_list(request: Request, db: AsyncSession = Depends(get_session),
-                        access_token: Annotated[str | None, Cookie()] = None):
+                        current_user: Optional[Principal] = Depends(get_principal)):
     """
         Retrieve and display a list of users.
 
@@ -242,13 +217,13 @@ async def get_user_list(request: Request, db: AsyncSession = Depends(get_session
         Args:
             request (Request): The HTTP request object.
             db (AsyncSession): An asynchronous session for interacting with the database.
-            access_token (str | None): A cookie containing the user's access token (optional).
+            current_user (Optional[Principal]): The signed-in user, None without an access token.
 
         Returns:
             TemplateResponse: Renders the 'user_list.html' template with the list of users
             or redirects to the login page if the user is not authenticated.
         """
-    if not access_token:
+    if current_user is None:
         return templates.TemplateResponse('auth/login_form.html', {'request': request, 'user': None})
 
     users = await db.execute(select(UserORM))
@@ -258,8 +233,7 @@ async def get_user_list(request: Request, db: AsyncSession = Depends(get_session
 
 
 @router.get("/add_user", response_class=HTMLResponse)
-async def add_user_form(request: Request, db: AsyncSession = Depends(get_session),
-                        access_token: Annotated[str | None, Cookie()] = None):
+async def add_user_form(request: Request, current_user: Optional[Principal] = Depends(get_principal)):
     """
         Display the 'Add User' form.
 
@@ -268,21 +242,16 @@ async def add_user_form(request: Request, db: AsyncSession = Depends(get_session
 
         Args:
             request (Request): The HTTP request object.
-            db (AsyncSession): An asynchronous session for interacting with the database.
-            access_token (str | None): A cookie containing the user's access token (optional).
+            current_user (Optional[Principal]): The signed-in user, None without an access token.
 
         Returns:
             TemplateResponse: Renders the 'add_user_form.html' template or redirects to
             the login page if the user is not authenticated or not an admin.
         """
-    if not access_token:
+    if current_user is None:
         return templates.TemplateResponse('auth/login_form.html', {'request': request, 'user': None})
 
-    current_username = auth.get_current_user(request)
-    res = await db.execute(select(UserORM).where(UserORM.username == current_username))
-    current_user = res.scalar()
-
-    if not current_user or not current_user.is_admin:
+    if not current_user.is_admin:
         return templates.TemplateResponse('auth/login_form.html',
                                           {'request': request, 'user': None, 'error': 'Admin access required'})
 
@@ -296,7 +265,7 @@ async def add_user(
         email: str = Form(...),
         password: str = Form(...),
         db: AsyncSession = Depends(get_session),
-        access_token: Annotated[str | None, Cookie()] = None
+        current_user: Optional[Principal] = Depends(get_principal)
 ):
     """
         Handle the 'Add User' form submission.
@@ -311,21 +280,16 @@ async def add_user(
             email (str): The new user's email.
             password (str): The new user's password.
             db (AsyncSession): An asynchronous session for interacting with the database.
-            access_token (str | None): A cookie containing the user's access token (optional).
+            current_user (Optional[Principal]): The signed-in user, None without an access token.
 
         Returns:
             TemplateResponse: Renders the 'user_added.html' template after successful addition,
             or the 'add_user_form.html' template with an error message if any checks fail.
         """
-    if not access_token:
+    if current_user is None:
         return templates.TemplateResponse('auth/login_form.html', {'request': request, 'user': None})
 
-    current_username = auth.get_current_user(request)
-
-    res = await db.execute(select(UserORM).where(UserORM.username == current_username))
-    current_user = res.scalar()
-
-    if not current_user or not current_user.is_admin:
+    if not current_user.is_admin:
         return templates.TemplateResponse('auth/login_form.html',
                                           {'request': request, 'error': 'Admin access required'})
 
@@ -348,7 +312,7 @@ async def add_user(
 
 @router.post("/delete_user", response_class=HTMLResponse)
 async def delete_user(request: Request, username: str = Form(...), db: AsyncSession = Depends(get_session),
-                      access_token: Annotated[str | None, Cookie()] = None):
+                      current_user: Optional[Principal] = Depends(get_principal)):
     """
        Delete a user by username.
 
@@ -360,20 +324,14 @@ async def delete_user(request: Request, username: str = Form(...), db: AsyncSess
            request (Request): The HTTP request object.
            username (str): The username of the user to be deleted.
            db (AsyncSession): An asynchronous session for interacting with the database.
-           access_token (str | None): A cookie containing the user's access token (optional).
+           current_user (Optional[Principal]): The signed-in user, None without an access token.
 
        Returns:
            TemplateResponse: Renders the 'user_deleted.html' template after successful deletion,
            or the 'delete_user_form.html' template with an error message if any checks fail.
        """
-    user = None
-    if access_token:
-        current_username = auth.get_current_user(request)
-        user = await db.execute(select(UserORM).where(UserORM.username == current_username))
-        user = user.scalar()
-
-    if user is None or not user.is_admin:
-        return templates.TemplateResponse('auth/login_form.html', {'request': request, 'user': user})
+    if current_user is None or not current_user.is_admin:
+        return templates.TemplateResponse('auth/login_form.html', {'request': request, 'user': current_user})
 
     result = await db.execute(select(UserORM).where(UserORM.username == username))
     deleted_user = result.scalar()
@@ -386,34 +344,31 @@ async def delete_user(request: Request, username: str = Form(...), db: AsyncSess
 
     await db.delete(deleted_user)
     await db.commit()
+    plate_registry.remove_user(deleted_user.id)
+    principal_cache.invalidate(deleted_user.id)
 
     return templates.TemplateResponse("admin/user_deleted.html", {"request": request, "username": username})
 
 
 @router.get("/banned_users", response_class=HTMLResponse, name="get_banned_users")
 async def get_banned_users(request: Request, db: AsyncSession = Depends(get_session),
-                           access_token: Annotated[str | None, Cookie()] = None):
+                           current_user: Optional[Principal] = Depends(get_principal)):
     """
        Retrieves the list of banned users from the database and renders the banned users list.
 
        Args:
            request (Request): The FastAPI request object.
            db (AsyncSession): The asynchronous database session, retrieved via dependency injection.
-           access_token (Optional[str]): The access token stored in the browser's cookie.
+           current_user (Optional[Principal]): The signed-in user, None without an access token.
 
        Returns:
            HTMLResponse: Renders the 'banned_users_list.html' template with the banned users list,
                          or redirects to the login form if the user is not authenticated.
        """
-    user = None
-    if access_token:
-        username = auth.get_current_user(request)
-        user = User(username=username)
-
-    if user is None:
+    if current_user is None:
         return templates.TemplateResponse('auth/login_form.html',
                                           {'request': request,
-                                           'user': user})
+                                           'user': None})
 
     users = await db.execute(select(UserORM).where(UserORM.is_banned == True))
     banned_users = users.scalars().all()
@@ -427,7 +382,7 @@ async def ban_user(
         request: Request,
         username: str = Form(...),
         db: AsyncSession = Depends(get_session),
-        access_token: Annotated[Optional[str], Cookie()] = None
+        current_user: Optional[Principal] = Depends(get_principal)
 ):
     """
         Bans a user by setting their 'is_banned' flag to True in the database.
@@ -436,7 +391,7 @@ async def ban_user(
             request (Request): The FastAPI request object.
             username (str): The username of the user to ban.
             db (AsyncSession): The asynchronous database session, retrieved via dependency injection.
-            access_token (Optional[str]): The access token stored in the browser's cookie.
+            current_user (Optional[Principal]): The signed-in user, None without an access token.
 
         Returns:
             HTMLResponse: Renders a success page if the user is banned successfully,
@@ -445,15 +400,7 @@ async def ban_user(
         Raises:
             HTTPException: If the user is not authorized or user to ban is not found.
         """
-    if not access_token:
-        return templates.TemplateResponse('auth/login_form.html', {'request': request, 'user': None})
-
-    current_username = auth.get_current_user(request)
-
-    res = await db.execute(select(UserORM).where(UserORM.username == current_username))
-    current_user = res.scalar()
-
-    if not current_user:
+    if current_user is None:
         return templates.TemplateResponse('auth/login_form.html', {'request': request, 'user': None})
 
     if not current_user.is_admin:
@@ -473,6 +420,8 @@ async def ban_user(
 
     banned_user.is_banned = True
     await db.commit()
+    plate_registry.update_user(banned_user.id, is_banned=True)
+    principal_cache.invalidate(banned_user.id)
 
     return templates.TemplateResponse("admin/ban_success.html", {
         "request": request,
@@ -485,7 +434,7 @@ async def unban_user(
         request: Request,
         username: str = Form(...),
         db: AsyncSession = Depends(get_session),
-        access_token: Annotated[Optional[str], Cookie()] = None
+        current_user: Optional[Principal] = Depends(get_principal)
 ):
     """
        Unbans a user by setting their 'is_banned' flag to False in the database.
@@ -494,7 +443,7 @@ async def unban_user(
            request (Request): The FastAPI request object.
            username (str): The username of the user to unban.
            db (AsyncSession): The asynchronous database session, retrieved via dependency injection.
-           access_token (Optional[str]): The access token stored in the browser's cookie.
+           current_user (Optional[Principal]): The signed-in user, None without an access token.
 
        Returns:
            HTMLResponse: Renders a success page if the user is unbanned successfully,
@@ -503,15 +452,7 @@ async def unban_user(
        Raises:
            HTTPException: If the user is not authorized or user to unban is not found.
        """
-    if not access_token:
-        return templates.TemplateResponse('auth/login_form.html', {'request': request, 'user': None})
-
-    current_username = auth.get_current_user(request)
-
-    res = await db.execute(select(UserORM).where(UserORM.username == current_username))
-    current_user = res.scalar()
-
-    if not current_user:
+    if current_user is None:
         return templates.TemplateResponse('auth/login_form.html', {'request': request, 'user': None})
 
     if not current_user.is_admin:
@@ -531,6 +472,8 @@ async def unban_user(
 
     user.is_banned = False
     await db.commit()
+    plate_registry.update_user(user.id, is_banned=False)
+    principal_cache.invalidate(user.id)
 
     return templates.TemplateResponse("admin/unban_success.html", {
         "request": request,
@@ -540,7 +483,7 @@ async def unban_user(
 
 @router.get("/tariffs", response_class=HTMLResponse)
 async def list_tariffs(request: Request, db: AsyncSession = Depends(get_session),
-                       access_token: Annotated[Optional[str], Cookie()] = None):
+                       current_user: Optional[Principal] = Depends(get_principal)):
     """
         Displays the list of parking tariffs for administrators. If the user is not logged in
         or lacks administrative privileges, they are redirected to the login page or
@@ -549,7 +492,7 @@ async def list_tariffs(request: Request, db: AsyncSession = Depends(get_session)
         Args:
             request (Request): The current request object.
             db (AsyncSession): The asynchronous database session dependency.
-            access_token (Optional[str], optional): The access token stored in cookies.
+            current_user (Optional[Principal]): The signed-in user, None without an access token.
 
         Returns:
             TemplateResponse: Renders the tariff management page for admins, or the login page
@@ -558,15 +501,10 @@ async def list_tariffs(request: Request, db: AsyncSession = Depends(get_session)
         Raises:
             HTTPException: If the current user is not an admin.
         """
-    if not access_token:
+    if current_user is None:
         return templates.TemplateResponse('auth/login_form.html', {'request': request, 'user': None})
 
-    current_username = auth.get_current_user(request)
-
-    res = await db.execute(select(UserORM).where(UserORM.username == current_username))
-    current_user = res.scalar()
-
-    if not current_user or not current_user.is_admin:
+    if not current_user.is_admin:
         raise HTTPException(status_code=403, detail="Not authorized to set parking tariff")
 
     result = await db.execute(select(TariffORM).order_by(TariffORM.set_date.desc()).limit(1))
@@ -587,7 +525,7 @@ async def add_tariff(
         request: Request,
         new_rate: float = Form(...),
         db: AsyncSession = Depends(get_session),
-        access_token: Annotated[Optional[str], Cookie()] = None
+        current_user: Optional[Principal] = Depends(get_principal)
 ):
     """
         Adds a new parking tariff to the database. Only administrators are allowed to perform this action.
@@ -596,7 +534,7 @@ async def add_tariff(
             request (Request): The current request object.
             new_rate (float): The new tariff rate to be added.
             db (AsyncSession): The asynchronous database session dependency.
-            access_token (Optional[str], optional): The access token stored in cookies.
+            current_user (Optional[Principal]): The signed-in user, None without an access token.
 
         Returns:
             TemplateResponse: Renders the tariff added confirmation page, or the login page
@@ -605,21 +543,17 @@ async def add_tariff(
         Raises:
             HTTPException: If the current user is not an admin.
         """
-    if not access_token:
+    if current_user is None:
         return templates.TemplateResponse('auth/login_form.html', {'request': request, 'user': None})
 
-    current_username = auth.get_current_user(request)
-
-    res = await db.execute(select(UserORM).where(UserORM.username == current_username))
-    current_user = res.scalar()
-
-    if not current_user or not current_user.is_admin:
+    if not current_user.is_admin:
         raise HTTPException(status_code=403, detail="Not authorized to set parking tariff")
 
     new_tariff = TariffORM(tariff=new_rate, set_date=datetime.today().date())
 
     db.add(new_tariff)
     await db.commit()
+    tariff_timeline.invalidate()
 
     return templates.TemplateResponse("admin/tariff_added.html", {
         "request": request,
@@ -629,14 +563,14 @@ async def add_tariff(
 
 @router.get("/get_last_tariff", response_class=HTMLResponse)
 async def get_last_tariff(request: Request, db: AsyncSession = Depends(get_session),
-                          access_token: Annotated[Optional[str], Cookie()] = None):
+                          current_user: Optional[Principal] = Depends(get_principal)):
     """
         Retrieves and displays the most recent parking tariff. Only administrators can access this route.
 
         Args:
             request (Request): The current request object.
             db (AsyncSession): The asynchronous database session dependency.
-            access_token (Optional[str], optional): The access token stored in cookies.
+            current_user (Optional[Principal]): The signed-in user, None without an access token.
 
         Returns:
             TemplateResponse: Renders the page with the last tariff information or the login page
@@ -645,15 +579,10 @@ async def get_last_tariff(request: Request, db: AsyncSession = Depends(get_sessi
         Raises:
             HTTPException: If the current user is not an admin.
         """
-    if not access_token:
+    if current_user is None:
         return templates.TemplateResponse('auth/login_form.html', {'request': request, 'user': None})
 
-    current_username = auth.get_current_user(request)
-
-    res = await db.execute(select(UserORM).where(UserORM.username == current_username))
-    current_user = res.scalar()
-
-    if not current_user or not current_user.is_admin:
+    if not current_user.is_admin:
         raise HTTPException(status_code=403, detail="Not authorized to set parking tariff")
 
     last_tariff = await db.execute(select(TariffORM).order_by(TariffORM.set_date.desc(), TariffORM.id.desc()).limit(1))
@@ -670,8 +599,7 @@ async def get_last_tariff(request: Request, db: AsyncSession = Depends(get_sessi
 
 
 @router.get("/logout", response_class=HTMLResponse)
-async def logout(request: Request, response: Response, db: AsyncSession = Depends(get_session),
-                 access_token: Annotated[Optional[str], Cookie()] = None):
+async def logout(request: Request, response: Response, current_user: Optional[Principal] = Depends(get_principal)):
     """
         Logs out the current user by deleting their access and refresh tokens from cookies. Only
         administrators can perform this action.
@@ -679,8 +607,7 @@ async def logout(request: Request, response: Response, db: AsyncSession = Depend
         Args:
             request (Request): The current request object.
             response (Response): The response object to manipulate cookies.
-            db (AsyncSession): The asynchronous database session dependency.
-            access_token (Optional[str], optional): The access token stored in cookies.
+            current_user (Optional[Principal]): The signed-in user, None without an access token.
 
         Returns:
             TemplateResponse: Renders the logout success page or the login page if access is not granted.
@@ -688,15 +615,10 @@ async def logout(request: Request, response: Response, db: AsyncSession = Depend
         Raises:
             HTTPException: If the current user is not an admin.
         """
-    if not access_token:
+    if current_user is None:
         return templates.TemplateResponse('auth/login_form.html', {'request': request, 'user': None})
 
-    current_username = auth.get_current_user(request)
-
-    res = await db.execute(select(UserORM).where(UserORM.username == current_username))
-    current_user = res.scalar()
-
-    if not current_user or not current_user.is_admin:
+    if not current_user.is_admin:
         raise HTTPException(status_code=403, detail="Not authorized to logout from admin panel")
 
     response.delete_cookie(key="access_token")
@@ -706,34 +628,22 @@ async def logout(request: Request, response: Response, db: AsyncSession = Depend
 
 
 @router.get("/user_selection", response_class=HTMLResponse, name="user_selection")
-async def user_selection(request: Request, db: AsyncSession = Depends(get_session),
-                         access_token: Annotated[Optional[str], Cookie()] = None):
+async def user_selection(request: Request, db: AsyncSession = Depends(get_read_session),
+                         current_user: Optional[Principal] = Depends(get_principal)):
     """
         Renders the user selection page for administrators.
 
         Args:
             request (Request): The current request object.
             db (AsyncSession): The database session for querying user data.
-            access_token (Optional[str]): The access token for user authentication.
+            current_user (Optional[Principal]): The signed-in user, None without an access token.
 
         Returns:
             HTMLResponse: Renders the user selection page or login page if not authenticated.
-
-        Raises:
-            HTTPException: If the user is not found in the database.
         """
-    if not access_token:
+    if current_user is None:
         return templates.TemplateResponse('auth/login_form.html', {'request': request, 'user': None})
 
-    current_username = auth.get_current_user(request)
-    res = await db.execute(
-        select(UserORM).options(joinedload(UserORM.cars)).where(UserORM.username == current_username)
-    )
-    user = res.scalar()
-
-    if not user:
-        return templates.TemplateResponse('mistake.html', {"request": request, "message": "User not found"})
-
     users_res = await db.execute(select(UserORM).options(joinedload(UserORM.cars)))
     users = users_res.unique().scalars().all()
 
@@ -744,8 +654,8 @@ async def user_selection(request: Request, db: AsyncSession = Depends(get_sessio
 
 
 @router.get("/user_stats", response_class=HTMLResponse, name="get_user_stats")
-async def get_user_stats(request: Request, username: str, db: AsyncSession = Depends(get_session),
-                         access_token: Annotated[Optional[str], Cookie()] = None):
+async def get_user_stats(request: Request, username: str, db: AsyncSession = Depends(get_read_session),
+                         current_user: Optional[Principal] = Depends(get_principal)):
     """
         Renders user statistics based on the given username.
 
@@ -753,7 +663,7 @@ async def get_user_stats(request: Request, username: str, db: AsyncSession = Dep
             request (Request): The current request object.
             username (str): The username of the user whose statistics will be displayed.
             db (AsyncSession): The database session for querying user and parking history data.
-            access_token (Optional[str]): The access token for user authentication.
+            current_user (Optional[Principal]): The signed-in user, None without an access token.
 
         Returns:
             HTMLResponse: Renders the user statistics page or login page if not authenticated.
@@ -761,7 +671,7 @@ async def get_user_stats(request: Request, username: str, db: AsyncSession = Dep
         Raises:
             HTTPException: If the user is not found in the database.
         """
-    if not access_token:
+    if current_user is None:
         return templates.TemplateResponse('auth/login_form.html', {'request': request, 'user': None})
 
     res = await db.execute(
@@ -789,15 +699,15 @@ async def get_user_stats(request: Request, username: str, db: AsyncSession = Dep
 
 
 @router.get("/car_selection", response_class=HTMLResponse, name="car_selection")
-async def car_selection(request: Request, db: AsyncSession = Depends(get_session),
-                        access_token: Annotated[Optional[str], Cookie()] = None):
+async def car_selection(request: Request, db: AsyncSession = Depends(get_read_session),
+                        current_user: Optional[Principal] = Depends(get_principal)):
     """
         Renders the car selection page for administrators.
 
         Args:
             request (Request): The current request object.
             db (AsyncSession): The database session for querying car data.
-            access_token (Optional[str]): The access token for user authentication.
+            current_user (Optional[Principal]): The signed-in user, None without an access token.
 
         Returns:
             HTMLResponse: Renders the car selection page or login page if not authenticated.
@@ -805,14 +715,10 @@ async def car_selection(request: Request, db: AsyncSession = Depends(get_session
         Raises:
             HTTPException: If the user is not authorized to access the page.
         """
-    if not access_token:
+    if current_user is None:
         return templates.TemplateResponse('auth/login_form.html', {'request': request, 'user': None})
 
-    current_username = auth.get_current_user(request)
-    res = await db.execute(select(UserORM).where(UserORM.username == current_username))
-    current_user = res.scalar()
-
-    if not current_user or not current_user.is_admin:
+    if not current_user.is_admin:
         raise HTTPException(status_code=403, detail="Not authorized to access car selection")
 
     cars = await db.execute(select(CarORM))
@@ -825,8 +731,8 @@ async def car_selection(request: Request, db: AsyncSession = Depends(get_session
 
 
 @router.get("/car_stats/{car_id}", response_class=HTMLResponse, name="get_car_stats")
-async def get_car_stats(request: Request, car_id: int, db: AsyncSession = Depends(get_session),
-                        access_token: Annotated[Optional[str], Cookie()] = None):
+async def get_car_stats(request: Request, car_id: int, db: AsyncSession = Depends(get_read_session),
+                        current_user: Optional[Principal] = Depends(get_principal)):
     """
         Renders the statistics of a car based on the given car ID.
 
@@ -834,7 +740,7 @@ async def get_car_stats(request: Request, car_id: int, db: AsyncSession = Depend
             request (Request): The current request object.
             car_id (int): The ID of the car whose statistics will be displayed.
             db (AsyncSession): The database session for querying car and parking history data.
-            access_token (Optional[str]): The access token for user authentication.
+            current_user (Optional[Principal]): The signed-in user, None without an access token.
 
         Returns:
             HTMLResponse: Renders the car statistics page or login page if not authenticated.
@@ -842,14 +748,10 @@ async def get_car_stats(request: Request, car_id: int, db: AsyncSession = Depend
         Raises:
             HTTPException: If the user is not authorized or the car is not found.
         """
-    if not access_token:
+    if current_user is None:
         return templates.TemplateResponse('auth/login_form.html', {'request': request, 'user': None})
 
-    current_username = auth.get_current_user(request)
-    res = await db.execute(select(UserORM).where(UserORM.username == current_username))
-    current_user = res.scalar()
-
-    if not current_user or not current_user.is_admin:
+    if not current_user.is_admin:
         raise HTTPException(status_code=403, detail="Not authorized to look car statistics")
 
     car = await db.execute(select(CarORM).options(selectinload(CarORM.parking_history)).where(CarORM.id == car_id))
@@ -877,14 +779,14 @@ async def get_car_stats(request: Request, car_id: int, db: AsyncSession = Depend
 
 
 @router.get("/parking_stats", response_class=HTMLResponse, name="get_parking_stats")
-async def get_parking_stats(request: Request, access_token: Annotated[Optional[str], Cookie()] = None,
-                            db: AsyncSession = Depends(get_session)):
+async def get_parking_stats(request: Request, current_user: Optional[Principal] = Depends(get_principal),
+                            db: AsyncSession = Depends(get_read_session)):
     """
         Renders overall parking statistics for administrators.
 
         Args:
             request (Request): The current request object.
-            access_token (Optional[str]): The access token for user authentication.
+            current_user (Optional[Principal]): The signed-in user, None without an access token.
             db (AsyncSession): The database session for querying parking and billing data.
 
         Returns:
@@ -893,37 +795,30 @@ async def get_parking_stats(request: Request, access_token: Annotated[Optional[s
         Raises:
             HTTPException: If the user is not authorized to view parking statistics.
         """
-    if not access_token:
+    if current_user is None:
         return templates.TemplateResponse('auth/login_form.html', {'request': request, 'user': None})
 
-    current_username = auth.get_current_user(request)
-    res = await db.execute(select(UserORM).where(UserORM.username == current_username))
-    current_user = res.scalar()
-
-    if not current_user or not current_user.is_admin:
+    if not current_user.is_admin:
         raise HTTPException(status_code=403, detail="Not authorized to look parking statistics")
 
-    total_parkings_count = await db.scalar(select(func.count(ParkingHistoryORM.id)))
-
-    total_cost = await db.execute(select(BillingORM.cost))
-    total_earned = sum(bill for bill in total_cost.scalars())
+    totals = await stats.parking_totals(db)
 
     return templates.TemplateResponse("admin/parking_stats.html", {
         "request": request,
-        "total_parkings": total_parkings_count,
-        "total_earned": total_earned
+        "total_parkings": totals.total_parkings,
+        "total_earned": totals.total_earned
     })
 
 
 @router.get("/active_users_stats", response_class=HTMLResponse, name="get_active_users_stats")
-async def get_active_users_stats(request: Request, access_token: Annotated[Optional[str], Cookie()] = None,
-                                 db: AsyncSession = Depends(get_session)):
+async def get_active_users_stats(request: Request, current_user: Optional[Principal] = Depends(get_principal),
+                                 db: AsyncSession = Depends(get_read_session)):
     """
         Get the statistics of active users in the last 30 days.
 
         Args:
             request (Request): The request object.
-            access_token (Optional[str]): Access token stored in cookies, used for authentication.
+            current_user (Optional[Principal]): The signed-in user, None without an access token.
             db (AsyncSession): The database session, passed as a dependency.
 
         Returns:
@@ -932,26 +827,14 @@ async def get_active_users_stats(request: Request, access_token: Annotated[Optio
         Raises:
             HTTPException: If the user is not authorized or is not an admin.
         """
-    if not access_token:
+    if current_user is None:
         return templates.TemplateResponse('auth/login_form.html', {'request': request, 'user': None})
 
-    current_username = auth.get_current_user(request)
-    res = await db.execute(select(UserORM).where(UserORM.username == current_username))
-    current_user = res.scalar()
-
-    if not current_user or not current_user.is_admin:
+    if not current_user.is_admin:
         raise HTTPException(status_code=403, detail="Not authorized to view user statistics")
 
-    last_month = datetime.now() - timedelta(days=30)
-
-    active_users = await db.execute(
-        select(func.count(UserORM.id))
-        .select_from(ParkingHistoryORM)
-        .join(UserORM, ParkingHistoryORM.car_id == UserORM.id)
-        .where(ParkingHistoryORM.start_time >= last_month)
-    )
-
-    count_active_users = active_users.scalar()
+    last_month = datetime.now() - stats.ACTIVE_USERS_WINDOW
+    count_active_users = await stats.active_users(db, last_month)
 
     return templates.TemplateResponse("admin/active_users_stats.html", {
         "request": request,
@@ -960,14 +843,14 @@ async def get_active_users_stats(request: Request, access_token: Annotated[Optio
 
 
 @router.get("/banned_users_stats", response_class=HTMLResponse, name="get_banned_users_stats")
-async def get_banned_users_stats(request: Request, access_token: Annotated[Optional[str], Cookie()] = None,
-                                 db: AsyncSession = Depends(get_session)):
+async def get_banned_users_stats(request: Request, current_user: Optional[Principal] = Depends(get_principal),
+                                 db: AsyncSession = Depends(get_read_session)):
     """
         Get the statistics of banned users.
 
         Args:
             request (Request): The request object.
-            access_token (Optional[str]): Access token stored in cookies, used for authentication.
+            current_user (Optional[Principal]): The signed-in user, None without an access token.
             db (AsyncSession): The database session, passed as a dependency.
 
         Returns:
@@ -976,19 +859,12 @@ async def get_banned_users_stats(request: Request, access_token: Annotated[Optio
         Raises:
             HTTPException: If the user is not authorized or is not an admin.
         """
-    if not access_token:
+    if current_user is None:
         return templates.TemplateResponse('auth/login_form.html', {'request': request, 'user': None})
 
-    current_username = auth.get_current_user(request)
-    res = await db.execute(select(UserORM).where(UserORM.username == current_username))
-    current_user = res.scalar()
-
-    if not current_user or not current_user.is_admin:
+    if not current_user.is_admin:
         raise HTTPException(status_code=403, detail="Not authorized to look user statistics")
-    banned_users = await db.execute(
-        select(func.count(UserORM.id)).where(UserORM.is_banned == True)
-    )
-    count_banned_users = banned_users.scalar()
+    count_banned_users = await stats.banned_users(db)
 
     return templates.TemplateResponse("admin/banned_users_stats.html", {
         "request": request,
@@ -997,14 +873,14 @@ async def get_banned_users_stats(request: Request, access_token: Annotated[Optio
 
 
 @router.get("/parking_occupancy_stats", response_class=HTMLResponse, name="get_parking_occupancy_stats")
-async def get_parking_occupancy_stats(request: Request, access_token: Annotated[Optional[str], Cookie()] = None,
-                                      db: AsyncSession = Depends(get_session), period: str = "week"):
+async def get_parking_occupancy_stats(request: Request, current_user: Optional[Principal] = Depends(get_principal),
+                                      db: AsyncSession = Depends(get_read_session), period: str = "week"):
     """
         Get parking occupancy statistics for a given period.
 
         Args:
             request (Request): The request object.
-            access_token (Optional[str]): Access token stored in cookies, used for authentication.
+            current_user (Optional[Principal]): The signed-in user, None without an access token.
             db (AsyncSession): The database session, passed as a dependency.
             period (str): The time period for occupancy stats ("week", "month", or "day").
 
@@ -1014,31 +890,14 @@ async def get_parking_occupancy_stats(request: Request, access_token: Annotated[
         Raises:
             HTTPException: If the user is not authorized or is not an admin.
         """
-    if not access_token:
+    if current_user is None:
         return templates.TemplateResponse('auth/login_form.html', {'request': request, 'user': None})
 
-    current_username = auth.get_current_user(request)
-    res = await db.execute(select(UserORM).where(UserORM.username == current_username))
-    current_user = res.scalar()
-
-    if not current_user or not current_user.is_admin:
+    if not current_user.is_admin:
         raise HTTPException(status_code=403, detail="Not authorized to look parking statistics")
 
-    now = datetime.now()
-
-    if period == "week":
-        start_time = now - timedelta(weeks=1)
-    elif period == "month":
-        start_time = now - timedelta(days=30)
-    else:
-        start_time = now - timedelta(days=1)
-
-    total_parkings = await db.execute(
-        select(func.count(ParkingHistoryORM.id)).where(ParkingHistoryORM.start_time >= start_time)
-    )
-    total_parkings_count = total_parkings.scalar()
-
-    average_occupancy = (total_parkings_count / (settings.total_spots * 24)) * 100
+    total_parkings_count = await stats.parking_count(db, stats.period_start(period))
+    average_occupancy = stats.occupancy_percent(total_parkings_count)
 
     return templates.TemplateResponse("admin/parking_occupancy_stats.html", {
         "request": request,
@@ -1048,14 +907,14 @@ async def get_parking_occupancy_stats(request: Request, access_token: Annotated[
 
 
 @router.get("/max_cars_day_stats", response_class=HTMLResponse, name="get_max_cars_day_stats")
-async def get_max_cars_per_day_stats(request: Request, access_token: Annotated[Optional[str], Cookie()] = None,
-                                     db: AsyncSession = Depends(get_session)):
+async def get_max_cars_per_day_stats(request: Request, current_user: Optional[Principal] = Depends(get_principal),
+                                     db: AsyncSession = Depends(get_read_session)):
     """
         Get the maximum number of cars parked in a single day.
 
         Args:
             request (Request): The request object.
-            access_token (Optional[str]): Access token stored in cookies, used for authentication.
+            current_user (Optional[Principal]): The signed-in user, None without an access token.
             db (AsyncSession): The database session, passed as a dependency.
 
         Returns:
@@ -1064,19 +923,12 @@ async def get_max_cars_per_day_stats(request: Request, access_token: Annotated[O
         Raises:
             HTTPException: If the user is not authorized or is not an admin.
         """
-    if not access_token:
+    if current_user is None:
         return templates.TemplateResponse('auth/login_form.html', {'request': request, 'user': None})
 
-    current_username = auth.get_current_user(request)
-    res = await db.execute(select(UserORM).where(UserORM.username == current_username))
-    current_user = res.scalar()
-
-    if not current_user or not current_user.is_admin:
+    if not current_user.is_admin:
         raise HTTPException(status_code=403, detail="Not authorized to look cars statistics")
-    max_cars = await db.execute(
-        select(func.count(ParkingHistoryORM.id)).group_by(func.date(ParkingHistoryORM.start_time))
-    )
-    max_cars_per_day = max_cars.scalar()
+    max_cars_per_day = await stats.busiest_day(db)
 
     return templates.TemplateResponse("admin/max_cars_day_stats.html", {
         "request": request,
@@ -1085,14 +937,14 @@ async def get_max_cars_per_day_stats(request: Request, access_token: Annotated[O
 
 
 @router.get("/peak_activity_time_stats", response_class=HTMLResponse, name="get_peak_activity_time_stats")
-async def get_peak_activity_time_stats(request: Request, access_token: Annotated[Optional[str], Cookie()] = None,
-                                       db: AsyncSession = Depends(get_session)):
+async def get_peak_activity_time_stats(request: Request, current_user: Optional[Principal] = Depends(get_principal),
+                                       db: AsyncSession = Depends(get_read_session)):
     """
        Get statistics on the peak parking activity time.
 
        Args:
            request (Request): The current HTTP request object.
-           access_token (str, optional): JWT access token stored in cookies.
+           current_user (Optional[Principal]): The signed-in user, None without an access token.
            db (AsyncSession): Database session for executing queries.
 
        Returns:
@@ -1101,38 +953,29 @@ async def get_peak_activity_time_stats(request: Request, access_token: Annotated
        Raises:
            HTTPException: If the user is not authenticated or not an admin.
        """
-    if not access_token:
+    if current_user is None:
         return templates.TemplateResponse('auth/login_form.html', {'request': request, 'user': None})
 
-    current_username = auth.get_current_user(request)
-    res = await db.execute(select(UserORM).where(UserORM.username == current_username))
-    current_user = res.scalar()
-
-    if not current_user or not current_user.is_admin:
+    if not current_user.is_admin:
         raise HTTPException(status_code=403, detail="Not authorized to look statistics")
-    peak_time = await db.execute(
-        select(func.extract('hour', ParkingHistoryORM.start_time), func.count(ParkingHistoryORM.id))
-        .group_by(func.extract('hour', ParkingHistoryORM.start_time))
-        .order_by(func.count(ParkingHistoryORM.id).desc())
-    )
-    most_active_hour, count = peak_time.first()
+    peak = await stats.peak_hour(db)
 
     return templates.TemplateResponse("admin/peak_activity_time_stats.html", {
         "request": request,
-        "most_active_hour": most_active_hour,
-        "parking_count": count
+        "most_active_hour": peak.hour,
+        "parking_count": peak.parkings
     })
 
 
 @router.get("/average_parking_duration_stats", response_class=HTMLResponse, name="get_average_parking_duration_stats")
-async def get_average_parking_duration_stats(request: Request, access_token: Annotated[Optional[str], Cookie()] = None,
-                                             db: AsyncSession = Depends(get_session)):
+async def get_average_parking_duration_stats(request: Request, current_user: Optional[Principal] = Depends(get_principal),
+                                             db: AsyncSession = Depends(get_read_session)):
     """
         Get statistics on the average parking duration.
 
         Args:
             request (Request): The current HTTP request object.
-            access_token (str, optional): JWT access token stored in cookies.
+            current_user (Optional[Principal]): The signed-in user, None without an access token.
             db (AsyncSession): Database session for executing queries.
 
         Returns:
@@ -1141,22 +984,12 @@ async def get_average_parking_duration_stats(request: Request, access_token: Ann
         Raises:
             HTTPException: If the user is not authenticated or not an admin.
         """
-    if not access_token:
+    if current_user is None:
         return templates.TemplateResponse('auth/login_form.html', {'request': request, 'user': None})
 
-    current_username = auth.get_current_user(request)
-    res = await db.execute(select(UserORM).where(UserORM.username == current_username))
-    current_user = res.scalar()
-
-    if not current_user or not current_user.is_admin:
+    if not current_user.is_admin:
         raise HTTPException(status_code=403, detail="Not authorized to look statistics")
-    average_duration = await db.execute(
-        select(func.avg(func.extract('epoch', ParkingHistoryORM.end_time - ParkingHistoryORM.start_time)))
-        .where(ParkingHistoryORM.end_time.isnot(None))
-    )
-    average_duration_seconds = average_duration.scalar()
-
-    average_duration_hours = average_duration_seconds / 3600 if average_duration_seconds else 0
+    average_duration_hours = await stats.average_duration_hours(db)
 
     return templates.TemplateResponse("admin/average_parking_duration_stats.html", {
         "request": request,
@@ -1165,14 +998,14 @@ async def get_average_parking_duration_stats(request: Request, access_token: Ann
 
 
 @router.get("/parking_count_stats", response_class=HTMLResponse, name="get_parking_count_stats")
-async def get_parking_count_stats(request: Request, access_token: Annotated[Optional[str], Cookie()] = None,
-                                  db: AsyncSession = Depends(get_session), period: str = "week"):
+async def get_parking_count_stats(request: Request, current_user: Optional[Principal] = Depends(get_principal),
+                                  db: AsyncSession = Depends(get_read_session), period: str = "week"):
     """
         Get parking count statistics based on the specified time period.
 
         Args:
             request (Request): The current HTTP request object.
-            access_token (str, optional): JWT access token stored in cookies.
+            current_user (Optional[Principal]): The signed-in user, None without an access token.
             db (AsyncSession): Database session for executing queries.
             period (str): Time period for which statistics are calculated ('day', 'week', or 'month').
 
@@ -1182,28 +1015,12 @@ async def get_parking_count_stats(request: Request, access_token: Annotated[Opti
         Raises:
             HTTPException: If the user is not authenticated or not an admin.
         """
-    if not access_token:
+    if current_user is None:
         return templates.TemplateResponse('auth/login_form.html', {'request': request, 'user': None})
 
-    current_username = auth.get_current_user(request)
-    res = await db.execute(select(UserORM).where(UserORM.username == current_username))
-    current_user = res.scalar()
-
-    if not current_user or not current_user.is_admin:
+    if not current_user.is_admin:
         raise HTTPException(status_code=403, detail="Not authorized to look parking statistics")
-    now = datetime.now()
-
-    if period == "week":
-        start_time = now - timedelta(weeks=1)
-    elif period == "month":
-        start_time = now - timedelta(days=30)
-    else:
-        start_time = now - timedelta(days=1)
-
-    parking_count = await db.execute(
-        select(func.count(ParkingHistoryORM.id)).where(ParkingHistoryORM.start_time >= start_time)
-    )
-    count = parking_count.scalar()
+    count = await stats.parking_count(db, stats.period_start(period))
 
     return templates.TemplateResponse("admin/parking_count_stats.html", {
         "request": request,
@@ -1213,14 +1030,14 @@ async def get_parking_count_stats(request: Request, access_token: Annotated[Opti
 
 
 @router.get("/available_spots_stats", response_class=HTMLResponse, name="get_available_spots_stats")
-async def get_available_spots_stats(request: Request, access_token: Annotated[Optional[str], Cookie()] = None,
+async def get_available_spots_stats(request: Request, current_user: Optional[Principal] = Depends(get_principal),
                                     db: AsyncSession = Depends(get_session)):
     """
         Get statistics on available parking spots.
 
         Args:
             request (Request): The current HTTP request object.
-            access_token (str, optional): JWT access token stored in cookies.
+            current_user (Optional[Principal]): The signed-in user, None without an access token.
             db (AsyncSession): Database session for executing queries.
 
         Returns:
@@ -1229,23 +1046,42 @@ async def get_available_spots_stats(request: Request, access_token: Annotated[Op
         Raises:
             HTTPException: If the user is not authenticated or not an admin.
         """
-    if not access_token:
+    if current_user is None:
         return templates.TemplateResponse('auth/login_form.html', {'request': request, 'user': None})
 
-    current_username = auth.get_current_user(request)
-    res = await db.execute(select(UserORM).where(UserORM.username == current_username))
-    current_user = res.scalar()
-
-    if not current_user or not current_user.is_admin:
+    if not current_user.is_admin:
         raise HTTPException(status_code=403, detail="Not authorized to look parking statistics")
-    occupied_spots = await db.execute(
-        select(func.count(ParkingHistoryORM.id)).where(ParkingHistoryORM.end_time.is_(None))
-    )
-    occupied_spots_count = occupied_spots.scalar()
-
-    available_spots = settings.total_spots - occupied_spots_count
+    counts = await lot_allocator.counts(db)
+    available_spots = counts.free
 
     return templates.TemplateResponse("admin/available_spots_stats.html", {
         "request": request,
         "available_spots": available_spots
     })
+
+
+@router.get("/dashboard_stats", response_class=JSONResponse, name="get_dashboard_stats")
+async def get_dashboard_stats(request: Request, current_user: Optional[Principal] = Depends(get_principal),
+                              db: AsyncSession = Depends(get_read_session)):
+    """
+        Get every KPI of the statistics management page in one database round trip.
+
+        Args:
+            request (Request): The current HTTP request object.
+            current_user (Optional[Principal]): The signed-in user, None without an access token.
+            db (AsyncSession): Database session for executing queries.
+
+        Returns:
+            dict: Parking totals, earnings, user counters, parking counts and occupancy
+            per period, the busiest day, the peak hour and the average parking duration.
+
+        Raises:
+            HTTPException: If the user is not authenticated or not an admin.
+        """
+    if current_user is None:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+
+    if not current_user.is_admin:
+        raise HTTPException(status_code=403, detail="Not authorized to look statistics")
+
+    return await stats.dashboard(db)
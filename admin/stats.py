@@ -0,0 +1,220 @@
+from datetime import datetime, timedelta
+from typing import Any, Dict, NamedTuple, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from db_models.orms import (BillingORM, CarORM, ParkingHistoryORM, UserORM,
+                            ParkingDailyStatsORM, ParkingHourlyStatsORM)
+from db_models.rollups import hour_bucket
+from settings import settings
+
+PERIODS = {
+    'day': timedelta(days=1),
+    'week': timedelta(weeks=1),
+    'month': timedelta(days=30),
+}
+ACTIVE_USERS_WINDOW = timedelta(days=30)
+
+
+class ParkingTotals(NamedTuple):
+    """All-time parking figures.
+
+        Attributes:
+            total_parkings (int): Number of parking sessions.
+            total_earned (float): Sum of the costs of all bills, 0 without bills.
+        """
+    total_parkings: int
+    total_earned: float
+
+
+class PeakHour(NamedTuple):
+    """The hour of the day most parkings start at.
+
+        Attributes:
+            hour (Optional[int]): Hour of the day (0-23), None without parkings.
+            parkings (int): Parkings started at that hour.
+        """
+    hour: Optional[int]
+    parkings: int
+
+
+def period_start(period: str, now: Optional[datetime] = None) -> datetime:
+    """Start of a statistics period ending now; unknown periods count as a day."""
+    now = datetime.now() if now is None else now
+    return now - PERIODS.get(period, PERIODS['day'])
+
+
+def occupancy_percent(parkings: int) -> float:
+    """Parkings of a period as a share of the spot-hours of a day, in percent."""
+    return (parkings / (settings.total_spots * 24)) * 100
+
+
+# Each statement below computes the figures of one statistics page in a single
+# query; the dashboard combines them into one statement. Parking counts and
+# durations are read from the daily and hourly rollups (see db_models.rollups),
+# so they cost a few rows per day instead of a scan of parking_history.
+
+def _total_earned():
+    return select(func.coalesce(func.sum(BillingORM.cost), 0.0)).scalar_subquery()
+
+
+def _total_parkings():
+    return select(func.coalesce(func.sum(ParkingDailyStatsORM.parkings), 0)).scalar_subquery()
+
+
+def _busiest_day():
+    return select(func.coalesce(func.max(ParkingDailyStatsORM.parkings), 0)).scalar_subquery()
+
+
+def _peak_hour():
+    hour = func.extract('hour', ParkingHourlyStatsORM.hour)
+    parkings = func.sum(ParkingHourlyStatsORM.parkings)
+    return (select(hour.label('hour'), parkings.label('parkings'))
+            .group_by(hour)
+            .order_by(parkings.desc(), hour)
+            .limit(1)
+            .cte('peak_hour'))
+
+
+def _active_users(since: datetime):
+    return (select(func.count(CarORM.user_id.distinct()))
+            .select_from(ParkingHistoryORM)
+            .join(CarORM, ParkingHistoryORM.car_id == CarORM.id)
+            .where(ParkingHistoryORM.start_time >= since)
+            .scalar_subquery())
+
+
+def _banned_users():
+    return (select(func.count().filter(UserORM.is_banned == True))
+            .select_from(UserORM)
+            .scalar_subquery())
+
+
+def _parking_count(since: datetime):
+    # whole hours from the rollup, the partial first hour from parking_history
+    boundary = hour_bucket(since)
+    if boundary < since:
+        boundary += timedelta(hours=1)
+    hours = (select(func.coalesce(func.sum(ParkingHourlyStatsORM.parkings), 0))
+             .where(ParkingHourlyStatsORM.hour >= boundary)
+             .scalar_subquery())
+    rest = (select(func.count())
+            .select_from(ParkingHistoryORM)
+            .where(ParkingHistoryORM.start_time >= since,
+                   ParkingHistoryORM.start_time < boundary)
+            .scalar_subquery())
+    return hours + rest
+
+
+def _average_duration():
+    return (select(func.sum(ParkingDailyStatsORM.duration_seconds)
+                   / func.nullif(func.sum(ParkingDailyStatsORM.finished), 0))
+            .scalar_subquery())
+
+
+def _hours(seconds: Any) -> float:
+    return float(seconds) / 3600 if seconds else 0
+
+
+def _peak(hour: Any, parkings: Optional[int]) -> PeakHour:
+    return PeakHour(None if hour is None else int(hour), parkings or 0)
+
+
+async def parking_totals(db: AsyncSession) -> ParkingTotals:
+    """Counts the parkings and sums the bills without loading them.
+
+        Args:
+            db (AsyncSession): Session for the query.
+
+        Returns:
+            ParkingTotals: The number of parkings and the money earned.
+        """
+    res = await db.execute(select(_total_parkings(), _total_earned()))
+    total_parkings, total_earned = res.one()
+    return ParkingTotals(total_parkings, float(total_earned))
+
+
+async def active_users(db: AsyncSession, since: datetime) -> int:
+    """Number of users with a car parked since the given time."""
+    return await db.scalar(select(_active_users(since)))
+
+
+async def banned_users(db: AsyncSession) -> int:
+    """Number of banned users."""
+    return await db.scalar(select(_banned_users()))
+
+
+async def parking_count(db: AsyncSession, since: datetime) -> int:
+    """Number of parkings started since the given time."""
+    return await db.scalar(select(_parking_count(since)))
+
+
+async def busiest_day(db: AsyncSession) -> int:
+    """Largest number of parkings started on one calendar day."""
+    return await db.scalar(select(_busiest_day()))
+
+
+async def peak_hour(db: AsyncSession) -> PeakHour:
+    """The hour of the day most parkings start at."""
+    peak = _peak_hour()
+    res = await db.execute(select(peak.c.hour, peak.c.parkings))
+    row = res.first()
+    return _peak(*row) if row else PeakHour(None, 0)
+
+
+async def average_duration_hours(db: AsyncSession) -> float:
+    """Average length of the finished parkings in hours, 0 if there are none."""
+    seconds = await db.scalar(select(_average_duration()))
+    return _hours(seconds)
+
+
+async def dashboard(db: AsyncSession, now: Optional[datetime] = None) -> Dict[str, Any]:
+    """Computes every KPI of the statistics page in one query.
+
+        Parking counts, the busiest day, the peak hour and the average
+        duration come from the rollup tables; the bill sum and the user
+        counters are aggregated directly. Every figure is a scalar subquery
+        of one statement, so the whole dashboard is one round trip.
+
+        Args:
+            db (AsyncSession): Session for the query.
+            now (Optional[datetime]): End of the periods; defaults to now.
+
+        Returns:
+            Dict[str, Any]: The KPIs, keyed like the variables of the statistics templates.
+        """
+    now = datetime.now() if now is None else now
+    peak = _peak_hour()
+
+    res = await db.execute(
+        select(
+            _total_parkings().label('total_parkings'),
+            *[_parking_count(period_start(period, now)).label(f'parkings_{period}')
+              for period in PERIODS],
+            _average_duration().label('average_duration'),
+            _total_earned().label('total_earned'),
+            _active_users(now - ACTIVE_USERS_WINDOW).label('active_users'),
+            _banned_users().label('banned_users'),
+            _busiest_day().label('busiest_day'),
+            select(peak.c.hour).scalar_subquery().label('hour'),
+            select(peak.c.parkings).scalar_subquery().label('parkings'),
+        )
+    )
+    row = res.one()
+
+    parking_counts = {period: getattr(row, f'parkings_{period}') for period in PERIODS}
+    most_active = _peak(row.hour, row.parkings)
+    return {
+        'total_parkings': row.total_parkings,
+        'total_earned': float(row.total_earned),
+        'active_users_count': row.active_users,
+        'banned_users_count': row.banned_users,
+        'parking_count': parking_counts,
+        'average_occupancy_percent': {period: occupancy_percent(count)
+                                      for period, count in parking_counts.items()},
+        'max_cars_in_a_day': row.busiest_day,
+        'most_active_hour': most_active.hour,
+        'most_active_hour_parkings': most_active.parkings,
+        'average_parking_duration_hours': _hours(row.average_duration),
+    }
@@ -0,0 +1,121 @@
+import time
+from typing import Dict, NamedTuple, Optional, Tuple
+
+from fastapi import Depends, Request
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from auth.auth import Authentication
+from db_models.db import get_session
+from db_models.orms import UserORM
+from settings import settings
+
+auth = Authentication()
+
+
+class Principal(NamedTuple):
+    """The signed-in user as seen by the route handlers.
+
+        Attributes:
+            id (int): The ID of the user.
+            username (str): The username of the user.
+            is_admin (bool): Whether the user is an administrator.
+            is_banned (bool): Whether the user is banned.
+        """
+    id: int
+    username: str
+    is_admin: bool
+    is_banned: bool
+
+
+class PrincipalCache:
+    """Short-lived per-process cache of the users behind the access tokens.
+
+        Every authenticated page needs the id and the admin and ban flags of
+        its user; caching them by username saves one query per request. Ban,
+        unban and delete invalidate the entry of the affected user in this
+        process; the TTL bounds how long other workers keep a stale entry.
+
+        Attributes:
+            ttl (float): Seconds an entry is served before the user is read again.
+            max_entries (int): Entries kept before the expired ones are dropped.
+        """
+
+    def __init__(self, ttl: float = 30, max_entries: int = 10_000) -> None:
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: Dict[str, Tuple[Principal, float]] = {}
+
+    def _prune(self, now: float) -> None:
+        """Drops the expired entries, or all of them if that is not enough."""
+        self._entries = {username: entry for username, entry in self._entries.items()
+                         if entry[1] > now}
+        if len(self._entries) >= self.max_entries:
+            self._entries.clear()
+
+    async def get(self, username: str, db: AsyncSession) -> Optional[Principal]:
+        """Returns the user with the given username, reading it on a miss.
+
+            Args:
+                username (str): The username from the access token.
+                db (AsyncSession): Session used if the user is not cached.
+
+            Returns:
+                Optional[Principal]: The user, None if it does not exist.
+            """
+        now = time.monotonic()
+        entry = self._entries.get(username)
+        if entry is not None and entry[1] > now:
+            return entry[0]
+
+        stmnt = (
+            select(UserORM.id, UserORM.username, UserORM.is_admin, UserORM.is_banned)
+            .where(UserORM.username == username)
+        )
+        res = await db.execute(stmnt)
+        row = res.first()
+        if row is None:
+            self._entries.pop(username, None)
+            return None
+
+        principal = Principal(row.id, row.username, bool(row.is_admin), bool(row.is_banned))
+        if len(self._entries) >= self.max_entries:
+            self._prune(now)
+        self._entries[username] = (principal, now + self.ttl)
+        return principal
+
+    def invalidate(self, user_id: int) -> None:
+        """Forgets a user whose flags changed or who was deleted."""
+        self._entries = {username: entry for username, entry in self._entries.items()
+                         if entry[0].id != user_id}
+
+    def clear(self) -> None:
+        """Forgets every user."""
+        self._entries.clear()
+
+
+principal_cache = PrincipalCache(ttl=settings.principal_cache_ttl)
+
+
+async def get_principal(request: Request,
+                        db: AsyncSession = Depends(get_session)) -> Optional[Principal]:
+    """
+        FastAPI dependency resolving the user of the ``access_token`` cookie.
+
+        The token is decoded once per request and the user is served from
+        ``principal_cache``, so the database is only queried on a cache miss.
+
+        Args:
+            request (Request): The request carrying the cookies.
+            db (AsyncSession): Session used on a cache miss.
+
+        Returns:
+            Optional[Principal]: The signed-in user, None without a token or if the user no longer exists.
+
+        Raises:
+            HTTPException: If the access token is invalid or expired.
+        """
+    if not request.cookies.get("access_token"):
+        return None
+    username = auth.get_current_user(request)
+    return await principal_cache.get(username, db)
@@ -0,0 +1,329 @@
+"""
+Latency benchmark for plate recognition and the camera gate endpoints.
+
+Replays a directory of recorded gate frames through every recognition stage
+(decode, detect, crop, OCR) and through ``/cameras/enter`` and
+``/cameras/leave`` of the FastAPI application backed by a throwaway database.
+Each frame is expected to be named after the plate it shows, e.g.
+``AA1234BB.jpg``; the plates are registered in the database so that the gate
+takes the full entry and leave paths.
+
+Usage:
+    python -m benchmarks.gate_latency path/to/frames --output result.json
+
+Compare two result files to spot regressions between commits. The default
+database is an in-memory SQLite (requires ``aiosqlite``); pass a Postgres URL
+with ``--database-url`` to benchmark against a real server.
+"""
+import argparse
+import asyncio
+import json
+import platform
+import re
+import resource
+import subprocess
+import sys
+import time
+from datetime import date, datetime
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+IMAGE_SUFFIXES = {'.jpg', '.jpeg', '.png', '.bmp'}
+PERCENTILES = (50, 95, 99)
+
+
+def peak_rss_mb() -> float:
+    """Returns the peak resident set size of the process in megabytes."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    if sys.platform == 'darwin':
+        return peak / 2 ** 20
+    return peak / 2 ** 10
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """
+        Summarizes latency samples.
+
+        Args:
+            samples (List[float]): Durations in seconds.
+
+        Returns:
+            Dict[str, float]: Count, mean and percentiles in milliseconds.
+        """
+    if not samples:
+        return {'count': 0}
+    values = np.asarray(samples) * 1000
+    summary = {'count': len(samples), 'mean_ms': float(values.mean())}
+    for p in PERCENTILES:
+        summary[f'p{p}_ms'] = float(np.percentile(values, p))
+    return summary
+
+
+def load_frames(directory: Path, limit: int = 0) -> Dict[str, bytes]:
+    """
+        Reads the recorded frames of a directory.
+
+        Args:
+            directory (Path): Directory with frames named after their plates.
+            limit (int): Maximum number of frames to read; 0 reads all of them.
+
+        Returns:
+            Dict[str, bytes]: Encoded frames keyed by the plate they show.
+        """
+    from cameras.gate import CAR_PLATE_REGEX
+
+    frames = {}
+    for path in sorted(directory.iterdir()):
+        if path.suffix.lower() not in IMAGE_SUFFIXES:
+            continue
+        plate = re.sub(CAR_PLATE_REGEX, "", path.stem.upper())
+        frames[plate] = path.read_bytes()
+        if limit and len(frames) >= limit:
+            break
+    return frames
+
+
+def bench_stages(frames: Dict[str, bytes], repeat: int) -> Dict:
+    """
+        Times every recognition stage on each frame, one frame at a time.
+
+        Args:
+            frames (Dict[str, bytes]): Encoded frames keyed by plate.
+            repeat (int): Number of passes over the frames.
+
+        Returns:
+            Dict: Per-stage latency summaries, throughput and read accuracy.
+        """
+    from cameras.gate import CAR_PLATE_REGEX
+    from ocr_ml import plate_recognition as pr
+
+    stages = {name: [] for name in ('decode', 'detect', 'crop', 'ocr', 'total')}
+    correct = 0
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for plate, frame in frames.items():
+            t0 = time.perf_counter()
+            decoded = pr.decode_frame(frame)
+            t1 = time.perf_counter()
+            box = pr.detect_license_plates(decoded.image)
+            t2 = time.perf_counter()
+            crop = pr.plate_crop(decoded, box)
+            t3 = time.perf_counter()
+            found = pr.recognize_text_easy(crop) if crop is not None and crop.size else []
+            t4 = time.perf_counter()
+
+            for name, value in zip(stages, (t1 - t0, t2 - t1, t3 - t2, t4 - t3, t4 - t0)):
+                stages[name].append(value)
+            reads = {re.sub(CAR_PLATE_REGEX, "", item[1].upper()) for item in found}
+            correct += plate in reads
+    elapsed = time.perf_counter() - started
+
+    processed = repeat * len(frames)
+    return {
+        'stages': {name: summarize(samples) for name, samples in stages.items()},
+        'images_per_sec': processed / elapsed if elapsed else 0.0,
+        'exact_read_rate': correct / processed if processed else 0.0,
+        'peak_rss_mb': peak_rss_mb(),
+    }
+
+
+async def _seed(session_factory, plates: List[str]) -> None:
+    """Creates the schema and registers one user and car per plate."""
+    from db_models.db import BaseORM
+    from db_models.orms import (UserORM, CarORM, TariffORM,
+                                CreditLimitsORM, ParkingLotORM)
+
+    async with session_factory() as db:
+        async with db.bind.begin() as conn:
+            await conn.run_sync(BaseORM.metadata.drop_all)
+            await conn.run_sync(BaseORM.metadata.create_all)
+
+        for i, plate in enumerate(plates):
+            user = UserORM(username=f'bench{i}',
+                           email=f'bench{i}@example.com',
+                           password='-')
+            db.add_all([user, CarORM(car_plate=plate, owner=user)])
+        db.add_all([TariffORM(tariff=1.0, set_date=date(2000, 1, 1)),
+                    CreditLimitsORM(limit=1000.0, set_date=date(2000, 1, 1))])
+        db.add_all([ParkingLotORM() for _ in plates])
+        await db.commit()
+
+
+async def _bench_routes(frames: Dict[str, bytes],
+                        repeat: int,
+                        concurrency: int,
+                        database_url: str,
+                        raw: bool) -> Dict:
+    import httpx
+    from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+    from sqlalchemy.orm import sessionmaker
+    from sqlalchemy.pool import StaticPool
+
+    from main import app
+    from db_models.db import get_session
+    from ocr_ml.batching import plate_batcher
+
+    engine_args = {}
+    if database_url.startswith('sqlite'):
+        # keep a single connection so the in-memory database is shared
+        engine_args = {'poolclass': StaticPool,
+                       'connect_args': {'check_same_thread': False}}
+    engine = create_async_engine(database_url, **engine_args)
+    session_factory = sessionmaker(bind=engine,
+                                   class_=AsyncSession,
+                                   autoflush=False,
+                                   expire_on_commit=False)
+    await _seed(session_factory, list(frames))
+
+    async def override_session():
+        async with session_factory() as session:
+            yield session
+
+    app.dependency_overrides[get_session] = override_session
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    timings = {'enter': [], 'leave': []}
+    failures = {'enter': 0, 'leave': 0}
+
+    async def gate(client, route: str, frame: bytes) -> None:
+        async with semaphore:
+            t0 = time.perf_counter()
+            if raw:
+                response = await client.post(f'/cameras/{route}/raw',
+                                             content=frame,
+                                             headers={'content-type': 'image/jpeg'})
+            else:
+                response = await client.post(f'/cameras/{route}',
+                                             files={'car_plate': ('frame.jpg', frame,
+                                                                  'image/jpeg')})
+            timings[route].append(time.perf_counter() - t0)
+            # the raised barrier page is the only one saying "Піднятий"
+            if response.status_code != 200 or 'Піднятий' not in response.text:
+                failures[route] += 1
+
+    transport = httpx.ASGITransport(app=app)
+    started = time.perf_counter()
+    try:
+        async with httpx.AsyncClient(transport=transport,
+                                     base_url='http://bench') as client:
+            for _ in range(repeat):
+                for route in ('enter', 'leave'):
+                    await asyncio.gather(*(gate(client, route, frame)
+                                           for frame in frames.values()))
+    finally:
+        elapsed = time.perf_counter() - started
+        app.dependency_overrides.pop(get_session, None)
+        await plate_batcher.stop()
+        await engine.dispose()
+
+    requests = sum(len(samples) for samples in timings.values())
+    return {
+        'routes': {route: summarize(samples) for route, samples in timings.items()},
+        'failures': failures,
+        'requests_per_sec': requests / elapsed if elapsed else 0.0,
+        'peak_rss_mb': peak_rss_mb(),
+    }
+
+
+def bench_routes(frames: Dict[str, bytes],
+                 repeat: int,
+                 concurrency: int,
+                 database_url: str,
+                 raw: bool = False) -> Dict:
+    """
+        Times ``/cameras/enter`` followed by ``/cameras/leave`` for every frame.
+
+        Args:
+            frames (Dict[str, bytes]): Encoded frames keyed by plate.
+            repeat (int): Number of enter/leave rounds.
+            concurrency (int): Number of requests in flight at once.
+            database_url (str): Async SQLAlchemy URL of a disposable database;
+                its tables are dropped and recreated.
+            raw (bool): Post frames as raw bodies to the ``/raw`` endpoints
+                instead of multipart uploads.
+
+        Returns:
+            Dict: Per-route latency summaries, failures and throughput.
+        """
+    return asyncio.run(_bench_routes(frames, repeat, concurrency,
+                                     database_url, raw))
+
+
+def git_revision() -> str:
+    """Returns the current commit hash, or an empty string outside git."""
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'],
+                              cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ''
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('frames', type=Path,
+                        help='directory of frames named after their plates')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='passes over the frames per benchmark')
+    parser.add_argument('--warmup', type=int, default=2,
+                        help='frames recognized before timing starts')
+    parser.add_argument('--limit', type=int, default=0,
+                        help='maximum number of frames to use')
+    parser.add_argument('--concurrency', type=int, default=1,
+                        help='camera requests in flight at once')
+    parser.add_argument('--database-url', default='sqlite+aiosqlite://',
+                        help='disposable database for the route benchmark')
+    parser.add_argument('--raw', action='store_true',
+                        help='post frames to the raw-body camera endpoints')
+    parser.add_argument('--skip-stages', action='store_true')
+    parser.add_argument('--skip-routes', action='store_true')
+    parser.add_argument('--output', type=Path,
+                        help='write the JSON result to this file')
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> Dict:
+    args = parse_args(argv)
+    frames = load_frames(args.frames, args.limit)
+    if not frames:
+        raise SystemExit(f"No frames found in {args.frames}")
+
+    from ocr_ml import plate_recognition as pr
+
+    load_started = time.perf_counter()
+    pr.warm_up()
+    for frame in list(frames.values())[:args.warmup]:
+        pr.get_plate_number(frame)
+
+    result = {
+        'revision': git_revision(),
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'frames': len(frames),
+        'repeat': args.repeat,
+        'model_load_sec': time.perf_counter() - load_started,
+    }
+    if not args.skip_stages:
+        result['recognition'] = bench_stages(frames, args.repeat)
+    if not args.skip_routes:
+        result['gate'] = bench_routes(frames, args.repeat,
+                                      args.concurrency, args.database_url,
+                                      args.raw)
+    result['peak_rss_mb'] = peak_rss_mb()
+
+    report = json.dumps(result, indent=2)
+    if args.output:
+        args.output.write_text(report)
+    print(report)
+    return result
+
+
+if __name__ == '__main__':
+    main()
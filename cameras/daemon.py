@@ -0,0 +1,262 @@
+"""
+Continuous gate camera mode: reads the gate cameras as video streams.
+
+Usage:
+    python -m cameras.daemon --enter rtsp://cam-1/stream --leave rtsp://cam-2/stream
+    python -m cameras.daemon --enter recordings/enter.mp4 --dry-run
+
+Every source is read by a ``GateStream`` thread. Frames without movement in
+the lane are dropped by a ``MotionGate`` before they reach the detector; the
+lane of every camera can be restricted to a polygon with ``--roi-file`` (see
+``cameras.motion.load_rois``). The remaining frames of all cameras are
+recognized in one batch on the inference executor. A ``PlateTracker`` per
+camera follows every plate across frames and votes its reads into one plate
+per vehicle pass, which goes straight to the entry/leave decision of
+``cameras.gate``, the same one the ``/cameras/enter`` and ``/cameras/leave``
+routes use. As a safety net, a plate decided at a gate is ignored there for
+``GATE_COOLDOWN`` seconds, so a car whose track was lost while waiting at the
+barrier is not billed twice.
+
+The share of frames skipped by the motion gate is logged every
+``--report-interval`` seconds and on exit. Video files are replayed frame by
+frame and the daemon exits when all of them end, which makes recordings
+usable for testing instead of live cameras; ``--dry-run`` logs the plates
+without touching the database.
+"""
+import argparse
+import asyncio
+import logging
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import cameras.gate as gate  # noqa: E402
+from cameras.motion import MotionGate, MotionStats, load_rois  # noqa: E402
+from cameras.streams import GateStream  # noqa: E402
+from cameras.tracking import PlatePass, PlateTracker  # noqa: E402
+from db_models.db import async_session  # noqa: E402
+from ocr_ml.executor import InferenceError, inference_executor  # noqa: E402
+from ocr_ml.plate_recognition import (DecodedFrame, recognize_frame_plates,  # noqa: E402
+                                      warm_up)
+from settings import settings  # noqa: E402
+
+logger = logging.getLogger(__name__)
+
+GATES = {'enter': gate.enter, 'leave': gate.leave}
+
+
+class CameraDaemon:
+    """
+        Feeds the gate cameras into recognition and the gate decisions.
+
+        Attributes:
+            streams (List[GateStream]): The gate cameras.
+            motion (List[MotionGate]): The motion gate of every camera.
+            trackers (List[PlateTracker]): The plate tracker of every camera.
+            cooldown (float): Seconds a decided plate is ignored at its gate.
+            dry_run (bool): Only log the recognized plates.
+            poll (float): Seconds to sleep when no camera has a new frame.
+            report_interval (float): Seconds between skip ratio reports; 0 reports on exit only.
+        """
+
+    def __init__(self,
+                 streams: List[GateStream],
+                 motion_threshold: float = 0.01,
+                 motion_pixel_delta: int = 25,
+                 cooldown: float = 15.0,
+                 dry_run: bool = False,
+                 poll: float = 0.01,
+                 rois: Optional[Dict[str, List[Tuple[float, float]]]] = None,
+                 report_interval: float = 60.0) -> None:
+        self.streams = streams
+        rois = rois or {}
+        self.motion = [MotionGate(motion_threshold, motion_pixel_delta,
+                                  roi=rois.get(stream.source))
+                       for stream in streams]
+        self.trackers = [PlateTracker(settings.track_iou_threshold,
+                                      settings.track_max_age,
+                                      settings.track_min_reads,
+                                      settings.track_min_agreement)
+                         for _ in streams]
+        self.cooldown = cooldown
+        self.dry_run = dry_run
+        self.poll = poll
+        self.report_interval = report_interval
+        self.decisions = 0
+        self._recent: Dict[Tuple[str, str], float] = {}
+
+    def _cooling_down(self, gate_name: str, plates: List[str]) -> bool:
+        """Tells whether any of the plates was decided at the gate within the cooldown."""
+        now = time.monotonic()
+        self._recent = {key: decided for key, decided in self._recent.items()
+                        if now - decided < self.cooldown}
+        return any((gate_name, plate) in self._recent for plate in plates if plate)
+
+    async def decide(self, stream: GateStream, plate_pass: PlatePass) -> None:
+        """
+            Runs the gate decision for a vehicle pass seen by a camera.
+
+            Args:
+                stream (GateStream): The camera the pass was seen by.
+                plate_pass (PlatePass): The voted plate of the pass.
+            """
+        car_plates = plate_pass.recognitions()
+        plates = gate.normalize_plates(car_plates)
+        if self._cooling_down(stream.gate, plates):
+            return
+
+        logger.info("%s %s: read %s from %d frames (agreement %.2f)",
+                    stream.gate, stream.source, plate_pass.text,
+                    plate_pass.reads, plate_pass.confidence)
+        if not self.dry_run:
+            async with async_session() as db:
+                decision = await GATES[stream.gate](car_plates, db)
+            if decision.raised:
+                logger.info("%s %s: barrier raised for %s",
+                            stream.gate, stream.source, decision.plate)
+            else:
+                logger.info("%s %s: barrier down: %s",
+                            stream.gate, stream.source, decision.error)
+            plates.append(decision.plate)
+
+        now = time.monotonic()
+        self._recent.update({(stream.gate, plate): now for plate in plates if plate})
+        self.decisions += 1
+
+    async def step(self) -> bool:
+        """
+            Recognizes the new frames with movement of all cameras once.
+
+            Returns:
+                bool: False if no camera had a new frame.
+            """
+        batch, received = [], False
+        for i, (stream, motion) in enumerate(zip(self.streams, self.motion)):
+            frame = stream.read()
+            if frame is None:
+                continue
+            received = True
+            if motion.update(frame):
+                batch.append((i, frame))
+        if not batch:
+            return received
+
+        clocks = [self.streams[i].clock() for i, _ in batch]
+        frames = [DecodedFrame(frame, 1, None) for _, frame in batch]
+        try:
+            results = await inference_executor.submit(recognize_frame_plates, frames)
+        except InferenceError as err:
+            logger.warning("Skipping %d frames: %s", len(batch), err)
+            return True
+
+        for (i, _), now, observations in zip(batch, clocks, results):
+            for plate_pass in self.trackers[i].update(observations, now):
+                await self.decide(self.streams[i], plate_pass)
+        return True
+
+    async def expire(self, flush: bool = False) -> None:
+        """
+            Decides on the passes of tracks that ended without an early vote.
+
+            Args:
+                flush (bool): End every track, e.g. once the sources are over.
+            """
+        for stream, tracker in zip(self.streams, self.trackers):
+            for plate_pass in (tracker.flush() if flush else tracker.expire(stream.clock())):
+                await self.decide(stream, plate_pass)
+
+    async def run(self) -> None:
+        """Processes the cameras until every source has ended."""
+        reported = time.monotonic()
+        while any(stream.alive for stream in self.streams):
+            if not await self.step():
+                await asyncio.sleep(self.poll)
+            await self.expire()
+            if self.report_interval and time.monotonic() - reported >= self.report_interval:
+                self.report()
+                reported = time.monotonic()
+        await self.expire(flush=True)
+
+    def stats(self) -> MotionStats:
+        """Returns the motion gate counters summed over all cameras."""
+        return MotionStats(*map(sum, zip(*(motion.stats() for motion in self.motion))))
+
+    def report(self) -> None:
+        """Logs the share of frames every camera kept away from the detector."""
+        for stream, motion in zip(self.streams, self.motion):
+            stats = motion.stats()
+            logger.info("%s %s: %d frames, %d with movement (%.1f%% skipped)",
+                        stream.gate, stream.source, stats.frames, stats.active,
+                        stats.skip_ratio * 100)
+        total = self.stats()
+        logger.info("all cameras: %d of %d frames skipped (%.1f%%), %d gate decisions",
+                    total.skipped, total.frames, total.skip_ratio * 100, self.decisions)
+
+
+def _sources(value: str) -> List[str]:
+    """Splits a comma separated list of sources from the settings."""
+    return [source.strip() for source in value.split(',') if source.strip()]
+
+
+def parse_opt():
+    """Parses command-line arguments of the camera daemon."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--enter', nargs='*', default=_sources(settings.camera_enter_sources),
+                        help='entry camera video files or stream URLs')
+    parser.add_argument('--leave', nargs='*', default=_sources(settings.camera_leave_sources),
+                        help='exit camera video files or stream URLs')
+    parser.add_argument('--vid-stride', type=int, default=settings.camera_vid_stride,
+                        help='decode every n-th frame')
+    parser.add_argument('--motion-threshold', type=float, default=settings.motion_threshold,
+                        help='share of changed pixels that counts as movement')
+    parser.add_argument('--motion-pixel-delta', type=int, default=settings.motion_pixel_delta,
+                        help='grey level difference that marks a pixel as changed')
+    parser.add_argument('--roi-file', default=settings.camera_roi_file,
+                        help='JSON file with the lane polygon of every camera')
+    parser.add_argument('--report-interval', type=float, default=settings.motion_report_interval,
+                        help='seconds between skip ratio reports, 0 to report on exit only')
+    parser.add_argument('--cooldown', type=float, default=settings.gate_cooldown,
+                        help='seconds a decided plate is ignored at its gate')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='log recognized plates without gate decisions')
+    opt = parser.parse_args()
+    if not opt.enter and not opt.leave:
+        parser.error('no camera sources given (--enter/--leave or CAMERA_ENTER_SOURCES/CAMERA_LEAVE_SOURCES)')
+    return opt
+
+
+async def main(opt) -> None:
+    """Opens the cameras and runs the daemon until the sources end or it is interrupted."""
+    rois = load_rois(opt.roi_file)
+    warm_up()
+    streams = [GateStream(source, gate_name, opt.vid_stride)
+               for gate_name in GATES
+               for source in getattr(opt, gate_name)]
+    daemon = CameraDaemon(streams,
+                          opt.motion_threshold,
+                          opt.motion_pixel_delta,
+                          opt.cooldown,
+                          opt.dry_run,
+                          rois=rois,
+                          report_interval=opt.report_interval)
+    try:
+        await daemon.run()
+    finally:
+        for stream in streams:
+            stream.close()
+        inference_executor.shutdown()
+        daemon.report()
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO,
+                        format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+    try:
+        asyncio.run(main(parse_opt()))
+    except KeyboardInterrupt:
+        pass
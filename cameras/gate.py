@@ -0,0 +1,182 @@
+import re
+from datetime import datetime
+from typing import List, NamedTuple, Optional, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import cameras.utils as utils
+from cameras.lots import NoFreeLots
+from cameras.plate_registry import plate_registry
+from db_models import rollups
+from db_models.orms import ParkingHistoryORM, BillingORM
+from ocr_ml.plate_recognition import Recognition
+
+
+CAR_PLATE_REGEX = r"[^0-9A-Z]"
+
+
+class GateDecision(NamedTuple):
+    """Outcome of a car at the gate.
+
+        Attributes:
+            raised (bool): Whether the barrier is raised.
+            plate (str): The plate the decision was made for; empty if nothing was read.
+            error (Optional[str]): Why the barrier stays down, None if it is raised.
+        """
+    raised: bool
+    plate: str
+    error: Optional[str] = None
+
+
+def normalize_plates(car_plates: List[Recognition]) -> List[str]:
+    """Uppercases recognized plate texts and strips everything but letters and digits."""
+    return [re.sub(CAR_PLATE_REGEX, "", plate.text.upper())
+            for plate in car_plates]
+
+
+async def _identify(
+    car_plates: List[Recognition],
+    db: AsyncSession
+) -> Tuple[Optional[utils.GateLookup], GateDecision]:
+    """
+        Resolves the recognized plates to a registered, not banned car.
+
+        Args:
+            car_plates (List[Recognition]): The plates recognized on the frame.
+            db (AsyncSession): Database session for querying the relevant data.
+
+        Returns:
+            Tuple[Optional[GateLookup], GateDecision]: The lookup of the car, or
+            None together with the refusal if the car cannot pass.
+        """
+    plates = normalize_plates(car_plates)
+    match = await plate_registry.match(plates, db)
+
+    if match is None:
+        car_plate = plates[-1] if plates else ""
+        return None, GateDecision(False, car_plate,
+                                  f"Car {car_plate} does not registered.")
+
+    car_plate, entry = match
+
+    if entry.is_banned:
+        return None, GateDecision(False, car_plate,
+                                  f"User {entry.username} is banned!")
+
+    lookup = await utils.gate_lookup([car_plate], db)
+
+    if lookup is None or lookup.car.owner.is_banned:
+        # The registry is behind the database (e.g. changed by another worker).
+        plate_registry.invalidate()
+        return None, GateDecision(False, car_plate,
+                                  f"Car {car_plate} could not be verified. Try again.")
+
+    return lookup, GateDecision(True, car_plate)
+
+
+async def enter(car_plates: List[Recognition], db: AsyncSession) -> GateDecision:
+    """
+        Decides on a car entry from the plates recognized on its frame.
+
+        Opens a parking session with its bill and takes a parking lot. A car
+        that is already registered as parked gets a bill and its owner is banned.
+
+        Args:
+            car_plates (List[Recognition]): The plates recognized on the frame.
+            db (AsyncSession): Database session for querying the relevant data.
+
+        Returns:
+            GateDecision: Whether the barrier is raised and why not.
+        """
+    lookup, decision = await _identify(car_plates, db)
+    if lookup is None:
+        return decision
+
+    car_plate = decision.plate
+    car_db = lookup.car
+
+    if lookup.parking is not None:
+        bill_id = await utils.set_unleaved_ban(car_db, db)
+        ban_message = "Заїзд автомобіля без зареєстрованого виїзду."
+        message_id = await utils.send_ban_message(car_db.owner.id,
+                                                  bill_id,
+                                                  ban_message,
+                                                  db)
+        return GateDecision(False, car_plate,
+                            f"Car {car_plate} registered as parked."
+                            + f" Bill #{bill_id} is sent."
+                            + f" User banned (message # {message_id}).")
+
+    parking = ParkingHistoryORM(
+        car_id=car_db.id,
+        start_time=datetime.now()
+    )
+    parking.bill = BillingORM(
+        user_id=car_db.owner.id
+    )
+    db.add(parking)
+    await rollups.record_start(parking.start_time, db)
+
+    # occupy_lot commits the new parking session together with the lot
+    try:
+        await utils.occupy_lot(car_db.id, db)
+    except NoFreeLots as err:
+        await db.rollback()
+        return GateDecision(False, car_plate, str(err))
+
+    return decision
+
+
+async def leave(car_plates: List[Recognition], db: AsyncSession) -> GateDecision:
+    """
+        Decides on a car leaving from the plates recognized on its frame.
+
+        Closes the parking session, sends its bill and frees the parking lot.
+        A car without a registered entry gets a bill and its owner is banned.
+
+        Args:
+            car_plates (List[Recognition]): The plates recognized on the frame.
+            db (AsyncSession): The database session for performing queries.
+
+        Returns:
+            GateDecision: Whether the barrier is raised and why not.
+        """
+    lookup, decision = await _identify(car_plates, db)
+    if lookup is None:
+        return decision
+
+    car_plate = decision.plate
+    car_db = lookup.car
+
+    if lookup.parking is None:
+        bill_id = await utils.set_unparked_ban(car_db, db)
+        ban_message = "Виїзд автомобіля без зареєстрованого в'їзду."
+        message_id = await utils.send_ban_message(car_db.owner.id,
+                                                  bill_id,
+                                                  ban_message,
+                                                  db)
+        return GateDecision(False, car_plate,
+                            f"Car {car_plate} registered as out from parking."
+                            + f" Bill #{bill_id} is sent."
+                            + f" User banned (message # {message_id}).")
+
+    parking_db = lookup.parking
+    end_time = datetime.now()
+    parking_db.end_time=end_time
+
+    cost = await utils.get_parking_cost(parking_db.start_time,
+                                        parking_db.end_time,
+                                        db)
+    parking_db.bill.cost = cost
+    parking_db.bill.is_sent = True
+    await rollups.record_end(parking_db.start_time, end_time, db)
+
+    await utils.send_message(car_db.owner.id,
+                             parking_db.bill.id,
+                             db)
+
+    await utils.free_lot(car_db.id, db)
+
+    await db.commit()
+
+    return decision
@@ -0,0 +1,91 @@
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, List
+
+from fastapi import Request
+
+from settings import settings
+
+
+class FrameTooLarge(Exception):
+    """Raised when a camera frame exceeds the configured maximum size."""
+
+
+class FramePool:
+    """Reusable buffers for camera frames sent as a raw request body.
+
+        The body is streamed chunk by chunk straight into a preallocated
+        buffer, so a frame is never parsed as multipart, spooled to a
+        temporary file or joined into a new ``bytes`` object. Buffers are
+        handed back to the pool once the frame has been recognized; a buffer
+        whose recognition failed is dropped instead, since a timed-out job
+        may still be reading it in the inference pool.
+
+        Attributes:
+            max_size (int): Largest accepted frame in bytes.
+            size (int): Number of idle buffers kept for reuse.
+        """
+
+    def __init__(self, max_size: int, size: int = 8) -> None:
+        self.max_size = max_size
+        self.size = size
+        self._idle: List[bytearray] = []
+
+    def _acquire(self) -> bytearray:
+        if self._idle:
+            return self._idle.pop()
+        return bytearray(self.max_size)
+
+    def _release(self, buffer: bytearray) -> None:
+        if len(self._idle) < self.size:
+            self._idle.append(buffer)
+
+    async def _fill(self, buffer: bytearray, request: Request) -> memoryview:
+        """Streams the request body into a buffer.
+
+            Raises:
+                FrameTooLarge: If the body does not fit into the buffer.
+            """
+        view = memoryview(buffer)
+        length = 0
+        async for chunk in request.stream():
+            end = length + len(chunk)
+            if end > self.max_size:
+                raise FrameTooLarge(
+                    f"Frame exceeds {self.max_size} bytes"
+                )
+            view[length:end] = chunk
+            length = end
+        return view[:length]
+
+    @asynccontextmanager
+    async def receive(self, request: Request) -> AsyncIterator[memoryview]:
+        """Reads the frame sent as the body of a request.
+
+            Args:
+                request (Request): The camera request.
+
+            Yields:
+                memoryview: The encoded frame, valid until the block exits.
+
+            Raises:
+                FrameTooLarge: If the frame is larger than ``max_size``.
+            """
+        declared = request.headers.get('content-length')
+        if declared is not None and declared.isdigit() \
+                and int(declared) > self.max_size:
+            raise FrameTooLarge(f"Frame exceeds {self.max_size} bytes")
+
+        buffer = self._acquire()
+        try:
+            frame = await self._fill(buffer, request)
+        except FrameTooLarge:
+            self._release(buffer)
+            raise
+
+        # Reached only if the block succeeded; otherwise the buffer is dropped.
+        yield frame
+        self._release(buffer)
+
+
+frame_pool = FramePool(max_size=settings.camera_frame_max_bytes,
+                       size=settings.camera_frame_buffers)
@@ -0,0 +1,140 @@
+import asyncio
+import time
+from typing import NamedTuple, Optional
+
+from sqlalchemy import select, update, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from db_models.orms import ParkingLotORM
+from settings import settings
+
+
+class NoFreeLots(Exception):
+    """Raised when every parking lot is occupied."""
+
+
+class LotCounts(NamedTuple):
+    """Occupancy of the parking.
+
+        Attributes:
+            total (int): Number of parking lots.
+            occupied (int): Number of lots with a car.
+            free (int): Number of empty lots.
+        """
+    total: int
+    occupied: int
+    free: int
+
+
+class LotAllocator:
+    """Assigns cars to parking lots and keeps an occupancy counter.
+
+        A lot is taken with a single atomic
+        ``UPDATE ... WHERE id = (SELECT ... FOR UPDATE SKIP LOCKED LIMIT 1)
+        RETURNING id`` statement, so concurrent entries never get the same lot
+        and never wait on each other. The occupancy counter is seeded with one
+        ``COUNT`` query, adjusted on every occupy/free and re-seeded after the
+        TTL to pick up changes made by other workers.
+
+        Attributes:
+            ttl (float): Seconds after which the counter is re-read from the database.
+        """
+
+    def __init__(self, ttl: float = 30) -> None:
+        self.ttl = ttl
+        self._total = 0
+        self._occupied = 0
+        self._loaded_at: Optional[float] = None
+        self._lock: Optional[asyncio.Lock] = None
+
+    def _is_stale(self) -> bool:
+        return (self._loaded_at is None
+                or time.monotonic() - self._loaded_at > self.ttl)
+
+    async def counts(self, db: AsyncSession) -> LotCounts:
+        """Returns the current occupancy without scanning the lots.
+
+            Args:
+                db (AsyncSession): Session used if the counter has to be re-seeded.
+
+            Returns:
+                LotCounts: Total, occupied and free lots.
+            """
+        if self._is_stale():
+            if self._lock is None:
+                self._lock = asyncio.Lock()
+            async with self._lock:
+                if self._is_stale():
+                    stmnt = select(func.count(ParkingLotORM.id),
+                                   func.count(ParkingLotORM.car_id))
+                    res = await db.execute(stmnt)
+                    self._total, self._occupied = res.one()
+                    self._loaded_at = time.monotonic()
+
+        occupied = min(max(self._occupied, 0), self._total)
+        return LotCounts(self._total, occupied, self._total - occupied)
+
+    async def occupy(self, car_id: int, db: AsyncSession) -> int:
+        """Puts a car on a free lot and commits the session.
+
+            Args:
+                car_id (int): The ID of the car.
+                db (AsyncSession): The database session; pending changes are
+                    committed together with the lot.
+
+            Returns:
+                int: The ID of the occupied lot.
+
+            Raises:
+                NoFreeLots: If every lot is occupied.
+            """
+        free_lot = (
+            select(ParkingLotORM.id)
+            .where(ParkingLotORM.car_id.is_(None))
+            .order_by(ParkingLotORM.id)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+            .scalar_subquery()
+        )
+        stmnt = (
+            update(ParkingLotORM)
+            .where(ParkingLotORM.id == free_lot)
+            .values(car_id=car_id)
+            .returning(ParkingLotORM.id)
+            .execution_options(synchronize_session=False)
+        )
+        res = await db.execute(stmnt)
+        lot_id = res.scalar_one_or_none()
+        if lot_id is None:
+            raise NoFreeLots("No free parking lots")
+
+        await db.commit()
+        self._occupied += 1
+        return lot_id
+
+    async def free(self, car_id: int, db: AsyncSession) -> None:
+        """Releases the lot taken by a car and commits the session.
+
+            Args:
+                car_id (int): The ID of the car.
+                db (AsyncSession): The database session.
+            """
+        stmnt = (
+            update(ParkingLotORM)
+            .where(ParkingLotORM.car_id == car_id)
+            .values(car_id=None)
+            .returning(ParkingLotORM.id)
+            .execution_options(synchronize_session=False)
+        )
+        res = await db.execute(stmnt)
+        released = len(res.all())
+
+        await db.commit()
+        self._occupied -= released
+
+    def invalidate(self) -> None:
+        """Forces the counter to be re-read on next access."""
+        self._loaded_at = None
+
+
+lot_allocator = LotAllocator(ttl=settings.lot_counter_ttl)
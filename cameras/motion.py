@@ -0,0 +1,166 @@
+import json
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+Polygon = Sequence[Tuple[float, float]]
+
+
+class MotionStats(NamedTuple):
+    """
+        Counters of a motion gate.
+
+        Attributes:
+            frames (int): Frames checked.
+            active (int): Frames with movement, passed on to the detector.
+        """
+    frames: int
+    active: int
+
+    @property
+    def skipped(self) -> int:
+        """Frames dropped before the detector."""
+        return self.frames - self.active
+
+    @property
+    def skip_ratio(self) -> float:
+        """Share of the checked frames dropped before the detector."""
+        return self.skipped / self.frames if self.frames else 0.0
+
+
+class MotionGate:
+    """
+        Tells frames with movement in the lane from a static scene.
+
+        Frames are subsampled to ``width`` pixels, converted to grey and
+        blurred, then compared with a running average of the previous frames.
+        A frame is active when the share of pixels inside the region of
+        interest that differ from the background by more than
+        ``pixel_delta`` reaches ``threshold``. Slow changes, such as daylight
+        or a car left standing at the barrier, fade into the background after
+        a few dozen frames. Movement outside the ROI (the pavement, trees, the
+        neighbouring lane) is ignored.
+
+        Attributes:
+            threshold (float): Share of changed ROI pixels (0-1) that counts as movement.
+            pixel_delta (int): Grey level difference that marks a pixel as changed.
+            width (int): Width the frames are compared at.
+            alpha (float): Weight of a new frame in the running background.
+            roi (Optional[Polygon]): Lane polygon as (x, y) points relative to the
+                frame size (0-1); None watches the whole frame.
+        """
+
+    def __init__(self,
+                 threshold: float = 0.01,
+                 pixel_delta: int = 25,
+                 width: int = 160,
+                 alpha: float = 0.05,
+                 roi: Optional[Polygon] = None) -> None:
+        self.threshold = threshold
+        self.pixel_delta = pixel_delta
+        self.width = width
+        self.alpha = alpha
+        self.roi = roi
+        self._background = None
+        self._mask = None
+        self._mask_area = 0
+        self._frames = 0
+        self._active = 0
+
+    def _prepare(self, frame: np.ndarray) -> np.ndarray:
+        """Shrinks a BGR frame to a blurred grey thumbnail."""
+        height, width = frame.shape[:2]
+        # Plain striding first: INTER_AREA over a full HD frame costs more
+        # than the rest of the gate, and two source pixels per thumbnail
+        # pixel are enough to average out sensor noise.
+        step = max(1, width // (2 * self.width))
+        if step > 1:
+            frame = frame[::step, ::step]
+        size = (self.width, max(1, round(height * self.width / width)))
+        small = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+        if small.ndim == 3:
+            small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        return cv2.GaussianBlur(small, (5, 5), 0)
+
+    def _reset(self, grey: np.ndarray) -> None:
+        """Starts a new background and ROI mask for the thumbnail size."""
+        self._background = grey.astype(np.float32)
+        height, width = grey.shape
+        if self.roi is None:
+            self._mask, self._mask_area = None, grey.size
+            return
+        points = np.array([(x * width, y * height) for x, y in self.roi],
+                          dtype=np.int32)
+        self._mask = np.zeros(grey.shape, dtype=np.uint8)
+        cv2.fillPoly(self._mask, [points], 255)
+        self._mask_area = max(1, int(np.count_nonzero(self._mask)))
+
+    def update(self, frame: np.ndarray) -> bool:
+        """
+            Feeds a frame to the background model.
+
+            The first frame is always active, so a car already standing in
+            front of the camera at startup is not missed.
+
+            Args:
+                frame (numpy.ndarray): The BGR frame.
+
+            Returns:
+                bool: True if the frame shows movement in the ROI.
+            """
+        grey = self._prepare(frame)
+        self._frames += 1
+
+        if self._background is None or self._background.shape != grey.shape:
+            self._reset(grey)
+            self._active += 1
+            return True
+
+        diff = cv2.absdiff(grey, cv2.convertScaleAbs(self._background))
+        _, changed = cv2.threshold(diff, self.pixel_delta, 255, cv2.THRESH_BINARY)
+        if self._mask is not None:
+            changed = cv2.bitwise_and(changed, self._mask)
+        share = cv2.countNonZero(changed) / self._mask_area
+        cv2.accumulateWeighted(grey, self._background, self.alpha)
+
+        active = share >= self.threshold
+        self._active += active
+        return active
+
+    def stats(self) -> MotionStats:
+        """Returns the frame counters."""
+        return MotionStats(self._frames, self._active)
+
+
+def load_rois(path: Optional[str]) -> Dict[str, List[Tuple[float, float]]]:
+    """
+        Reads the lane polygons of the gate cameras.
+
+        The file is a JSON object mapping a camera source (as passed to the
+        daemon) to a list of at least three ``[x, y]`` points relative to the
+        frame size, e.g. ``{"rtsp://cam-1/stream": [[0.2, 0.4], [0.8, 0.4],
+        [1.0, 1.0], [0.0, 1.0]]}``. Cameras missing from the file watch the
+        whole frame.
+
+        Args:
+            path (Optional[str]): The JSON file; empty or None means no ROIs.
+
+        Returns:
+            Dict[str, List[Tuple[float, float]]]: The polygon of every listed camera.
+
+        Raises:
+            ValueError: If a polygon is malformed or lies outside the frame.
+        """
+    if not path:
+        return {}
+    rois = {}
+    for source, points in json.loads(Path(path).read_text()).items():
+        polygon = [(float(x), float(y)) for x, y in points]
+        if len(polygon) < 3:
+            raise ValueError(f"ROI of {source} needs at least three points")
+        if not all(0 <= x <= 1 and 0 <= y <= 1 for x, y in polygon):
+            raise ValueError(f"ROI of {source} must use coordinates between 0 and 1")
+        rois[source] = polygon
+    return rois
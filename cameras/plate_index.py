@@ -0,0 +1,174 @@
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+# Characters OCR commonly mistakes for each other on license plates.
+CONFUSABLE_PAIRS = (
+    ('O', '0'), ('D', '0'), ('Q', '0'), ('U', '0'),
+    ('I', '1'), ('L', '1'), ('T', '1'),
+    ('Z', '2'), ('A', '4'), ('S', '5'), ('G', '6'), ('B', '8'),
+)
+
+CONFUSION_COST = 0.5
+
+_CONFUSIONS = frozenset(CONFUSABLE_PAIRS) | frozenset(
+    (b, a) for a, b in CONFUSABLE_PAIRS
+)
+
+
+def plate_distance(a: str, b: str, edit_cost: float = 1.0) -> float:
+    """Confusion-aware edit distance between two plates.
+
+        Substitutions of characters OCR commonly confuses (O/0, I/1, B/8, ...)
+        cost ``CONFUSION_COST``; insertions, deletions and any other
+        substitution cost ``edit_cost``.
+
+        Args:
+            a (str): The first plate.
+            b (str): The second plate.
+            edit_cost (float): Cost of an edit that is not a confusion;
+                ``math.inf`` only lets confusions through.
+
+        Returns:
+            float: The distance between the plates.
+        """
+    if a == b:
+        return 0.0
+    previous = [0.0] + [j * edit_cost for j in range(1, len(b) + 1)]
+    for i, char_a in enumerate(a, 1):
+        current = [i * edit_cost]
+        for j, char_b in enumerate(b, 1):
+            if char_a == char_b:
+                cost = 0.0
+            elif (char_a, char_b) in _CONFUSIONS:
+                cost = CONFUSION_COST
+            else:
+                cost = edit_cost
+            current.append(min(previous[j] + edit_cost,
+                               current[j - 1] + edit_cost,
+                               previous[j - 1] + cost))
+        previous = current
+    return previous[-1]
+
+
+_CANONICAL = {}
+for _a, _b in CONFUSABLE_PAIRS:
+    _CANONICAL[_a] = _b
+    _CANONICAL[_b] = _b
+
+
+def canonical_plate(plate: str) -> str:
+    """Maps every confusable character of a plate to a single representative."""
+    return ''.join(_CANONICAL.get(char, char) for char in plate)
+
+
+def _deletions(plate: str, depth: int) -> Set[str]:
+    """Returns the plate and every variant with up to ``depth`` characters removed."""
+    variants = {plate}
+    frontier = {plate}
+    for _ in range(depth):
+        frontier = {item[:i] + item[i + 1:]
+                    for item in frontier
+                    for i in range(len(item))}
+        variants |= frontier
+    return variants
+
+
+class PlateIndex:
+    """Confusion-aware index over registered plates for fuzzy OCR lookups.
+
+        Plates are stored under their canonical form (confusable characters
+        folded together) and every variant of it with up to ``depth``
+        characters deleted. A lookup generates the same variants for the OCR
+        read, so any plate within ``depth`` non-confusion edits shares a key
+        with it; candidates are then ranked with ``plate_distance``. Lookups
+        are a handful of dictionary probes regardless of the number of plates,
+        and plates can be added and removed one by one.
+
+        Attributes:
+            depth (int): Number of non-confusion edits the index can bridge.
+            edit_cost (float): Cost of a non-confusion edit, see ``plate_distance``.
+        """
+
+    def __init__(self,
+                 plates: Iterable[str] = (),
+                 depth: int = 1,
+                 edit_cost: float = 1.0) -> None:
+        self.depth = depth
+        self.edit_cost = edit_cost
+        self._keys: Dict[str, Set[str]] = {}
+        self._plates: Set[str] = set()
+        for plate in plates:
+            self.add(plate)
+
+    def __len__(self) -> int:
+        return len(self._plates)
+
+    def __contains__(self, plate: str) -> bool:
+        return plate in self._plates
+
+    def add(self, plate: str) -> None:
+        """Adds a plate to the index."""
+        if plate in self._plates:
+            return
+        self._plates.add(plate)
+        for key in _deletions(canonical_plate(plate), self.depth):
+            self._keys.setdefault(key, set()).add(plate)
+
+    def remove(self, plate: str) -> None:
+        """Removes a plate from the index."""
+        if plate not in self._plates:
+            return
+        self._plates.discard(plate)
+        for key in _deletions(canonical_plate(plate), self.depth):
+            bucket = self._keys.get(key)
+            if bucket is not None:
+                bucket.discard(plate)
+                if not bucket:
+                    del self._keys[key]
+
+    def rebuild(self, plates: Iterable[str]) -> None:
+        """Replaces the content of the index."""
+        self._keys = {}
+        self._plates = set()
+        for plate in plates:
+            self.add(plate)
+
+    def search(self, plate: str, max_distance: float) -> List[Tuple[float, str]]:
+        """Finds the registered plates within a distance of a plate.
+
+            Args:
+                plate (str): The plate read by OCR.
+                max_distance (float): The largest accepted distance. Only
+                    ``depth`` non-confusion edits are bridged, whatever the value.
+
+            Returns:
+                List[Tuple[float, str]]: (distance, plate) pairs, closest first.
+            """
+        candidates = set()
+        for key in _deletions(canonical_plate(plate), self.depth):
+            candidates |= self._keys.get(key, set())
+
+        found = []
+        for candidate in candidates:
+            distance = plate_distance(plate, candidate, self.edit_cost)
+            if distance <= max_distance:
+                found.append((distance, candidate))
+        found.sort()
+        return found
+
+    def best_match(self, plate: str, max_distance: float) -> Optional[str]:
+        """Returns the single closest registered plate.
+
+            Args:
+                plate (str): The plate read by OCR.
+                max_distance (float): The largest accepted distance.
+
+            Returns:
+                Optional[str]: The closest plate, or None if nothing is close
+                enough or two plates are equally close.
+            """
+        found = self.search(plate, max_distance)
+        if not found:
+            return None
+        if len(found) > 1 and found[0][0] == found[1][0]:
+            return None
+        return found[0][1]
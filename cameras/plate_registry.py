@@ -0,0 +1,180 @@
+import asyncio
+import logging
+import math
+import time
+from typing import Dict, NamedTuple, Optional, Sequence, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from db_models.orms import CarORM, UserORM
+from cameras.plate_index import CONFUSION_COST, PlateIndex
+from settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+class PlateEntry(NamedTuple):
+    """Cached registration data of a license plate.
+
+        Attributes:
+            car_id (int): The ID of the car.
+            user_id (int): The ID of the car owner.
+            username (str): The username of the car owner.
+            is_banned (bool): Whether the owner is banned.
+            is_admin (bool): Whether the owner is an administrator.
+        """
+    car_id: int
+    user_id: int
+    username: str
+    is_banned: bool
+    is_admin: bool
+
+
+class PlateRegistry:
+    """In-memory map of every registered plate to its car and owner.
+
+        The whole ``cars`` table is loaded with one query and kept in memory,
+        so gate decisions for unregistered or banned cars never touch the
+        database. Write paths keep the map current through the update hooks;
+        the TTL forces a reload so that changes made by other workers are
+        picked up as well. A confusion-aware index over the plates lets OCR
+        reads with confused characters (O/0, I/1, B/8, ...) still find their car.
+        By default only such confusions are bridged: a plate one arbitrary
+        character away is a different car, not a misread.
+
+        Attributes:
+            ttl (float): Seconds after which the map is reloaded from the database.
+            max_distance (float): Largest confusion-aware edit distance accepted
+                for a fuzzy match; 0 disables fuzzy matching.
+            allow_edits (bool): Whether insertions, deletions and non-confusion
+                substitutions (cost 1 each) may be bridged as well.
+        """
+
+    def __init__(self,
+                 ttl: float = 60,
+                 max_distance: float = CONFUSION_COST,
+                 allow_edits: bool = False) -> None:
+        self.ttl = ttl
+        self.max_distance = max_distance
+        self.allow_edits = allow_edits
+        self._entries: Dict[str, PlateEntry] = {}
+        if allow_edits:
+            self._index = PlateIndex(depth=max(1, int(max_distance)))
+        else:
+            self._index = PlateIndex(depth=0, edit_cost=math.inf)
+        self._loaded_at: Optional[float] = None
+        self._lock: Optional[asyncio.Lock] = None
+
+    def _is_stale(self) -> bool:
+        return (self._loaded_at is None
+                or time.monotonic() - self._loaded_at > self.ttl)
+
+    async def _load(self, db: AsyncSession) -> None:
+        """Reloads the map from the database if it is stale."""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if not self._is_stale():
+                return
+            stmnt = (
+                select(CarORM.car_plate,
+                       CarORM.id,
+                       UserORM.id,
+                       UserORM.username,
+                       UserORM.is_banned,
+                       UserORM.is_admin)
+                .join(CarORM.owner)
+            )
+            res = await db.execute(stmnt)
+            self._entries = {
+                plate: PlateEntry(car_id, user_id, username,
+                                  bool(is_banned), bool(is_admin))
+                for plate, car_id, user_id, username, is_banned, is_admin
+                in res.all()
+            }
+            self._index.rebuild(self._entries)
+            self._loaded_at = time.monotonic()
+
+    async def get(self, plate: str, db: AsyncSession) -> Optional[PlateEntry]:
+        """Returns the cached entry of a plate.
+
+            Args:
+                plate (str): The license plate.
+                db (AsyncSession): Session used if the map has to be reloaded.
+
+            Returns:
+                Optional[PlateEntry]: The entry, or None if the plate is not registered.
+            """
+        if self._is_stale():
+            await self._load(db)
+        return self._entries.get(plate)
+
+    async def match(self,
+                    plates: Sequence[str],
+                    db: AsyncSession) -> Optional[Tuple[str, PlateEntry]]:
+        """Finds the first registered plate among OCR candidates.
+
+            Exact matches are preferred; otherwise the first candidate with a
+            single closest registered plate within ``max_distance`` wins. A
+            fuzzy match is logged with the OCR read it was resolved from, as
+            the gate bills and bans by the registered plate.
+
+            Args:
+                plates (Sequence[str]): Candidate license plates, best candidate first.
+                db (AsyncSession): Session used if the map has to be reloaded.
+
+            Returns:
+                Optional[Tuple[str, PlateEntry]]: The matched plate and its entry,
+                or None if no candidate is registered.
+            """
+        if self._is_stale():
+            await self._load(db)
+        for plate in plates:
+            entry = self._entries.get(plate)
+            if entry is not None:
+                return plate, entry
+
+        if self.max_distance <= 0:
+            return None
+        for plate in plates:
+            registered = self._index.best_match(plate, self.max_distance)
+            if registered is not None:
+                logger.warning("OCR read %s resolved to registered plate %s",
+                               plate, registered)
+                return registered, self._entries[registered]
+        return None
+
+    def add_car(self, plate: str, car_id: int, user: UserORM) -> None:
+        """Registers a newly added car."""
+        self._entries[plate] = PlateEntry(car_id, user.id, user.username,
+                                          bool(user.is_banned),
+                                          bool(user.is_admin))
+        self._index.add(plate)
+
+    def remove_car(self, plate: str) -> None:
+        """Forgets a deleted car."""
+        self._entries.pop(plate, None)
+        self._index.remove(plate)
+
+    def update_user(self, user_id: int, *, is_banned: bool) -> None:
+        """Updates the ban state of every car of a user."""
+        for plate, entry in list(self._entries.items()):
+            if entry.user_id == user_id:
+                self._entries[plate] = entry._replace(is_banned=is_banned)
+
+    def remove_user(self, user_id: int) -> None:
+        """Forgets every car of a deleted user."""
+        for plate, entry in list(self._entries.items()):
+            if entry.user_id == user_id:
+                del self._entries[plate]
+                self._index.remove(plate)
+
+    def invalidate(self) -> None:
+        """Forces a reload from the database on next access."""
+        self._loaded_at = None
+
+
+plate_registry = PlateRegistry(ttl=settings.plate_registry_ttl,
+                               max_distance=settings.plate_match_distance,
+                               allow_edits=settings.plate_match_edits)
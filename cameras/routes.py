@@ -1,25 +1,21 @@
-import re
-from typing import Annotated, Any
-from datetime import datetime
+from typing import Annotated, Any, Optional
 
 from fastapi import Request, Depends, Form, UploadFile, File
 from fastapi.routing import APIRouter
-from fastapi.responses import HTMLResponse
-from sqlalchemy import select
+from fastapi.responses import HTMLResponse, JSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
 
 from frontend.routes import templates
-from user.routes import get_car_status
 from schemas.cars import CarInfo, CarStatus, BillingInfo, ParkingInfo
-from db_models.orms import UserORM, CarORM, ParkingHistoryORM, BillingORM
+from db_models.orms import UserORM, CarORM
 from db_models.db import get_session
 
-import cameras.utils as utils
-from ocr_ml.plate_recognition import get_plate_number
-
-
-CAR_PLATE_REGEX = r"[^0-9A-Z]"
+import cameras.gate as gate
+from cameras.gate import GateDecision
+from cameras.ingest import FrameTooLarge, frame_pool
+from ocr_ml.batching import plate_batcher
+from ocr_ml.executor import InferenceError
+from ocr_ml.recognition_cache import recognition_cache
 
 router = APIRouter(prefix='/cameras',
                    default_response_class=HTMLResponse,
@@ -49,7 +45,8 @@ async def cameras_index(
 async def post_enter_camera(
     request: Request,
     car_plate: Annotated[UploadFile, File()],
-    db: Annotated[AsyncSession, Depends(get_session)]
+    db: Annotated[AsyncSession, Depends(get_session)],
+    camera: Optional[str] = None
 ) -> Any:
     """
         Handle car entry through the camera system.
@@ -62,6 +59,9 @@ async def post_enter_camera(
             request (Request): The incoming HTTP request object.
             car_plate (UploadFile): The uploaded image file containing the car's license plate.
             db (AsyncSession): Database session for querying the relevant data.
+            camera (Optional[str]): Identifier of the gate camera; repeated triggers
+                of the same camera are answered from the recognition cache. Without
+                it every frame is recognized.
 
         Returns:
             Any: The HTML response template indicating if the barrier is raised or not.
@@ -70,9 +70,12 @@ async def post_enter_camera(
             HTTPException: If there are issues with accessing or querying the database.
 
         Process:
-            1. Reads the car plate image and extracts the plate number.
-            2. Verifies if the car is registered in the system.
-            3. Checks if the user is banned.
+            1. Reads the car plate image and extracts the plate number, batched with
+               frames from other lanes in the inference pool. If recognition is busy or too slow the barrier stays down.
+            2. Verifies against the in-memory plate registry that the car is registered
+               and its owner is not banned; rejected cars never reach the database.
+            3. Loads the car, the owner and an open parking session with a single
+               gate lookup query.
             4. If the car is already parked, generates a bill and bans the user for attempting
                to re-enter without leaving.
             5. Logs the parking entry, generates a bill for the session, and raises the barrier.
@@ -94,103 +97,76 @@ async def post_enter_camera(
             ```
         """
     image = await car_plate.read()
-    car_plates = get_plate_number(image)
-
-    car_plate = ""
-    is_user = False
-    for plate in car_plates:
-        car_plate = re.sub(CAR_PLATE_REGEX, "", plate.text)
-        is_user = await utils.is_user(car_plate.upper(), db)
-        if is_user:
-            break
-
-    if not is_user:
+    try:
+        car_plates = await plate_batcher.recognize(image, _cache_camera('enter', camera))
+    except InferenceError as err:
         return templates.TemplateResponse(
            'cameras/turnpike_down.html',
            {
                'request': request,
-               'error': f"Car {car_plate} does not registered."
-           }
-        )
-    is_banned = await utils.is_banned(car_plate, db)
-
-    if is_banned:
-        stmnt = (
-            select(CarORM)
-            .where(CarORM.car_plate == car_plate)
-            .options(
-                selectinload(CarORM.owner)
-            )
+               'error': str(err)
+           },
+           status_code=503
         )
-        res = await db.execute(stmnt)
-        car_db = res.scalar_one()
 
-        return templates.TemplateResponse(
-            'cameras/turnpike_down.html',
-            {
-                'request': request,
-                'error': f"User {car_db.owner.username} is banned!"
-            }
-        )
+    return _gate_response(request, await gate.enter(car_plates, db))
 
-    stmnt = (
-        select(CarORM)
-        .where(CarORM.car_plate == car_plate)
-        .options(
-            selectinload(CarORM.owner)
-            )
+
+@router.post('/enter/raw')
+async def post_enter_camera_raw(
+    request: Request,
+    db: Annotated[AsyncSession, Depends(get_session)],
+    camera: Optional[str] = None
+) -> Any:
+    """
+        Handle car entry with a frame posted as the raw request body.
+
+        The frame is sent as the raw request body (e.g. ``image/jpeg`` or
+        ``application/octet-stream``) and streamed into a reused buffer, so no
+        multipart parsing or temporary file is involved. Frames larger than
+        ``CAMERA_FRAME_MAX_BYTES`` are rejected with a 413 status.
+
+        Args:
+            request (Request): The HTTP request carrying the encoded frame.
+            db (AsyncSession): The database session for performing queries.
+            camera (Optional[str]): Identifier of the gate camera; repeated triggers
+                of the same camera are answered from the recognition cache. Without
+                it every frame is recognized.
+
+        Returns:
+            Any: The HTML response template indicating if the barrier is raised or not.
+        """
+    try:
+        async with frame_pool.receive(request) as image:
+            car_plates = await plate_batcher.recognize(image, _cache_camera('enter', camera))
+    except FrameTooLarge as err:
+        return templates.TemplateResponse(
+           'cameras/turnpike_down.html',
+           {
+               'request': request,
+               'error': str(err)
+           },
+           status_code=413
         )
-    res = await db.execute(stmnt)
-    car_db = res.scalar_one()
-
-    car_status = await get_car_status(db, car_db.id)
-
-    if car_status == 'parked':
-        bill_id = await utils.set_unleaved_ban(car_db, db)
-        ban_message = "Заїзд автомобіля без зареєстрованого виїзду."
-        message_id = await utils.send_ban_message(car_db.owner.id,
-                                                  bill_id,
-                                                  ban_message,
-                                                  db)
+    except InferenceError as err:
         return templates.TemplateResponse(
            'cameras/turnpike_down.html',
            {
                'request': request,
-               'error': (f"Car {car_plate} registered as parked."
-                         + f" Bill #{bill_id} is sent."
-                         + f" User banned (message # {message_id}).")
-           }
+               'error': str(err)
+           },
+           status_code=503
         )
 
-    parking = ParkingHistoryORM(
-        car_id=car_db.id
-    )
-    db.add(parking)
-    await db.commit()
-
-    new_bill = BillingORM(
-        user_id=car_db.owner.id
-    )
-
-    parking.bill = new_bill
-    db.refresh(parking)
-    await db.commit()
-
-    await utils.occupy_lot(car_db.id, db)
-
-    return templates.TemplateResponse(
-        'cameras/turnpike_up.html',
-        {
-            'request': request
-            }
-        )
+    return _gate_response(request, await gate.enter(car_plates, db))
 
 
 @router.post('/leave')
 async def post_leave_camera(
     request: Request,
     car_plate: Annotated[UploadFile, File()],
-    db: Annotated[AsyncSession, Depends(get_session)]
+    db: Annotated[AsyncSession, Depends(get_session)],
+    camera: Optional[str] = None
 ) -> Any:
     """
         Processes a car leaving the parking area.
@@ -202,12 +178,16 @@ async def post_leave_camera(
         - If the car's entry into the parking area was registered.
 
         Depending on the results, it will either raise the barrier for the car to leave,
-        or deny exit with a message.
+        or deny exit with a message. Recognition runs in the inference pool; if it is
+        busy or too slow, exit is denied with a 503 status.
 
         Args:
             request (Request): The HTTP request object.
             car_plate (UploadFile): The uploaded image file containing the car's plate.
             db (AsyncSession): The database session for performing queries.
+            camera (Optional[str]): Identifier of the gate camera; repeated triggers
+                of the same camera are answered from the recognition cache. Without
+                it every frame is recognized.
 
         Returns:
             Any: Renders an HTML template response, either allowing the car to leave or
@@ -217,113 +197,112 @@ async def post_leave_camera(
             HTTPException: If there is an issue with the database or car registration.
         """
     image = await car_plate.read()
-    car_plates = get_plate_number(image)
-
-    car_plate = ""
-    is_user = False
-    for plate in car_plates:
-        car_plate = re.sub(CAR_PLATE_REGEX, "", plate.text)
-        is_user = await utils.is_user(car_plate.upper(), db)
-        if is_user:
-            break
-
-    if not is_user:
+    try:
+        car_plates = await plate_batcher.recognize(image, _cache_camera('leave', camera))
+    except InferenceError as err:
         return templates.TemplateResponse(
            'cameras/turnpike_down.html',
            {
                'request': request,
-               'error': f"Car {car_plate} does not registered."
-           }
-        )
-    is_banned = await utils.is_banned(car_plate, db)
-
-    if is_banned:
-        stmnt = (
-            select(CarORM)
-            .where(CarORM.car_plate == car_plate)
-            .options(
-                selectinload(CarORM.owner)
-            )
+               'error': str(err)
+           },
+           status_code=503
         )
-        res = await db.execute(stmnt)
-        car_db = res.scalar_one()
 
-        return templates.TemplateResponse(
-            'cameras/turnpike_down.html',
-            {
-                'request': request,
-                'error': f"User {car_db.owner.username} is banned!"
-            }
-        )
+    return _gate_response(request, await gate.leave(car_plates, db))
 
-    stmnt = (
-        select(CarORM)
-        .where(CarORM.car_plate == car_plate)
-        .options(
-            selectinload(CarORM.owner)
-            )
+
+@router.post('/leave/raw')
+async def post_leave_camera_raw(
+    request: Request,
+    db: Annotated[AsyncSession, Depends(get_session)],
+    camera: Optional[str] = None
+) -> Any:
+    """
+        Processes a car leaving with a frame posted as the raw request body.
+
+        The frame is sent as the raw request body (e.g. ``image/jpeg`` or
+        ``application/octet-stream``) and streamed into a reused buffer, so no
+        multipart parsing or temporary file is involved. Frames larger than
+        ``CAMERA_FRAME_MAX_BYTES`` are rejected with a 413 status.
+
+        Args:
+            request (Request): The HTTP request carrying the encoded frame.
+            db (AsyncSession): The database session for performing queries.
+            camera (Optional[str]): Identifier of the gate camera; repeated triggers
+                of the same camera are answered from the recognition cache. Without
+                it every frame is recognized.
+
+        Returns:
+            Any: The HTML response template indicating if the barrier is raised or not.
+        """
+    try:
+        async with frame_pool.receive(request) as image:
+            car_plates = await plate_batcher.recognize(image, _cache_camera('leave', camera))
+    except FrameTooLarge as err:
+        return templates.TemplateResponse(
+           'cameras/turnpike_down.html',
+           {
+               'request': request,
+               'error': str(err)
+           },
+           status_code=413
         )
-    res = await db.execute(stmnt)
-    car_db = res.scalar_one()
-
-    car_status = await get_car_status(db, car_db.id)
-
-    if car_status == 'out':
-        bill_id = await utils.set_unparked_ban(car_db, db)
-        ban_message = "Виїзд автомобіля без зареєстрованого в'їзду."
-        message_id = await utils.send_ban_message(car_db.owner.id,
-                                                  bill_id,
-                                                  ban_message,
-                                                  db)
+    except InferenceError as err:
         return templates.TemplateResponse(
            'cameras/turnpike_down.html',
            {
                'request': request,
-               'error': (f"Car {car_plate} registered as out from parking."
-                         + f" Bill #{bill_id} is sent."
-                         + f" User banned (message # {message_id}).")
-           }
+               'error': str(err)
+           },
+           status_code=503
         )
 
-    stmnt = (
-        select(ParkingHistoryORM)
-        .where(ParkingHistoryORM.car_id == car_db.id,
-               ParkingHistoryORM.end_time.is_(None))
-               .options(
-                   selectinload(ParkingHistoryORM.bill)
-               )
-        )
-    res = await db.execute(stmnt)
-    parking_db = res.scalar_one_or_none()
-    end_time = datetime.now()
-    parking_db.end_time=end_time
+    return _gate_response(request, await gate.leave(car_plates, db))
 
-    tariff = await utils.get_tariff_for_date(
-        parking_db.start_time,
-        db)
 
-    time_diff_minutes = (
-        (parking_db.end_time - parking_db.start_time).seconds // 60
-    )
+def _cache_camera(gate_name: str, camera: Optional[str]) -> Optional[str]:
+    """
+        Recognition cache key of a gate camera.
+
+        Frames of clients that do not identify their camera are never cached:
+        a shared entry would answer one gate with the plate seen at another.
 
-    cost = round(time_diff_minutes * tariff, 2)
-    parking_db.bill.cost = cost
-    parking_db.bill.is_sent = True
+        Args:
+            gate_name (str): 'enter' or 'leave'.
+            camera (Optional[str]): Identifier of the gate camera.
 
-    await utils.send_message(car_db.owner.id,
-                             parking_db.bill.id,
-                             db)
-    
-    await utils.free_lot(car_db.id, db)
-    
-    await db.commit()
+        Returns:
+            Optional[str]: The cache key, None to recognize without the cache.
+        """
+    return f'{gate_name}:{camera}' if camera else None
 
+
+def _gate_response(request: Request, decision: GateDecision) -> Any:
+    """
+        Renders the barrier page for a gate decision.
+
+        Args:
+            request (Request): The incoming HTTP request object.
+            decision (GateDecision): The decision made for the car.
+
+        Returns:
+            Any: The HTML response template indicating if the barrier is raised or not.
+        """
+    if decision.raised:
+        return templates.TemplateResponse(
+            'cameras/turnpike_up.html',
+            {
+                'request': request
+                }
+            )
     return templates.TemplateResponse(
-        'cameras/turnpike_up.html',
-        {
-            'request': request
-            }
-        )
+       'cameras/turnpike_down.html',
+       {
+           'request': request,
+           'error': decision.error
+       }
+    )
 
 
 @router.get('/turnpike_down')
@@ -345,4 +324,20 @@ async def get_turnpike_down(
     return templates.TemplateResponse(
         'cameras/turnpike_down.html',
         {'request': request}
-    )
\ No newline at end of file
+    )
+
+
+@router.get('/recognition_cache', response_class=JSONResponse)
+async def get_recognition_cache_stats() -> Any:
+    """
+        Reports the hit and miss counters of the recognition cache.
+
+        Returns:
+            Any: JSON with the number of hits, misses, fresh entries and the hit ratio.
+        """
+    stats = recognition_cache.stats()
+    lookups = stats.hits + stats.misses
+    return {
+        **stats._asdict(),
+        'hit_ratio': stats.hits / lookups if lookups else 0.0
+    }
@@ -0,0 +1,125 @@
+import logging
+import math
+import queue
+import threading
+import time
+from typing import Optional, Tuple
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class GateStream:
+    """
+        Threaded frame capture from one gate camera.
+
+        Works like ``utils.dataloaders.LoadStreams`` for a single source: a
+        daemon thread grabs frames, decodes every ``vid_stride``-th one and
+        re-opens the stream when a live camera stops answering. Unlike
+        ``LoadStreams`` it does not letterbox the frames, does not poll
+        ``cv2.waitKey`` (which fails with headless OpenCV builds) and each
+        source ends on its own.
+
+        Live sources (RTSP/HTTP URLs, webcam indices) keep only the latest
+        frame, so a slow consumer skips frames instead of lagging behind the
+        camera. Video files hand over every ``vid_stride``-th frame and wait
+        for it to be taken, so replaying a recording gives the same frames on
+        every run regardless of the consumer speed; ``clock`` then follows the
+        position in the file instead of the wall clock.
+
+        Attributes:
+            source (str): The video file path, stream URL or webcam index.
+            gate (str): The gate the camera watches, ``'enter'`` or ``'leave'``.
+            vid_stride (int): Only every n-th frame is decoded.
+            fps (float): Frame rate reported by the source (30 if unknown).
+            is_file (bool): Whether the source is a finite video file.
+        """
+
+    def __init__(self, source: str, gate: str, vid_stride: int = 1) -> None:
+        self.source = source
+        self.gate = gate
+        self.vid_stride = max(1, vid_stride)
+
+        self._target = int(source) if source.isnumeric() else source
+        self._cap = cv2.VideoCapture(self._target)
+        if not self._cap.isOpened():
+            raise ValueError(f"Failed to open {source}")
+
+        fps = self._cap.get(cv2.CAP_PROP_FPS)  # may return 0 or nan
+        self.fps = max((fps if math.isfinite(fps) else 0) % 100, 0) or 30
+        self.is_file = int(self._cap.get(cv2.CAP_PROP_FRAME_COUNT)) > 0
+
+        self._frames: queue.Queue = queue.Queue(maxsize=1)
+        self._time = 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._update,
+                                        name=f'{gate}-stream',
+                                        daemon=True)
+        self._thread.start()
+        logger.info("%s camera %s opened (%s at %.2f FPS)",
+                    gate, source, 'file' if self.is_file else 'stream', self.fps)
+
+    def _put(self, frame: Tuple[float, np.ndarray]) -> None:
+        """Hands a frame to the consumer, waiting (files) or replacing the stale one (streams)."""
+        if self.is_file:
+            while not self._stop.is_set():
+                try:
+                    self._frames.put(frame, timeout=0.1)
+                    return
+                except queue.Full:
+                    continue
+            return
+        try:
+            self._frames.get_nowait()
+        except queue.Empty:
+            pass
+        self._frames.put_nowait(frame)
+
+    def _update(self) -> None:
+        """Reads frames until the file ends or the stream is closed."""
+        n = 0
+        while not self._stop.is_set() and self._cap.isOpened():
+            if not self._cap.grab():  # .read() = .grab() followed by .retrieve()
+                if self.is_file:
+                    break
+                logger.warning("%s camera %s is unresponsive, reconnecting",
+                               self.gate, self.source)
+                self._cap.open(self._target)
+                self._stop.wait(1.0)
+                continue
+            n += 1
+            if n % self.vid_stride:
+                continue
+            success, frame = self._cap.retrieve()
+            if success:
+                self._put((n / self.fps if self.is_file else time.monotonic(), frame))
+        self._cap.release()
+
+    def read(self) -> Optional[np.ndarray]:
+        """
+            Takes the next frame without blocking.
+
+            Returns:
+                Optional[numpy.ndarray]: The BGR frame, or None if no new frame arrived yet.
+            """
+        try:
+            self._time, frame = self._frames.get_nowait()
+        except queue.Empty:
+            return None
+        return frame
+
+    def clock(self) -> float:
+        """Seconds into the file of the last frame read, or the monotonic time for live sources."""
+        return self._time if self.is_file else time.monotonic()
+
+    @property
+    def alive(self) -> bool:
+        """False once the source has ended and its last frame was taken."""
+        return self._thread.is_alive() or not self._frames.empty()
+
+    def close(self) -> None:
+        """Stops the capture thread."""
+        self._stop.set()
+        self._thread.join(timeout=5)
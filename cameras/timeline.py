@@ -0,0 +1,135 @@
+import asyncio
+import time
+from bisect import bisect_right
+from datetime import date, datetime
+from typing import List, Optional, Tuple, Type
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from db_models.db import BaseORM
+from db_models.orms import TariffORM, CreditLimitsORM
+from settings import settings
+
+
+def _as_datetime(moment: date) -> datetime:
+    """Turns a date into the midnight it starts at; datetimes are kept as is."""
+    if isinstance(moment, datetime):
+        return moment
+    return datetime.combine(moment, datetime.min.time())
+
+
+class Timeline:
+    """Sorted in-memory history of a value that changes on ``set_date``.
+
+        The whole table is loaded with one query and kept sorted by date, so
+        the value in force at any moment is found with a binary search instead
+        of a database query. Writers call ``invalidate``; the TTL covers
+        changes made by other workers.
+
+        Attributes:
+            orm (Type[BaseORM]): ORM class with ``set_date`` and the value column.
+            value_name (str): Name of the value column.
+            ttl (float): Seconds after which the history is reloaded.
+        """
+
+    def __init__(self,
+                 orm: Type[BaseORM],
+                 value_name: str,
+                 ttl: float = 300) -> None:
+        self.orm = orm
+        self.value_name = value_name
+        self.ttl = ttl
+        self._dates: List[datetime] = []
+        self._values: List[float] = []
+        self._loaded_at: Optional[float] = None
+        self._lock: Optional[asyncio.Lock] = None
+
+    def _is_stale(self) -> bool:
+        return (self._loaded_at is None
+                or time.monotonic() - self._loaded_at > self.ttl)
+
+    async def _load(self, db: AsyncSession) -> None:
+        """Reloads the history from the database if it is stale."""
+        if not self._is_stale():
+            return
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if not self._is_stale():
+                return
+            stmnt = (
+                select(self.orm.set_date, getattr(self.orm, self.value_name))
+                .order_by(self.orm.set_date, self.orm.id)
+            )
+            res = await db.execute(stmnt)
+
+            dates, values = [], []
+            for set_date, value in res.all():
+                set_date = _as_datetime(set_date)
+                # Several changes on one day: the latest one wins.
+                if dates and dates[-1] == set_date:
+                    values[-1] = value
+                else:
+                    dates.append(set_date)
+                    values.append(value)
+
+            self._dates, self._values = dates, values
+            self._loaded_at = time.monotonic()
+
+    async def value_at(self, moment: date, db: AsyncSession) -> float:
+        """Returns the value in force at a moment.
+
+            Args:
+                moment (date): A date or a datetime.
+                db (AsyncSession): Session used if the history has to be reloaded.
+
+            Returns:
+                float: The latest value set on or before the moment.
+
+            Raises:
+                LookupError: If no value was set on or before the moment.
+            """
+        await self._load(db)
+        i = bisect_right(self._dates, _as_datetime(moment)) - 1
+        if i < 0:
+            raise LookupError(f"No {self.value_name} set on or before {moment}")
+        return self._values[i]
+
+    async def segments(self,
+                       start: datetime,
+                       end: datetime,
+                       db: AsyncSession) -> List[Tuple[datetime, datetime, float]]:
+        """Splits a period at every change of the value.
+
+            Args:
+                start (datetime): Beginning of the period.
+                end (datetime): End of the period.
+                db (AsyncSession): Session used if the history has to be reloaded.
+
+            Returns:
+                List[Tuple[datetime, datetime, float]]: (from, to, value) pieces
+                covering the period in order.
+
+            Raises:
+                LookupError: If no value was set on or before ``start``.
+            """
+        value = await self.value_at(start, db)
+        pieces = []
+        i = bisect_right(self._dates, start)
+        while i < len(self._dates) and self._dates[i] < end:
+            pieces.append((start, self._dates[i], value))
+            start, value = self._dates[i], self._values[i]
+            i += 1
+        pieces.append((start, end, value))
+        return pieces
+
+    def invalidate(self) -> None:
+        """Forces a reload from the database on next access."""
+        self._loaded_at = None
+
+
+tariff_timeline = Timeline(TariffORM, 'tariff',
+                           ttl=settings.tariff_cache_ttl)
+credit_limit_timeline = Timeline(CreditLimitsORM, 'limit',
+                                 ttl=settings.tariff_cache_ttl)
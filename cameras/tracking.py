@@ -0,0 +1,231 @@
+import itertools
+import time
+from collections import defaultdict
+from typing import List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from cameras.gate import normalize_plates
+from ocr_ml.plate_recognition import PlateObservation, Recognition
+
+
+class PlatePass(NamedTuple):
+    """
+        One vehicle pass in front of a camera.
+
+        Attributes:
+            track_id (int): Identifier of the track within its tracker.
+            text (str): The plate voted from all reads of the pass.
+            confidence (float): Agreement of the reads on the voted plate (0-1).
+            reads (int): Number of frames the plate was read on.
+            box (tuple): The last detector box of the plate.
+            alternatives (List[str]): Other plates read during the pass, most supported first.
+        """
+    track_id: int
+    text: str
+    confidence: float
+    reads: int
+    box: tuple
+    alternatives: List[str]
+
+    def recognitions(self) -> List[Recognition]:
+        """The voted plate and its alternatives as gate candidates, best first."""
+        return [Recognition(self.box, text, self.confidence)
+                for text in [self.text, *self.alternatives]]
+
+
+def best_read(reads: Sequence[Recognition]) -> Optional[Tuple[str, float]]:
+    """
+        Picks the plate text among the OCR reads of one detector box.
+
+        EasyOCR may split a plate into several pieces or add the country
+        code; the longest confidently read piece is taken as the plate.
+
+        Args:
+            reads (Sequence[Recognition]): The texts recognized in the box.
+
+        Returns:
+            Optional[Tuple[str, float]]: The normalized text and its confidence,
+            None if nothing was read.
+        """
+    texts = [(text, read.confidence)
+             for text, read in zip(normalize_plates(reads), reads) if text]
+    if not texts:
+        return None
+    return max(texts, key=lambda item: len(item[0]) * item[1])
+
+
+def vote(reads: Sequence[Tuple[str, float]]) -> Tuple[str, float]:
+    """
+        Merges several reads of a plate character by character.
+
+        The plate length is chosen first by the summed confidence of the reads
+        of every length. Reads of that length then vote on every position with
+        their OCR confidence as weight.
+
+        Args:
+            reads (Sequence[Tuple[str, float]]): Texts with their OCR confidence.
+
+        Returns:
+            Tuple[str, float]: The voted text and the agreement on it: the
+            weight share of the length times the weakest position share.
+        """
+    lengths = defaultdict(float)
+    for text, confidence in reads:
+        lengths[len(text)] += max(confidence, 1e-3)
+    length = max(lengths, key=lengths.get)
+    same = [(text, max(confidence, 1e-3))
+            for text, confidence in reads if len(text) == length]
+    total = sum(weight for _, weight in same)
+
+    chars, agreement = [], 1.0
+    for position in range(length):
+        votes = defaultdict(float)
+        for text, weight in same:
+            votes[text[position]] += weight
+        char = max(votes, key=votes.get)
+        chars.append(char)
+        agreement = min(agreement, votes[char] / total)
+    return ''.join(chars), agreement * lengths[length] / sum(lengths.values())
+
+
+class _Track:
+    """State of one plate followed across frames."""
+
+    __slots__ = ('track_id', 'box', 'last_seen', 'hits', 'reads', 'emitted')
+
+    def __init__(self, track_id: int, box: tuple, now: float) -> None:
+        self.track_id = track_id
+        self.box = box
+        self.last_seen = now
+        self.hits = 0
+        self.reads: List[Tuple[str, float]] = []
+        self.emitted = False
+
+    def to_pass(self) -> PlatePass:
+        """Votes the reads of the track into a pass."""
+        text, confidence = vote(self.reads)
+        support = defaultdict(float)
+        for read, weight in self.reads:
+            support[read] += weight
+        alternatives = [read for read in sorted(support, key=support.get, reverse=True)
+                        if read != text]
+        return PlatePass(self.track_id, text, confidence, len(self.reads),
+                         self.box, alternatives)
+
+
+def _iou(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """IoU of every pair of (x1, y1, x2, y2) boxes of ``a`` and ``b``."""
+    top_left = np.maximum(a[:, None, :2], b[None, :, :2])
+    bottom_right = np.minimum(a[:, None, 2:], b[None, :, 2:])
+    inter = np.clip(bottom_right - top_left, 0, None).prod(axis=2)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    return inter / np.maximum(area_a[:, None] + area_b[None, :] - inter, 1e-9)
+
+
+class PlateTracker:
+    """
+        Groups the plate detections of one camera into vehicle passes.
+
+        Detector boxes of consecutive frames are matched to the open tracks
+        by IoU, greedily from the best overlap. Every track collects the plate
+        read on each of its frames and emits exactly one ``PlatePass``: as
+        soon as ``min_reads`` reads agree on a plate with at least
+        ``min_agreement``, or, failing that, with the best vote when the plate
+        has not been seen for ``max_age`` seconds. Tracks seen on a single
+        frame only are dropped as false detections.
+
+        Attributes:
+            iou_threshold (float): Smallest IoU linking a box to a track.
+            max_age (float): Seconds without a detection after which a track ends.
+            min_reads (int): Reads needed before a pass is emitted early.
+            min_agreement (float): Agreement needed to emit a pass early.
+        """
+
+    def __init__(self,
+                 iou_threshold: float = 0.2,
+                 max_age: float = 1.5,
+                 min_reads: int = 3,
+                 min_agreement: float = 0.7) -> None:
+        self.iou_threshold = iou_threshold
+        self.max_age = max_age
+        self.min_reads = min_reads
+        self.min_agreement = min_agreement
+        self._tracks: List[_Track] = []
+        self._ids = itertools.count(1)
+
+    def _match(self, observations: Sequence[PlateObservation]) -> List[Optional[_Track]]:
+        """Assigns every observation to an open track, None if it starts a new one."""
+        assigned: List[Optional[_Track]] = [None] * len(observations)
+        if not self._tracks or not observations:
+            return assigned
+
+        iou = _iou(np.array([track.box for track in self._tracks], dtype=np.float64),
+                   np.array([obs.box for obs in observations], dtype=np.float64))
+        used_tracks, used_obs = set(), set()
+        for t, o in zip(*np.unravel_index(np.argsort(-iou, axis=None), iou.shape)):
+            if iou[t, o] < self.iou_threshold:
+                break
+            if t in used_tracks or o in used_obs:
+                continue
+            used_tracks.add(t)
+            used_obs.add(o)
+            assigned[o] = self._tracks[t]
+        return assigned
+
+    def update(self,
+               observations: Sequence[PlateObservation],
+               now: Optional[float] = None) -> List[PlatePass]:
+        """
+            Adds the plates detected on a frame.
+
+            Args:
+                observations (Sequence[PlateObservation]): The detections of the frame.
+                now (Optional[float]): Monotonic time of the frame; defaults to now.
+
+            Returns:
+                List[PlatePass]: Passes completed by this frame or by ended tracks.
+            """
+        now = time.monotonic() if now is None else now
+        passes = self.expire(now)
+
+        for observation, track in zip(observations, self._match(observations)):
+            if track is None:
+                track = _Track(next(self._ids), observation.box, now)
+                self._tracks.append(track)
+            track.box = observation.box
+            track.last_seen = now
+            track.hits += 1
+            read = best_read(observation.reads)
+            if read is not None:
+                track.reads.append(read)
+
+            if not track.emitted and len(track.reads) >= self.min_reads:
+                plate_pass = track.to_pass()
+                if plate_pass.confidence >= self.min_agreement:
+                    track.emitted = True
+                    passes.append(plate_pass)
+        return passes
+
+    def expire(self, now: Optional[float] = None) -> List[PlatePass]:
+        """
+            Ends the tracks not seen for ``max_age`` seconds.
+
+            Args:
+                now (Optional[float]): Monotonic time; defaults to now.
+
+            Returns:
+                List[PlatePass]: Passes of the ended tracks that were not emitted yet.
+            """
+        now = time.monotonic() if now is None else now
+        ended = [track for track in self._tracks if now - track.last_seen > self.max_age]
+        if not ended:
+            return []
+        self._tracks = [track for track in self._tracks if now - track.last_seen <= self.max_age]
+        return [track.to_pass() for track in ended
+                if not track.emitted and track.reads and track.hits > 1]
+
+    def flush(self) -> List[PlatePass]:
+        """Ends every track, e.g. when the stream is over."""
+        return self.expire(float('inf'))
@@ -1,23 +1,83 @@
 from datetime import datetime, timedelta
+from typing import NamedTuple, Optional, Sequence
 
-import numpy as np
-
-from sqlalchemy import select
-from sqlalchemy.orm import selectinload
+from sqlalchemy import select, and_
+from sqlalchemy.orm import selectinload, contains_eager
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from db_models.db import get_session
+from db_models import rollups
+from auth.principal import principal_cache
+from cameras.plate_registry import plate_registry
+from cameras.timeline import tariff_timeline, credit_limit_timeline
+from cameras.lots import lot_allocator
 from db_models.orms import (
     CarORM,
     BillingORM,
     ParkingHistoryORM,
-    TariffORM,
-    CreditLimitsORM,
-    ServiceMessageORM,
-    ParkingLotORM
+    ServiceMessageORM
     )
 
 
+class GateLookup(NamedTuple):
+    """Result of a gate lookup.
+
+        Attributes:
+            car (CarORM): The registered car, with its owner loaded.
+            parking (Optional[ParkingHistoryORM]): The open parking session of the car
+                with its bill loaded, or None if the car is not parked.
+        """
+    car: CarORM
+    parking: Optional[ParkingHistoryORM]
+
+
+async def gate_lookup(plates: Sequence[str],
+                      db: AsyncSession) -> Optional[GateLookup]:
+    """Resolves OCR candidate plates to a registered car in one round trip.
+
+        A single query matches all candidates with ``car_plate IN (...)`` and
+        joins the owner and the open parking session (with its bill), so the
+        gate can make its decision from one result.
+
+        Args:
+            plates (Sequence[str]): Candidate license plates, best candidate first.
+            db (AsyncSession): The database session to execute the query.
+
+        Returns:
+            Optional[GateLookup]: The car matching the earliest candidate, or None
+            if no candidate is registered.
+        """
+    plates = [plate for plate in plates if plate]
+    if not plates:
+        return None
+
+    stmnt = (
+        select(CarORM, ParkingHistoryORM)
+        .join(CarORM.owner)
+        .outerjoin(
+            ParkingHistoryORM,
+            and_(ParkingHistoryORM.car_id == CarORM.id,
+                 ParkingHistoryORM.end_time.is_(None))
+        )
+        .outerjoin(ParkingHistoryORM.bill)
+        .where(CarORM.car_plate.in_(set(plates)))
+        .options(
+            contains_eager(CarORM.owner),
+            contains_eager(ParkingHistoryORM.bill)
+        )
+    )
+    res = await db.execute(stmnt)
+
+    found = {}
+    for car, parking in res.unique().all():
+        found.setdefault(car.car_plate, GateLookup(car, parking))
+
+    for plate in plates:
+        if plate in found:
+            return found[plate]
+    return None
+
+
 async def is_user(plate: str, db: AsyncSession) -> bool:
     """Check if a car with the given license plate exists in the database.
 
@@ -87,9 +147,9 @@ async def get_tariff_for_date(date: datetime.date,
                               db: AsyncSession) -> float:
     """Fetches the tariff for a specific date.
 
-        This function retrieves the tariff from the `TariffORM` table that was
-        set on or before the specified date. It orders the tariffs by `set_date`
-        in descending order to get the latest tariff up to that date.
+        The tariff is looked up in the in-memory tariff timeline, which holds
+        every `TariffORM` row sorted by `set_date`, so no query is issued
+        unless the timeline has to be (re)loaded.
 
         Args:
             date (datetime.date): The date to find the tariff for.
@@ -98,24 +158,15 @@ async def get_tariff_for_date(date: datetime.date,
         Returns:
             float: The tariff value for the specified date.
         """
-    stmnt = (
-        select(TariffORM)
-        .where(TariffORM.set_date <= date)
-        .order_by(TariffORM.set_date.desc())
-        )
-    res = await db.execute(stmnt)
-    tariff = res.scalars().first()
-
-    return tariff.tariff
+    return await tariff_timeline.value_at(date, db)
 
 
 async def get_credit_limit_for_date(date: datetime.date,
                                     db: AsyncSession) -> float:
     """Fetches the credit limit for a specific date.
 
-        This function retrieves the credit limit from the `CreditLimitsORM` table
-        that was set on or before the specified date. It orders the limits by `set_date`
-        in descending order to get the latest limit up to that date.
+        The limit is looked up in the in-memory credit limit timeline, which
+        holds every `CreditLimitsORM` row sorted by `set_date`.
 
         Args:
             date (datetime.date): The date to find the credit limit for.
@@ -124,15 +175,36 @@ async def get_credit_limit_for_date(date: datetime.date,
         Returns:
             float: The credit limit for the specified date.
         """
-    stmnt = (
-        select(CreditLimitsORM)
-        .where(CreditLimitsORM.set_date <= date)
-        .order_by(CreditLimitsORM.set_date.desc())
+    return await credit_limit_timeline.value_at(date, db)
+
+
+async def get_parking_cost(start_time: datetime,
+                           end_time: datetime,
+                           db: AsyncSession) -> float:
+    """Calculates the cost of a parking session.
+
+        Whole minutes of the session are charged by the per-minute tariff in
+        force at that minute, so a session spanning a tariff change is billed
+        at the old rate before the change and at the new rate after it.
+
+        Args:
+            start_time (datetime): Start of the parking session.
+            end_time (datetime): End of the parking session.
+            db (AsyncSession): The asynchronous database session.
+
+        Returns:
+            float: The cost of the session rounded to 2 decimal places.
+        """
+    cost = 0.0
+    for piece_start, piece_end, tariff in await tariff_timeline.segments(
+            start_time, end_time, db):
+        minutes = (
+            int((piece_end - start_time).total_seconds() // 60)
+            - int((piece_start - start_time).total_seconds() // 60)
         )
-    res = await db.execute(stmnt)
-    limit = res.scalars().first()
+        cost += minutes * tariff
 
-    return limit.limit
+    return round(cost, 2)
 
 
 async def set_unleaved_ban(car: CarORM, db: AsyncSession) -> int:
@@ -166,19 +238,18 @@ async def set_unleaved_ban(car: CarORM, db: AsyncSession) -> int:
     parking_db = res.scalars().first()
     parking_db.end_time = datetime.now()
 
-    start_date = parking_db.start_time.date()
-    tariff = await get_tariff_for_date(start_date, db)
-    time_diff_minutes = (
-        (parking_db.end_time - parking_db.start_time).seconds // 60
-    )
-
-    cost = round(tariff * time_diff_minutes, 2)
+    cost = await get_parking_cost(parking_db.start_time,
+                                  parking_db.end_time,
+                                  db)
     parking_db.bill.cost = cost
     parking_db.bill.is_sent = True
     parking_db.bill.is_ban = True
 
     parking_db.car.owner.is_banned = True
+    await rollups.record_end(parking_db.start_time, parking_db.end_time, db)
     await db.commit()
+    plate_registry.update_user(parking_db.car.owner.id, is_banned=True)
+    principal_cache.invalidate(parking_db.car.owner.id)
 
     return parking_db.bill.id
 
@@ -229,7 +300,11 @@ async def set_unparked_ban(car: CarORM, db: AsyncSession) -> int:
     parking_fine.car.owner.is_banned = True
 
     db.add(parking_fine)
+    await rollups.record_start(start_time, db)
+    await rollups.record_end(start_time, end_time, db)
     await db.commit()
+    plate_registry.update_user(car.owner.id, is_banned=True)
+    principal_cache.invalidate(car.owner.id)
 
     parking_current = ParkingHistoryORM(
         start_time=end_time + timedelta(minutes=1)
@@ -241,6 +316,7 @@ async def set_unparked_ban(car: CarORM, db: AsyncSession) -> int:
     parking_current.car = car
 
     db.add(parking_current)
+    await rollups.record_start(parking_current.start_time, db)
     await db.commit()
 
     return bill_fine.id
@@ -329,31 +405,24 @@ async def send_message(user_id: int,
 async def occupy_lot(
         car_id: int,
         db: AsyncSession
-) -> None:
+) -> int:
     """
         Occupies a free parking lot with a specific car ID.
 
+        The lot is taken atomically by the lot allocator, so concurrent entries
+        never share a lot. Pending changes of the session are committed too.
+
         Args:
             car_id (int): The ID of the car that will occupy the lot.
             db (AsyncSession): The database session used for querying and updating records.
 
         Returns:
-            None
-        """
-    stmnt = select(ParkingLotORM).where(ParkingLotORM.car_id.is_(None))
-    res = await db.execute(stmnt)
-    free_lots = res.scalars().all()
-
-    ids = tuple(lot.id for lot in free_lots)
-    occupied = np.random.choice(ids)
+            int: The ID of the occupied lot.
 
-    stmnt = select(ParkingLotORM).where(ParkingLotORM.id == occupied)
-    res = await db.execute(stmnt)
-    lot = res.scalar_one_or_none()
-    lot.car_id = car_id
-
-    await db.commit()
-    return
+        Raises:
+            NoFreeLots: If every parking lot is occupied.
+        """
+    return await lot_allocator.occupy(car_id, db)
 
 
 async def free_lot(
@@ -370,14 +439,4 @@ async def free_lot(
         Returns:
             None
         """
-    stmnt = select(ParkingLotORM).where(ParkingLotORM.car_id == car_id)
-    res = await db.execute(stmnt)
-    lot = res.scalar()
-
-    if lot is None:
-        return
-    
-    lot.car_id = None
-    
-    await db.commit()
-    return
+    await lot_allocator.free(car_id, db)
@@ -1,4 +1,8 @@
+from typing import Any, Optional
+
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import (AsyncSession,
+                                    AsyncEngine,
                                     create_async_engine,
                                     AsyncAttrs)
 from sqlalchemy.orm import sessionmaker, DeclarativeBase
@@ -9,7 +13,62 @@ DATABASE_URL = settings.database_url
 if DATABASE_URL is None:
     raise ValueError("DATABASE_URL is not set in the environment variables")
 
-engine = create_async_engine(DATABASE_URL, echo=True)
+
+def create_engine(url: str,
+                  pool_size: Optional[int] = None,
+                  max_overflow: Optional[int] = None,
+                  read_only: bool = False,
+                  **kwargs: Any) -> AsyncEngine:
+    """
+        Creates an async engine with the pool configured from the settings.
+
+        Pool size, overflow, checkout timeout, connection recycling and
+        pre-ping come from ``DB_*`` settings; SQL echo is off unless
+        ``DB_ECHO`` is set. On asyncpg the prepared statement cache size is
+        set too (0 is required behind PgBouncer in transaction mode). SQLite
+        URLs, used by tests and benchmarks, get no pool arguments.
+
+        Args:
+            url (str): Async SQLAlchemy database URL.
+            pool_size (Optional[int]): Connections kept open. Defaults to ``settings.db_pool_size``.
+            max_overflow (Optional[int]): Extra connections allowed under load.
+                Defaults to ``settings.db_max_overflow``.
+            read_only (bool): Run every transaction as READ ONLY (PostgreSQL only).
+            **kwargs (Any): Further ``create_async_engine`` arguments, overriding the settings.
+
+        Returns:
+            AsyncEngine: The engine.
+        """
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    options = {'echo': settings.db_echo}
+
+    if backend != 'sqlite':
+        options.update(
+            pool_size=settings.db_pool_size if pool_size is None else pool_size,
+            max_overflow=settings.db_max_overflow if max_overflow is None else max_overflow,
+            pool_timeout=settings.db_pool_timeout,
+            pool_recycle=settings.db_pool_recycle,
+            pool_pre_ping=settings.db_pool_pre_ping,
+        )
+    if parsed.get_driver_name() == 'asyncpg':
+        options['connect_args'] = {'statement_cache_size': settings.db_statement_cache_size}
+    options.update(kwargs)
+
+    new_engine = create_async_engine(url, **options)
+    if read_only and backend == 'postgresql':
+        return new_engine.execution_options(postgresql_readonly=True)
+    return new_engine
+
+
+engine = create_engine(DATABASE_URL)
+
+# Reporting queries get their own pool, on a replica if one is configured,
+# so a slow statistics page never holds a connection the gate is waiting for.
+read_engine = create_engine(settings.database_read_url or DATABASE_URL,
+                            pool_size=settings.db_read_pool_size,
+                            max_overflow=settings.db_read_max_overflow,
+                            read_only=True)
 
 Base = declarative_base()
 
@@ -25,7 +84,20 @@ async_session = sessionmaker(
     expire_on_commit=False
 )
 
+read_session = sessionmaker(
+    bind=read_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
 
 async def get_session() -> AsyncSession:
     async with async_session() as session:
         yield session
+
+
+async def get_read_session() -> AsyncSession:
+    """Yields a read-only session for reporting queries, served by the replica if configured."""
+    async with read_session() as session:
+        yield session
@@ -1,6 +1,6 @@
 from typing import List, Optional
 
-from sqlalchemy import String, Boolean, ForeignKey, Float, DateTime, Date, select, func
+from sqlalchemy import String, Boolean, ForeignKey, Float, Integer, DateTime, Date, Index, select, func, text
 from sqlalchemy.orm import relationship, Mapped, mapped_column
 from db_models.db import BaseORM
 from datetime import datetime
@@ -61,6 +61,11 @@ class CarORM(BaseORM):
             parking_history (List[ParkingHistoryORM]): A list of parking history records for the car.
         """
     __tablename__ = 'cars'
+    __table_args__ = (
+        # looked up on every camera event
+        Index('ix_cars_car_plate', 'car_plate', unique=True),
+        Index('ix_cars_user_id', 'user_id'),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     user_id: Mapped[int] = mapped_column(ForeignKey('users.id'),
@@ -91,11 +96,19 @@ class ParkingHistoryORM(BaseORM):
             bill (BillingORM): The billing information for the parking session.
         """
     __tablename__ = 'parking_history'
+    __table_args__ = (
+        Index('ix_parking_history_car_id_end_time', 'car_id', 'end_time'),
+        # open sessions only: the gate lookup index stays small
+        Index('ix_parking_history_open', 'car_id',
+              postgresql_where=text('end_time IS NULL'),
+              sqlite_where=text('end_time IS NULL')),
+        Index('ix_parking_history_start_time', 'start_time'),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     start_time: Mapped[datetime] = mapped_column(
         DateTime,
-        default=datetime.now()
+        default=datetime.now
         )
     end_time: Mapped[Optional[datetime]] = mapped_column(DateTime,
                                                          default=None)
@@ -127,6 +140,10 @@ class BillingORM(BaseORM):
             message (ServiceMessageORM): A service message associated with the bill.
         """
     __tablename__ = 'billing'
+    __table_args__ = (
+        Index('ix_billing_user_id_is_sent_is_paid', 'user_id', 'is_sent', 'is_paid'),
+        Index('ix_billing_parking_history_id', 'parking_history_id'),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     parking_history_id: Mapped[int] = mapped_column(
@@ -170,6 +187,10 @@ class ServiceMessageORM(BaseORM):
             bill (BillingORM): The bill associated with the message, if applicable.
         """
     __tablename__ = 'messages'
+    __table_args__ = (
+        Index('ix_messages_user_id_is_active', 'user_id', 'is_active'),
+        Index('ix_messages_bill_id', 'bill_id'),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     user_id: Mapped[int] = mapped_column(ForeignKey('users.id',
@@ -202,6 +223,9 @@ class TariffORM(BaseORM):
             set_date (date): The date the tariff was set.
         """
     __tablename__ = "tariffs"
+    __table_args__ = (
+        Index('ix_tariffs_set_date', 'set_date', 'id'),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     tariff: Mapped[float] = mapped_column(Float)
@@ -244,3 +268,39 @@ class ParkingLotORM(BaseORM):
 
     # #relations
     # car: Mapped[CarORM] = relationship(CarORM)
+
+
+class ParkingDailyStatsORM(BaseORM):
+    """
+        ORM class for the 'parking_daily_stats' table, a rollup of 'parking_history' per day.
+
+        Rows are updated by ``db_models.rollups`` in the transaction that opens
+        or closes a parking session and can be rebuilt with
+        ``python -m db_models.rollups``.
+
+        Attributes:
+            day (date): The day the parkings started on.
+            parkings (int): Number of parkings started on the day.
+            finished (int): How many of them have ended.
+            duration_seconds (float): Total length of the ended parkings.
+        """
+    __tablename__ = 'parking_daily_stats'
+
+    day: Mapped[Date] = mapped_column(Date, primary_key=True)
+    parkings: Mapped[int] = mapped_column(Integer, default=0, server_default='0')
+    finished: Mapped[int] = mapped_column(Integer, default=0, server_default='0')
+    duration_seconds: Mapped[float] = mapped_column(Float, default=0, server_default='0')
+
+
+class ParkingHourlyStatsORM(BaseORM):
+    """
+        ORM class for the 'parking_hourly_stats' table, a rollup of 'parking_history' per hour.
+
+        Attributes:
+            hour (datetime): Start of the hour the parkings started in.
+            parkings (int): Number of parkings started in the hour.
+        """
+    __tablename__ = 'parking_hourly_stats'
+
+    hour: Mapped[datetime] = mapped_column(DateTime, primary_key=True)
+    parkings: Mapped[int] = mapped_column(Integer, default=0, server_default='0')
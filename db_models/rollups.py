@@ -0,0 +1,131 @@
+"""
+Daily and hourly rollups of the parking history for the statistics pages.
+
+Usage:
+    python -m db_models.rollups
+
+The gate updates ``parking_daily_stats`` and ``parking_hourly_stats`` in the
+same transaction that opens or closes a parking session, with an atomic
+``INSERT ... ON CONFLICT DO UPDATE`` increment, so the statistics pages read
+a few rows per day instead of scanning ``parking_history``. A session is
+always counted in the buckets of its start time.
+
+Running the module rebuilds both tables from ``parking_history``, e.g. after
+history rows were edited by hand. The rebuild locks the rollup tables: gate
+events wait for it at their rollup update (typically well under a second)
+and are then counted on top of the rebuilt rows.
+"""
+import asyncio
+import logging
+from datetime import datetime
+from typing import Any, Dict, Tuple
+
+from sqlalchemy import Date, cast, delete, func, insert, literal_column, select, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from db_models.db import async_session, engine
+from db_models.orms import ParkingDailyStatsORM, ParkingHistoryORM, ParkingHourlyStatsORM
+
+logger = logging.getLogger(__name__)
+
+_INSERTS = {
+    'postgresql': postgresql.insert,
+    'sqlite': sqlite.insert,
+}
+
+
+def hour_bucket(moment: datetime) -> datetime:
+    """Start of the hour a moment falls in."""
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+async def _increment(db: AsyncSession, orm, key: Dict[str, Any], values: Dict[str, Any]) -> None:
+    """Adds ``values`` to the rollup row of ``key``, creating the row if needed."""
+    table = orm.__table__
+    stmnt = _INSERTS[db.get_bind().dialect.name](table).values(**key, **values)
+    stmnt = stmnt.on_conflict_do_update(
+        index_elements=list(key),
+        set_={column: table.c[column] + stmnt.excluded[column] for column in values}
+    )
+    await db.execute(stmnt)
+
+
+async def record_start(start_time: datetime, db: AsyncSession) -> None:
+    """
+        Counts a new parking session; the caller commits it together with the session.
+
+        Args:
+            start_time (datetime): Start of the session.
+            db (AsyncSession): The session the parking is written with.
+        """
+    await _increment(db, ParkingDailyStatsORM, {'day': start_time.date()}, {'parkings': 1})
+    await _increment(db, ParkingHourlyStatsORM, {'hour': hour_bucket(start_time)}, {'parkings': 1})
+
+
+async def record_end(start_time: datetime, end_time: datetime, db: AsyncSession) -> None:
+    """
+        Adds an ended parking session to the duration of its start day.
+
+        Args:
+            start_time (datetime): Start of the session.
+            end_time (datetime): End of the session.
+            db (AsyncSession): The session the end is written with.
+        """
+    await _increment(db, ParkingDailyStatsORM, {'day': start_time.date()},
+                     {'finished': 1,
+                      'duration_seconds': (end_time - start_time).total_seconds()})
+
+
+async def backfill(db: AsyncSession) -> Tuple[int, int]:
+    """
+        Rebuilds both rollup tables from ``parking_history`` and commits (PostgreSQL).
+
+        Args:
+            db (AsyncSession): Session on the primary database.
+
+        Returns:
+            Tuple[int, int]: Number of daily and hourly rows written.
+        """
+    start, end = ParkingHistoryORM.start_time, ParkingHistoryORM.end_time
+    # a literal unit keeps the SELECT and GROUP BY expressions identical
+    hour = func.date_trunc(literal_column("'hour'"), start)
+
+    await db.execute(text("LOCK TABLE parking_daily_stats, parking_hourly_stats IN EXCLUSIVE MODE"))
+    await db.execute(delete(ParkingDailyStatsORM))
+    await db.execute(delete(ParkingHourlyStatsORM))
+
+    daily = await db.execute(
+        insert(ParkingDailyStatsORM).from_select(
+            ['day', 'parkings', 'finished', 'duration_seconds'],
+            select(cast(start, Date),
+                   func.count(),
+                   func.count(end),
+                   func.coalesce(func.sum(func.extract('epoch', end - start)), 0))
+            .group_by(cast(start, Date))
+        )
+    )
+    hourly = await db.execute(
+        insert(ParkingHourlyStatsORM).from_select(
+            ['hour', 'parkings'],
+            select(hour, func.count()).group_by(hour)
+        )
+    )
+    await db.commit()
+    return daily.rowcount, hourly.rowcount
+
+
+async def main() -> None:
+    """Rebuilds the rollups on the configured database."""
+    try:
+        async with async_session() as db:
+            days, hours = await backfill(db)
+        logger.info("Rebuilt parking rollups: %d days, %d hours", days, hours)
+    finally:
+        await engine.dispose()
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO,
+                        format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+    asyncio.run(main())
@@ -0,0 +1,222 @@
+# Ultralytics YOLOv5 🚀, AGPL-3.0 license
+"""
+Export a YOLOv5 PyTorch model to the CPU inference formats used by the plate detector.
+
+Format                      | `export.py --include`         | Model
+---                         | ---                           | ---
+PyTorch                     | -                             | best.pt
+TorchScript                 | `torchscript`                 | best.torchscript
+ONNX                        | `onnx`                        | best.onnx
+OpenVINO                    | `openvino`                    | best_openvino_model/
+
+Only the formats above can be produced by this trimmed exporter; the full table is kept in `export_formats()` because
+`models.common.DetectMultiBackend` uses it to recognise a model type from its file name.
+
+Usage:
+    $ python export.py --weights ocr_ml/model/best.pt --include onnx openvino
+
+Parity check against the PyTorch model:
+    $ python -m ocr_ml.detector_parity --backend onnx path/to/frames
+"""
+
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+
+import pandas as pd
+import torch
+
+FILE = Path(__file__).resolve()
+ROOT = FILE.parents[0]  # YOLOv5 root directory
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))  # add ROOT to PATH
+
+from models.experimental import attempt_load
+from models.yolo import Detect
+from utils.general import LOGGER, check_img_size, check_requirements, colorstr, file_size, yaml_save
+from utils.torch_utils import select_device, smart_inference_mode
+
+
+def export_formats():
+    """Returns a DataFrame of supported YOLOv5 model export formats and their properties."""
+    x = [
+        ["PyTorch", "-", ".pt", True, True],
+        ["TorchScript", "torchscript", ".torchscript", True, True],
+        ["ONNX", "onnx", ".onnx", True, True],
+        ["OpenVINO", "openvino", "_openvino_model", True, False],
+        ["TensorRT", "engine", ".engine", False, True],
+        ["CoreML", "coreml", ".mlpackage", True, False],
+        ["TensorFlow SavedModel", "saved_model", "_saved_model", True, True],
+        ["TensorFlow GraphDef", "pb", ".pb", True, True],
+        ["TensorFlow Lite", "tflite", ".tflite", True, False],
+        ["TensorFlow Edge TPU", "edgetpu", "_edgetpu.tflite", False, False],
+        ["TensorFlow.js", "tfjs", "_web_model", False, False],
+        ["PaddlePaddle", "paddle", "_paddle_model", True, True],
+    ]
+    return pd.DataFrame(x, columns=["Format", "Argument", "Suffix", "CPU", "GPU"])
+
+
+def export_torchscript(model, im, file, prefix=colorstr("TorchScript:")):
+    """Exports a YOLOv5 model to TorchScript format with the stride and class names embedded."""
+    LOGGER.info(f"\n{prefix} starting export with torch {torch.__version__}...")
+    f = file.with_suffix(".torchscript")
+
+    ts = torch.jit.trace(model, im, strict=False)
+    d = {"shape": im.shape, "stride": int(max(model.stride)), "names": model.names}
+    extra_files = {"config.txt": json.dumps(d)}  # torch._C.ExtraFilesMap()
+    ts.save(str(f), _extra_files=extra_files)
+    return f
+
+
+def export_onnx(model, im, file, opset=17, dynamic=True, simplify=False, prefix=colorstr("ONNX:")):
+    """Exports a YOLOv5 model to ONNX format with dynamic batch and image size axes by default."""
+    check_requirements("onnx>=1.12.0")
+    import onnx
+
+    LOGGER.info(f"\n{prefix} starting export with onnx {onnx.__version__}...")
+    f = str(file.with_suffix(".onnx"))
+
+    output_names = ["output0"]
+    if dynamic:
+        # AutoShape letterboxes every batch to its own shape, so keep height and width free
+        dynamic = {"images": {0: "batch", 2: "height", 3: "width"}, "output0": {0: "batch", 1: "anchors"}}
+
+    torch.onnx.export(
+        model.cpu(),
+        im.cpu(),
+        f,
+        verbose=False,
+        opset_version=opset,
+        do_constant_folding=True,
+        input_names=["images"],
+        output_names=output_names,
+        dynamic_axes=dynamic or None,
+    )
+
+    # Checks
+    model_onnx = onnx.load(f)  # load onnx model
+    onnx.checker.check_model(model_onnx)  # check onnx model
+
+    # Metadata read by DetectMultiBackend
+    d = {"stride": int(max(model.stride)), "names": model.names}
+    for k, v in d.items():
+        meta = model_onnx.metadata_props.add()
+        meta.key, meta.value = k, str(v)
+    onnx.save(model_onnx, f)
+
+    if simplify:
+        try:
+            check_requirements("onnxslim")
+            import onnxslim
+
+            LOGGER.info(f"{prefix} slimming with onnxslim {onnxslim.__version__}...")
+            model_onnx = onnxslim.slim(model_onnx)
+            onnx.save(model_onnx, f)
+        except Exception as e:
+            LOGGER.info(f"{prefix} simplifier failure: {e}")
+    return Path(f)
+
+
+def export_openvino(file, metadata, half=False, prefix=colorstr("OpenVINO:")):
+    """Converts an exported ONNX model to OpenVINO IR, keeping its dynamic input shape."""
+    check_requirements("openvino>=2023.1")
+    import openvino as ov
+
+    LOGGER.info(f"\n{prefix} starting export with openvino {ov.__version__}...")
+    f = Path(str(file).replace(file.suffix, f"_openvino_model{os.sep}"))
+    f_onnx = file.with_suffix(".onnx")
+    f_ov = f / file.with_suffix(".xml").name
+
+    ov_model = ov.convert_model(f_onnx)
+    ov.save_model(ov_model, f_ov, compress_to_fp16=half)
+    yaml_save(f / file.with_suffix(".yaml").name, metadata)  # add metadata.yaml
+    return f
+
+
+@smart_inference_mode()
+def run(
+    weights=ROOT / "ocr_ml" / "model" / "best.pt",  # weights path
+    imgsz=(640, 640),  # image (height, width)
+    batch_size=1,  # batch size
+    device="cpu",  # cuda device, i.e. 0 or 0,1,2,3 or cpu
+    include=("onnx", "openvino"),  # include formats
+    half=False,  # FP16 weights for OpenVINO
+    dynamic=True,  # ONNX: dynamic axes
+    simplify=False,  # ONNX: simplify model
+    opset=17,  # ONNX: opset version
+):
+    """Exports the plate detector weights to the requested formats and returns the paths of the exported models."""
+    fmts = tuple(export_formats()["Argument"][1:])  # --include arguments
+    include = [x.lower() for x in include]
+    unsupported = set(include) - {"torchscript", "onnx", "openvino"}
+    assert not unsupported, f"ERROR: Invalid --include {sorted(unsupported)}, valid --include arguments are {fmts[:3]}"
+    file = Path(weights)
+
+    # Load PyTorch model
+    device = select_device(device)
+    model = attempt_load(weights, device=device, inplace=True, fuse=True)  # load FP32 model
+
+    # Checks
+    imgsz *= 2 if len(imgsz) == 1 else 1  # expand
+    gs = int(max(model.stride))  # grid size (max stride)
+    imgsz = [check_img_size(x, gs) for x in imgsz]  # verify img_size are gs-multiples
+    im = torch.zeros(batch_size, 3, *imgsz).to(device)  # image size(1,3,320,192) BCHW iDetection
+
+    # Update model
+    model.eval()
+    for k, m in model.named_modules():
+        if isinstance(m, Detect):
+            m.inplace = False
+            m.dynamic = dynamic
+            m.export = True
+
+    for _ in range(2):
+        y = model(im)  # dry runs
+    shape = tuple((y[0] if isinstance(y, tuple) else y).shape)  # model output shape
+    metadata = {"stride": int(max(model.stride)), "names": model.names}  # model metadata
+    LOGGER.info(f"\n{colorstr('PyTorch:')} starting from {file} with output shape {shape} ({file_size(file):.1f} MB)")
+
+    # Exports
+    f = []
+    if "torchscript" in include:
+        f.append(export_torchscript(model, im, file))
+    if "onnx" in include or "openvino" in include:  # OpenVINO is converted from ONNX
+        f.append(export_onnx(model, im, file, opset, dynamic, simplify))
+    if "openvino" in include:
+        f.append(export_openvino(file, metadata, half))
+
+    LOGGER.info(f"\nExport complete, saved {', '.join(str(x) for x in f)}")
+    return f
+
+
+def parse_opt(known=False):
+    """Parses command-line arguments for the plate detector export."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--weights", type=str, default=ROOT / "ocr_ml" / "model" / "best.pt", help="model.pt path")
+    parser.add_argument("--imgsz", "--img", "--img-size", nargs="+", type=int, default=[640, 640], help="image (h, w)")
+    parser.add_argument("--batch-size", type=int, default=1, help="batch size")
+    parser.add_argument("--device", default="cpu", help="cuda device, i.e. 0 or 0,1,2,3 or cpu")
+    parser.add_argument("--half", action="store_true", help="FP16 weights for OpenVINO")
+    parser.add_argument("--static", dest="dynamic", action="store_false", help="ONNX: fixed input shape")
+    parser.add_argument("--simplify", action="store_true", help="ONNX: simplify model")
+    parser.add_argument("--opset", type=int, default=17, help="ONNX: opset version")
+    parser.add_argument(
+        "--include",
+        nargs="+",
+        default=["onnx", "openvino"],
+        help="torchscript, onnx, openvino",
+    )
+    opt = parser.parse_known_args()[0] if known else parser.parse_args()
+    return opt
+
+
+def main(opt):
+    """Runs the export with the parsed command-line options."""
+    run(**vars(opt))
+
+
+if __name__ == "__main__":
+    opt = parse_opt()
+    main(opt)
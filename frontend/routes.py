@@ -13,6 +13,7 @@ from db_models.orms import ParkingLotORM
 from auth.auth import Authentication
 from schemas.auth import User
 from schemas.cars import ParkingLot
+from cameras.lots import lot_allocator
 
 auth = Authentication()
 
@@ -110,11 +111,10 @@ async def get_parking_lots(
         entry = ParkingLot.model_validate(lot)
         lots_info.append(entry)
     
-    stmnt = select(ParkingLotORM).where(ParkingLotORM.car_id.is_not(None))
-    res = await db.execute(stmnt)
-    occupied = len(res.scalars().all())
-    free = 30 - occupied
-    total = 30
+    counts = await lot_allocator.counts(db)
+    occupied = counts.occupied
+    free = counts.free
+    total = counts.total
 
     return templates.TemplateResponse(
         'lots.html',
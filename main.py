@@ -1,3 +1,4 @@
+from contextlib import asynccontextmanager
 from pathlib import Path
 
 from fastapi import FastAPI
@@ -9,9 +10,31 @@ from frontend.routes import router as front_router
 from user.routes import router as user_router
 from admin.routes import router as admin_router
 from cameras.routes import router as cameras_router
-
-
-app = FastAPI()
+from settings import settings
+from ocr_ml.plate_recognition import warm_up
+from ocr_ml.executor import inference_executor
+from ocr_ml.batching import plate_batcher
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+        Prepares per-worker resources before the application starts serving.
+
+        Loads the detector and the OCR readers up front so that the first car
+        at the gate does not wait for the model weights to be read from disk,
+        and stops the inference threads on shutdown. Workers that never serve
+        cameras can skip the preload with ``PRELOAD_MODELS=false``; the models
+        are then loaded on first use.
+        """
+    if settings.preload_models:
+        warm_up()
+    yield
+    await plate_batcher.stop()
+    inference_executor.shutdown()
+
+
+app = FastAPI(lifespan=lifespan)
 
 static_path = Path(__file__).parent / 'frontend' / 'static'
 app.mount("/static", StaticFiles(directory=static_path), name='static')
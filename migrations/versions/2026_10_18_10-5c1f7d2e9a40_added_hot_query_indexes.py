@@ -0,0 +1,64 @@
+"""added_hot_query_indexes
+
+Revision ID: 5c1f7d2e9a40
+Revises: 26ea38088c96
+Create Date: 2026-10-18 10:24:51.208113
+
+Indexes for the queries run on every camera event and on the billing and
+message pages. They are built with CREATE INDEX CONCURRENTLY outside the
+migration transaction, so a large parking_history does not block the gate
+while the migration runs. If a concurrent build fails, PostgreSQL leaves an
+INVALID index behind; drop it and run the upgrade again.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c1f7d2e9a40'
+down_revision: Union[str, None] = '26ea38088c96'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+INDEXES = (
+    # name, table, columns, options
+    ('ix_cars_car_plate', 'cars', ['car_plate'], {'unique': True}),
+    ('ix_cars_user_id', 'cars', ['user_id'], {}),
+    ('ix_parking_history_car_id_end_time', 'parking_history', ['car_id', 'end_time'], {}),
+    ('ix_parking_history_open', 'parking_history', ['car_id'],
+     {'postgresql_where': sa.text('end_time IS NULL')}),
+    ('ix_parking_history_start_time', 'parking_history', ['start_time'], {}),
+    ('ix_billing_user_id_is_sent_is_paid', 'billing', ['user_id', 'is_sent', 'is_paid'], {}),
+    ('ix_billing_parking_history_id', 'billing', ['parking_history_id'], {}),
+    ('ix_messages_user_id_is_active', 'messages', ['user_id', 'is_active'], {}),
+    ('ix_messages_bill_id', 'messages', ['bill_id'], {}),
+    ('ix_tariffs_set_date', 'tariffs', ['set_date', 'id'], {}),
+)
+
+
+def upgrade() -> None:
+    duplicates = op.get_bind().execute(sa.text(
+        "SELECT car_plate FROM cars GROUP BY car_plate HAVING count(*) > 1 LIMIT 10"
+    )).scalars().all()
+    if duplicates:
+        raise RuntimeError("Cannot add the unique plate index, plates registered more than once: "
+                           + ", ".join(duplicates))
+
+    with op.get_context().autocommit_block():
+        for name, table, columns, options in INDEXES:
+            op.create_index(name, table, columns,
+                            postgresql_concurrently=True,
+                            if_not_exists=True,
+                            **options)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table,
+                          postgresql_concurrently=True,
+                          if_exists=True)
@@ -0,0 +1,56 @@
+"""added_parking_stats_rollups
+
+Revision ID: 8b3e6f0a1d27
+Revises: 5c1f7d2e9a40
+Create Date: 2026-10-18 14:07:33.540216
+
+Daily and hourly rollups of parking_history read by the admin statistics
+pages. The tables are filled from the existing history here; afterwards the
+gate keeps them up to date and ``python -m db_models.rollups`` rebuilds them.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8b3e6f0a1d27'
+down_revision: Union[str, None] = '5c1f7d2e9a40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('parking_daily_stats',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('parkings', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('finished', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('duration_seconds', sa.Float(), server_default='0', nullable=False),
+    sa.PrimaryKeyConstraint('day')
+    )
+    op.create_table('parking_hourly_stats',
+    sa.Column('hour', sa.DateTime(), nullable=False),
+    sa.Column('parkings', sa.Integer(), server_default='0', nullable=False),
+    sa.PrimaryKeyConstraint('hour')
+    )
+
+    op.execute("""
+        INSERT INTO parking_daily_stats (day, parkings, finished, duration_seconds)
+        SELECT start_time::date, count(*), count(end_time),
+               coalesce(sum(extract(epoch FROM end_time - start_time)), 0)
+        FROM parking_history
+        GROUP BY start_time::date
+    """)
+    op.execute("""
+        INSERT INTO parking_hourly_stats (hour, parkings)
+        SELECT date_trunc('hour', start_time), count(*)
+        FROM parking_history
+        GROUP BY date_trunc('hour', start_time)
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('parking_hourly_stats')
+    op.drop_table('parking_daily_stats')
@@ -0,0 +1,148 @@
+import asyncio
+import logging
+from typing import List, Optional, Set, Tuple
+
+from settings import settings
+from ocr_ml.executor import InferenceExecutor, inference_executor
+from ocr_ml.plate_recognition import Recognition, frame_hash, get_plate_numbers
+from ocr_ml.recognition_cache import RecognitionCache, recognition_cache
+
+logger = logging.getLogger(__name__)
+
+
+class PlateBatcher:
+    """
+        Micro-batching front end for plate recognition.
+
+        Frames submitted by concurrent camera requests are collected for up to
+        ``max_wait_ms`` milliseconds or until ``batch_size`` frames are waiting,
+        then recognized together with one detector forward pass and one
+        recognizer call in the inference executor. Each caller gets its own
+        result back through a future.
+
+        Frames tagged with a camera are first looked up in the recognition
+        cache, so repeated triggers of a camera skip the pipeline entirely.
+
+        Attributes:
+            executor (InferenceExecutor): Executor the batches are run in.
+            batch_size (int): Maximum number of frames per batch.
+            max_wait_ms (int): Maximum time the first frame of a batch waits for company.
+            cache (Optional[RecognitionCache]): Cache of recent results per camera.
+        """
+
+    def __init__(self,
+                 executor: InferenceExecutor,
+                 batch_size: int = 4,
+                 max_wait_ms: int = 50,
+                 cache: Optional[RecognitionCache] = None) -> None:
+        self.executor = executor
+        self.cache = cache
+        self.batch_size = max(1, batch_size)
+        self.max_wait_ms = max_wait_ms
+        self._queue: Optional[asyncio.Queue] = None
+        self._collector: Optional[asyncio.Task] = None
+        self._dispatches: Set[asyncio.Task] = set()
+
+    def _ensure_started(self) -> asyncio.Queue:
+        """Starts the collector task on the running loop if needed."""
+        if self._collector is None or self._collector.done():
+            self._queue = asyncio.Queue()
+            self._collector = asyncio.create_task(self._collect())
+        return self._queue
+
+    async def recognize(self,
+                        image: bytes,
+                        camera: Optional[str] = None) -> List[Recognition]:
+        """
+            Recognizes license plates on one frame as part of the next batch.
+
+            Args:
+                image (bytes): The encoded frame.
+                camera (Optional[str]): Identifier of the camera that sent the
+                    frame; enables the recognition cache.
+
+            Returns:
+                List[Recognition]: The recognized license plate texts.
+
+            Raises:
+                InferenceError: If the executor rejected or timed out the batch.
+        """
+        key = None
+        if camera is not None and self.cache is not None:
+            key = await asyncio.to_thread(frame_hash, image)
+            if key is not None:
+                cached = self.cache.get(camera, key)
+                if cached is not None:
+                    return cached
+
+        queue = self._ensure_started()
+        future = asyncio.get_running_loop().create_future()
+        queue.put_nowait((image, future))
+        result = await future
+
+        # Empty reads are not cached: the next trigger may catch the plate.
+        if key is not None and result:
+            self.cache.put(camera, key, result)
+        return result
+
+    async def _collect(self) -> None:
+        """Groups queued frames into batches and hands them to the executor."""
+        loop = asyncio.get_running_loop()
+        wait = self.max_wait_ms / 1000
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + wait
+            while len(batch) < self.batch_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(),
+                                                        remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            task = asyncio.create_task(self._dispatch(batch))
+            self._dispatches.add(task)
+            task.add_done_callback(self._dispatches.discard)
+
+    async def _dispatch(self,
+                        batch: List[Tuple[bytes, asyncio.Future]]) -> None:
+        """Runs one batch and resolves the callers' futures."""
+        batch = [(image, future) for image, future in batch
+                 if not future.done()]
+        if not batch:
+            return
+
+        logger.debug("Recognizing batch of %d frames", len(batch))
+        try:
+            results = await self.executor.submit(
+                get_plate_numbers,
+                [image for image, _ in batch]
+            )
+        except Exception as err:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(err)
+            return
+
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    async def stop(self) -> None:
+        """Stops collecting frames and waits for running batches."""
+        if self._collector is not None:
+            self._collector.cancel()
+            await asyncio.gather(self._collector, return_exceptions=True)
+            self._collector = None
+        if self._dispatches:
+            await asyncio.gather(*self._dispatches, return_exceptions=True)
+
+
+plate_batcher = PlateBatcher(
+    inference_executor,
+    batch_size=settings.inference_batch_size,
+    max_wait_ms=settings.inference_batch_wait_ms,
+    cache=recognition_cache
+)
@@ -0,0 +1,130 @@
+"""
+Compares an exported plate detector with the PyTorch model it was exported from.
+
+Usage:
+    python -m ocr_ml.detector_parity path/to/frames --backend onnx
+
+Every frame is run through the pickled PyTorch detector and through the
+exported backend. Each reference box must be found by the exported model with
+an IoU of at least ``--min-iou`` and a confidence within ``--max-conf-diff``.
+The script prints a JSON report and exits with status 1 if parity fails.
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from ocr_ml.plate_recognition import decode_frame, load_detector  # noqa: E402
+
+IMAGE_SUFFIXES = {'.jpg', '.jpeg', '.png', '.bmp'}
+
+
+def box_iou(a, b):
+    """
+        Computes the IoU of every pair of boxes.
+
+        Args:
+            a (numpy.ndarray): Boxes as rows of (x1, y1, x2, y2).
+            b (numpy.ndarray): Boxes as rows of (x1, y1, x2, y2).
+
+        Returns:
+            numpy.ndarray: Matrix of shape (len(a), len(b)).
+        """
+    top_left = np.maximum(a[:, None, :2], b[None, :, :2])
+    bottom_right = np.minimum(a[:, None, 2:4], b[None, :, 2:4])
+    inter = np.clip(bottom_right - top_left, 0, None).prod(axis=2)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    return inter / np.maximum(area_a[:, None] + area_b[None, :] - inter, 1e-9)
+
+
+def compare(reference, candidate):
+    """
+        Matches the boxes of the exported model to the reference boxes.
+
+        Args:
+            reference (numpy.ndarray): Reference detections (x1, y1, x2, y2, confidence, class).
+            candidate (numpy.ndarray): Detections of the exported model.
+
+        Returns:
+            List[tuple]: For every reference box, the best IoU and the absolute
+                         confidence difference of its match (0 and the reference
+                         confidence if nothing matched).
+        """
+    if len(reference) == 0:
+        return []
+    if len(candidate) == 0:
+        return [(0.0, float(conf)) for conf in reference[:, 4]]
+
+    iou = box_iou(reference, candidate)
+    best = iou.argmax(axis=1)
+    return [(float(iou[i, j]), float(abs(reference[i, 4] - candidate[j, 4])))
+            for i, j in enumerate(best)]
+
+
+def run(frames_dir, backend, min_iou=0.9, max_conf_diff=0.05):
+    """
+        Runs both detectors on every frame of a directory.
+
+        Args:
+            frames_dir (Path): Directory with the frames.
+            backend (str): The exported backend to check ('onnx', 'onnx_int8' or 'openvino').
+            min_iou (float): Smallest IoU accepted for a matched box.
+            max_conf_diff (float): Largest confidence difference accepted.
+
+        Returns:
+            dict: The parity report.
+        """
+    reference_model = load_detector('torch')
+    candidate_model = load_detector(backend)
+
+    matches = []
+    timings = {'torch': [], backend: []}
+    paths = [path for path in sorted(Path(frames_dir).iterdir())
+             if path.suffix.lower() in IMAGE_SUFFIXES]
+    for path in paths:
+        frame = decode_frame(path.read_bytes())
+        if frame is None:
+            continue
+        outputs = []
+        for name, model in (('torch', reference_model), (backend, candidate_model)):
+            t0 = time.perf_counter()
+            result = model([frame.image])
+            timings[name].append(time.perf_counter() - t0)
+            outputs.append(result.xyxy[0].cpu().numpy())
+        matches.extend(compare(*outputs))
+
+    ious = np.array([iou for iou, _ in matches])
+    diffs = np.array([diff for _, diff in matches])
+    failed = int(((ious < min_iou) | (diffs > max_conf_diff)).sum()) if matches else 0
+    return {
+        'backend': backend,
+        'frames': len(paths),
+        'reference_boxes': len(matches),
+        'failed_boxes': failed,
+        'min_iou': float(ious.min()) if matches else None,
+        'max_conf_diff': float(diffs.max()) if matches else None,
+        'mean_ms': {name: float(np.mean(samples) * 1000) if samples else None
+                    for name, samples in timings.items()},
+        'passed': failed == 0,
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('frames', type=Path, help='directory of gate frames')
+    parser.add_argument('--backend', default='onnx', choices=['onnx', 'onnx_int8', 'openvino'])
+    parser.add_argument('--min-iou', type=float, default=0.9)
+    parser.add_argument('--max-conf-diff', type=float, default=0.05)
+    args = parser.parse_args()
+
+    report = run(args.frames, args.backend, args.min_iou, args.max_conf_diff)
+    print(json.dumps(report, indent=2))
+    sys.exit(0 if report['passed'] else 1)
@@ -0,0 +1,123 @@
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+class InferenceError(Exception):
+    """Base class for failures of the inference executor."""
+
+
+class InferenceBusy(InferenceError):
+    """Raised when the inference queue stays full for longer than allowed."""
+
+
+class InferenceTimeout(InferenceError):
+    """Raised when a submitted job does not finish in time."""
+
+
+class InferenceExecutor:
+    """
+        Runs blocking model inference away from the event loop.
+
+        Jobs are executed by a dedicated thread pool, so YOLO and EasyOCR calls
+        do not freeze the uvicorn worker. The number of jobs admitted at once
+        (running plus waiting) is bounded; callers that cannot get a slot in
+        time fail fast with ``InferenceBusy`` instead of piling up.
+
+        Attributes:
+            workers (int): Number of inference threads.
+            queue_size (int): Number of jobs allowed to wait for a free thread.
+            queue_timeout (float): Seconds a caller waits for a queue slot.
+            timeout (float): Seconds a caller waits for its job to finish.
+        """
+
+    def __init__(self,
+                 workers: int = 1,
+                 queue_size: int = 4,
+                 queue_timeout: float = 2.0,
+                 timeout: float = 15.0) -> None:
+        self.workers = workers
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.timeout = timeout
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._lock = threading.Lock()
+
+    @property
+    def pool(self) -> ThreadPoolExecutor:
+        """The underlying thread pool, created on first use."""
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(
+                        max_workers=self.workers,
+                        thread_name_prefix='inference'
+                    )
+        return self._pool
+
+    @property
+    def slots(self) -> asyncio.Semaphore:
+        """Semaphore limiting the number of admitted jobs."""
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.workers + self.queue_size)
+        return self._slots
+
+    async def submit(self, func: Callable[..., Any], *args: Any) -> Any:
+        """
+            Runs ``func(*args)`` in the inference pool and awaits its result.
+
+            Args:
+                func (Callable[..., Any]): Blocking function to run.
+                *args (Any): Positional arguments for the function.
+
+            Returns:
+                Any: The value returned by the function.
+
+            Raises:
+                InferenceBusy: If no queue slot was freed within ``queue_timeout``.
+                InferenceTimeout: If the job did not finish within ``timeout``.
+        """
+        slots = self.slots
+        try:
+            await asyncio.wait_for(slots.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Inference queue is full, rejecting job")
+            raise InferenceBusy("Recognition service is busy") from None
+
+        loop = asyncio.get_running_loop()
+        try:
+            future = loop.run_in_executor(self.pool, func, *args)
+        except BaseException:
+            slots.release()
+            raise
+        # The slot is held until the thread is really done, even if the
+        # caller gave up waiting, so the backlog can never exceed the bound.
+        future.add_done_callback(lambda _: slots.release())
+
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), self.timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Inference job exceeded %.1f s", self.timeout)
+            raise InferenceTimeout("Recognition took too long") from None
+
+    def shutdown(self) -> None:
+        """Stops the thread pool, letting running jobs finish."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+        self._slots = None
+
+
+inference_executor = InferenceExecutor(
+    workers=settings.inference_workers,
+    queue_size=settings.inference_queue_size,
+    queue_timeout=settings.inference_queue_timeout,
+    timeout=settings.inference_timeout
+)
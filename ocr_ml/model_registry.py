@@ -0,0 +1,89 @@
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+
+class ModelRegistry:
+    """
+        Lazily loaded, process-wide store of ML models.
+
+        Models are registered with a loader function and deserialised the first
+        time they are requested, or when ``load`` is called explicitly at
+        startup. Loading is guarded by a per-model lock, so concurrent callers
+        never load the same model twice. The load time of every model is kept
+        for reporting.
+        """
+
+    def __init__(self) -> None:
+        self._loaders: Dict[str, Callable[[], Any]] = {}
+        self._models: Dict[str, Any] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._load_times: Dict[str, float] = {}
+
+    def register(self, name: str, loader: Callable[[], Any]) -> None:
+        """
+            Registers a loader for a model.
+
+            Args:
+                name (str): The name the model is requested by.
+                loader (Callable[[], Any]): Function returning the loaded model.
+        """
+        self._loaders[name] = loader
+        self._locks.setdefault(name, threading.Lock())
+
+    def get(self, name: str) -> Any:
+        """
+            Returns a model, loading it on first use.
+
+            Args:
+                name (str): The registered model name.
+
+            Returns:
+                Any: The loaded model.
+
+            Raises:
+                KeyError: If no loader is registered under the name.
+        """
+        model = self._models.get(name)
+        if model is not None:
+            return model
+
+        loader = self._loaders[name]
+        with self._locks[name]:
+            model = self._models.get(name)
+            if model is None:
+                start = time.perf_counter()
+                model = loader()
+                elapsed = time.perf_counter() - start
+                self._models[name] = model
+                self._load_times[name] = elapsed
+                logger.info("Model '%s' loaded in %.2f s", name, elapsed)
+        return model
+
+    def load(self, name: str) -> float:
+        """
+            Loads a model eagerly, e.g. from a startup hook.
+
+            Args:
+                name (str): The registered model name.
+
+            Returns:
+                float: Seconds spent loading the model; 0 if it was already loaded.
+        """
+        loaded = name in self._models
+        self.get(name)
+        return 0.0 if loaded else self._load_times[name]
+
+    def is_loaded(self, name: str) -> bool:
+        """Tells whether a model has already been loaded."""
+        return name in self._models
+
+    def load_times(self) -> Dict[str, float]:
+        """Returns the load time in seconds of every loaded model."""
+        return dict(self._load_times)
+
+
+model_registry = ModelRegistry()
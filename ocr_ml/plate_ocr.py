@@ -0,0 +1,157 @@
+from collections import namedtuple
+from pathlib import Path
+from typing import List
+
+import cv2
+import numpy as np
+import torch
+from torch import nn
+
+# Characters that survive CAR_PLATE_REGEX in cameras/gate.py
+PLATE_ALPHABET = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+BLANK = 0
+IMG_HEIGHT = 32
+IMG_WIDTH = 128
+
+PlateRead = namedtuple('PlateRead', ['text', 'confidence'])
+
+
+def _conv(c1, c2, pool):
+    """Conv-BN-ReLU block followed by an optional max pool."""
+    layers = [nn.Conv2d(c1, c2, 3, 1, 1, bias=False),
+              nn.BatchNorm2d(c2),
+              nn.ReLU(inplace=True)]
+    if pool:
+        layers.append(nn.MaxPool2d(pool))
+    return nn.Sequential(*layers)
+
+
+class PlateCRNN(nn.Module):
+    """
+        Small CRNN that reads a whole plate crop in one pass.
+
+        A convolutional backbone collapses the 32 pixel high crop into a
+        sequence of 32 column features, a bidirectional GRU adds context and a
+        linear layer scores every column over the plate alphabet plus the CTC
+        blank. No text detection stage is needed: the YOLO box already bounds
+        the plate.
+
+        Attributes:
+            alphabet (str): Characters the model can output.
+        """
+
+    def __init__(self, alphabet: str = PLATE_ALPHABET, hidden: int = 128) -> None:
+        super().__init__()
+        self.alphabet = alphabet
+        self.backbone = nn.Sequential(
+            _conv(1, 32, (2, 2)),     # 16 x 64
+            _conv(32, 64, (2, 2)),    # 8 x 32
+            _conv(64, 128, (2, 1)),   # 4 x 32
+            _conv(128, 128, (4, 1)),  # 1 x 32
+        )
+        self.rnn = nn.GRU(128, hidden, batch_first=True, bidirectional=True)
+        self.head = nn.Linear(2 * hidden, len(alphabet) + 1)
+
+    def forward(self, x: torch.Tensor) -> torch.Tensor:
+        """
+            Scores every column of a batch of crops.
+
+            Args:
+                x (torch.Tensor): Crops of shape (N, 1, IMG_HEIGHT, IMG_WIDTH) scaled to 0-1.
+
+            Returns:
+                torch.Tensor: Log-probabilities of shape (T, N, classes), as CTC loss expects.
+            """
+        features = self.backbone(x).squeeze(2).permute(0, 2, 1)  # N, T, C
+        features, _ = self.rnn(features)
+        return self.head(features).log_softmax(2).permute(1, 0, 2)
+
+
+def preprocess(crops) -> torch.Tensor:
+    """
+        Turns plate crops into a model batch.
+
+        Crops are converted to grey, resized to ``IMG_HEIGHT`` keeping their
+        aspect ratio and padded on the right up to ``IMG_WIDTH``.
+
+        Args:
+            crops (List[numpy.ndarray]): The plate crops.
+
+        Returns:
+            torch.Tensor: Batch of shape (N, 1, IMG_HEIGHT, IMG_WIDTH).
+        """
+    batch = np.zeros((len(crops), 1, IMG_HEIGHT, IMG_WIDTH), dtype=np.float32)
+    for i, crop in enumerate(crops):
+        grey = cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY) if crop.ndim == 3 else crop
+        height, width = grey.shape[:2]
+        new_width = min(IMG_WIDTH, max(1, round(width * IMG_HEIGHT / height)))
+        resized = cv2.resize(grey, (new_width, IMG_HEIGHT), interpolation=cv2.INTER_AREA)
+        batch[i, 0, :, :new_width] = resized / 255
+    return torch.from_numpy(batch)
+
+
+def encode(text: str, alphabet: str = PLATE_ALPHABET) -> List[int]:
+    """Maps plate characters to class indices; index 0 is the CTC blank."""
+    return [alphabet.index(char) + 1 for char in text if char in alphabet]
+
+
+def ctc_greedy_decode(log_probs: torch.Tensor,
+                      alphabet: str = PLATE_ALPHABET) -> List[PlateRead]:
+    """
+        Decodes model output by taking the best class of every column.
+
+        Args:
+            log_probs (torch.Tensor): Output of ``PlateCRNN`` of shape (T, N, classes).
+            alphabet (str): The model alphabet.
+
+        Returns:
+            List[PlateRead]: Text and confidence of every crop. The confidence is
+                             the lowest probability among the emitted characters.
+        """
+    probs, best = log_probs.exp().max(2)
+    probs, best = probs.T.cpu().numpy(), best.T.cpu().numpy()
+
+    reads = []
+    for column_probs, column_best in zip(probs, best):
+        keep = column_best != BLANK
+        keep[1:] &= column_best[1:] != column_best[:-1]  # collapse repeats
+        text = ''.join(alphabet[i - 1] for i in column_best[keep])
+        confidence = float(column_probs[keep].min()) if keep.any() else 0.0
+        reads.append(PlateRead(text, confidence))
+    return reads
+
+
+class PlateRecognizer:
+    """
+        Inference wrapper around a trained ``PlateCRNN``.
+
+        Attributes:
+            model (PlateCRNN): The recognizer in evaluation mode.
+        """
+
+    def __init__(self, model: PlateCRNN) -> None:
+        self.model = model.eval()
+
+    @classmethod
+    def load(cls, path: Path) -> 'PlateRecognizer':
+        """Loads a checkpoint written by ``ocr_ml/train_plate_ocr.py``."""
+        ckpt = torch.load(path, map_location='cpu', weights_only=False)
+        model = PlateCRNN(ckpt.get('alphabet', PLATE_ALPHABET))
+        model.load_state_dict(ckpt['model'])
+        return cls(model)
+
+    @torch.inference_mode()
+    def recognize(self, crops) -> List[PlateRead]:
+        """
+            Reads several plate crops in one forward pass.
+
+            Args:
+                crops (List[numpy.ndarray]): The plate crops.
+
+            Returns:
+                List[PlateRead]: Text and confidence of every crop.
+            """
+        if not crops:
+            return []
+        return ctc_greedy_decode(self.model(preprocess(crops)),
+                                 self.model.alphabet)
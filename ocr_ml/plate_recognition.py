@@ -1,19 +1,179 @@
+import importlib.util
+import logging
 from pathlib import Path
 from collections import namedtuple
 from typing import List
 
 import numpy as np
 # import pytesseract
-import easyocr
-import torch
 import cv2
 
+from ocr_ml.model_registry import model_registry
+from ocr_ml.reader_pool import reader_pool
+from settings import settings
+
 model_path = Path(__file__).parent / 'model' / 'model.pth'
 weights_path = Path(__file__).parent / 'model' / 'best.pt'
+plate_ocr_path = Path(__file__).parent / 'model' / 'plate_crnn.pt'
+
+logger = logging.getLogger(__name__)
 
 Recognition = namedtuple('Recognition', ['box', 'text', 'confidence'])
+DecodedFrame = namedtuple('DecodedFrame', ['image', 'scale', 'buffer'])
+PlateCandidate = namedtuple('PlateCandidate', ['box', 'confidence'])
+PlateObservation = namedtuple('PlateObservation', ['box', 'confidence', 'reads'])
+
+# JPEG start-of-frame markers; C4, C8 and CC share the range but are not frames
+_JPEG_SOF_MARKERS = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+_REDUCED_FLAGS = (
+    (8, cv2.IMREAD_REDUCED_COLOR_8),
+    (4, cv2.IMREAD_REDUCED_COLOR_4),
+    (2, cv2.IMREAD_REDUCED_COLOR_2),
+)
+
+
+onnx_path = weights_path.with_suffix('.onnx')
+onnx_int8_path = weights_path.with_name(f'{weights_path.stem}_int8.onnx')
+openvino_path = weights_path.with_name(f'{weights_path.stem}_openvino_model')
+
+# Exported detector backends, fastest on CPU first. The INT8 model only
+# exists once ocr_ml/quantize_detector.py has accepted it.
+DETECTOR_BACKENDS = {
+    'onnx_int8': (onnx_int8_path, 'onnxruntime'),
+    'openvino': (openvino_path, 'openvino'),
+    'onnx': (onnx_path, 'onnxruntime'),
+}
+
+
+def _backend_available(name):
+    """Tells whether a detector backend has its exported model and runtime installed."""
+    path, runtime = DETECTOR_BACKENDS[name]
+    return path.exists() and importlib.util.find_spec(runtime) is not None
+
+
+def resolve_detector_backend(backend=None):
+    """
+        Picks the detector backend to run.
+
+        Args:
+            backend (str): 'torch', 'onnx', 'onnx_int8', 'openvino' or 'auto'.
+                Defaults to ``settings.detector_backend``.
+                'auto' takes the fastest exported model whose runtime is installed and
+                falls back to the pickled PyTorch model.
+
+        Returns:
+            str: The name of the backend.
+
+        Raises:
+            ValueError: If the backend is unknown.
+        """
+    backend = (backend or settings.detector_backend).lower()
+    if backend == 'auto':
+        for name in DETECTOR_BACKENDS:
+            if _backend_available(name):
+                return name
+        return 'torch'
+    if backend != 'torch' and backend not in DETECTOR_BACKENDS:
+        raise ValueError(f"Unknown detector backend {backend!r}")
+    return backend
+
+
+def load_detector(backend=None):
+    """
+        Loads the license plate detector from disk.
+
+        Torch is imported here rather than at module level, so importing this
+        module stays cheap for processes that never run recognition. Exported
+        ONNX and OpenVINO models (see ``export.py``) are driven through
+        ``DetectMultiBackend`` and wrapped in ``AutoShape``, so they take and
+        return the same data as the pickled PyTorch model.
+
+        Args:
+            backend (str): The backend to load, see ``resolve_detector_backend``.
+
+        Returns:
+            The YOLOv5 AutoShape detection model.
+        """
+    import torch
+
+    backend = resolve_detector_backend(backend)
+    if backend == 'torch':
+        return torch.load(model_path, weights_only=False)
+
+    from models.common import AutoShape, DetectMultiBackend
+
+    path, _ = DETECTOR_BACKENDS[backend]
+    logger.info("Loading %s plate detector from %s", backend, path)
+    return AutoShape(DetectMultiBackend(str(path), device=torch.device('cpu')),
+                     verbose=False)
+
+
+model_registry.register('detector', load_detector)
+
+
+def load_plate_ocr():
+    """
+        Loads the plate-specific CRNN recognizer trained with ``ocr_ml/train_plate_ocr.py``.
+
+        Returns:
+            PlateRecognizer: The recognizer.
+        """
+    from ocr_ml.plate_ocr import PlateRecognizer
+
+    return PlateRecognizer.load(plate_ocr_path)
+
+
+model_registry.register('plate_ocr', load_plate_ocr)
+
+
+def plate_ocr_available():
+    """Tells whether the fast plate recognizer is enabled and trained."""
+    return settings.plate_ocr_enabled and plate_ocr_path.exists()
 
-model = torch.load(model_path, weights_only=False)
+
+def select_plate_boxes(boxes, k=None, min_confidence=None,
+                       min_aspect=None, max_aspect=None):
+    """
+        Selects the most likely plate boxes from a detector output.
+
+        Boxes below the minimum confidence or with a width to height ratio
+        outside the plate aspect prior are discarded, and the ``k`` most
+        confident of the rest are kept. All filtering is done on whole arrays.
+
+        Args:
+            boxes (numpy.ndarray): Detections as rows of (x1, y1, x2, y2, confidence, class).
+            k (int): Maximum number of boxes to keep. Defaults to ``settings.plate_top_k``.
+            min_confidence (float): Defaults to ``settings.plate_min_confidence``.
+            min_aspect (float): Defaults to ``settings.plate_min_aspect``.
+            max_aspect (float): Defaults to ``settings.plate_max_aspect``.
+
+        Returns:
+            List[PlateCandidate]: The kept boxes, most confident first.
+        """
+    k = max(1, settings.plate_top_k if k is None else k)
+    min_confidence = settings.plate_min_confidence if min_confidence is None else min_confidence
+    min_aspect = settings.plate_min_aspect if min_aspect is None else min_aspect
+    max_aspect = settings.plate_max_aspect if max_aspect is None else max_aspect
+
+    boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 6)
+    width = boxes[:, 2] - boxes[:, 0]
+    height = boxes[:, 3] - boxes[:, 1]
+    aspect = width / np.maximum(height, 1e-6)
+    keep = ((boxes[:, 4] >= min_confidence)
+            & (height > 0)
+            & (aspect >= min_aspect)
+            & (aspect <= max_aspect))
+    boxes = boxes[keep]
+
+    if len(boxes) > k:
+        top = np.argpartition(-boxes[:, 4], k - 1)[:k]
+        boxes = boxes[top]
+    boxes = boxes[np.argsort(-boxes[:, 4], kind='stable')]
+
+    corners = boxes[:, :4].astype(int)
+    return [PlateCandidate(tuple(corner.tolist()), float(confidence))
+            for corner, confidence in zip(corners, boxes[:, 4])]
 
 
 def detect_license_plates(image):
@@ -27,21 +187,24 @@ def detect_license_plates(image):
             tuple: Coordinates (x1, y1, x2, y2) of the detected license plate's bounding box with the highest confidence.
                    If no box is found, returns None.
         """
-    results = model(image)
+    candidates = detect_license_plates_batch([image])[0]
+    return candidates[0].box if candidates else None
 
-    boxes = results.xyxy[0].cpu().numpy()
-    best_confidence = -1
-    best_box = None
 
-    for box in boxes:
-        x1, y1, x2, y2 = map(int, box[:4])
-        confidence = box[4]
+def detect_license_plates_batch(images, k=None):
+    """
+        Detects license plates in several images with a single detector forward pass.
 
-        if confidence > best_confidence:
-            best_confidence = confidence
-            best_box = (x1, y1, x2, y2)
+        Args:
+            images (List[numpy.ndarray]): The input images.
+            k (int): Maximum number of candidates per image. Defaults to ``settings.plate_top_k``.
 
-    return best_box
+        Returns:
+            List[List[PlateCandidate]]: For every image, the plate candidates, most confident first.
+        """
+    model = model_registry.get('detector')
+    results = model(list(images))
+    return [select_plate_boxes(boxes.cpu().numpy(), k) for boxes in results.xyxy]
 
 
 def extract_license_plate(image, best_box):
@@ -80,11 +243,318 @@ def recognize_text_easy(image):
         Returns:
             list: A list of recognized text data, where each element is a tuple containing the bounding box and recognized text.
         """
-    reader = easyocr.Reader(['en'])
-    num = reader.readtext(image, paragraph=False)
+    with reader_pool.checkout() as reader:
+        num = reader.readtext(image, paragraph=False)
     return num
 
 
+def recognize_text_easy_batch(images):
+    """
+        Recognizes text on several license plate crops with one batched EasyOCR call.
+
+        EasyOCR batches only same-sized images, so the crops are padded with a
+        black border up to the largest height and width instead of being stretched.
+
+        Args:
+            images (List[numpy.ndarray]): The license plate crops.
+
+        Returns:
+            list: For every crop, the list of recognized text data as returned by ``recognize_text_easy``.
+        """
+    if not images:
+        return []
+    if len(images) == 1:
+        return [recognize_text_easy(images[0])]
+
+    images = [cv2.cvtColor(image, cv2.COLOR_GRAY2BGR) if image.ndim == 2 else image
+              for image in images]
+    height = max(image.shape[0] for image in images)
+    width = max(image.shape[1] for image in images)
+    padded = [
+        cv2.copyMakeBorder(image,
+                           0, height - image.shape[0],
+                           0, width - image.shape[1],
+                           cv2.BORDER_CONSTANT, value=0)
+        for image in images
+    ]
+
+    with reader_pool.checkout() as reader:
+        nums = reader.readtext_batched(padded,
+                                       paragraph=False,
+                                       batch_size=len(padded))
+    return nums
+
+
+def recognize_plates(crops):
+    """
+        Reads license plate crops, trying the fast plate recognizer first.
+
+        The CRNN reads every crop in one forward pass without a text detection
+        stage. Crops it reads with a confidence below
+        ``settings.plate_ocr_min_confidence`` (or every crop, if no recognizer
+        is trained) go through the batched EasyOCR path instead.
+
+        Args:
+            crops (List[numpy.ndarray]): The license plate crops.
+
+        Returns:
+            list: For every crop, the list of recognized text data as (box, text, confidence) tuples.
+        """
+    results = [None] * len(crops)
+    fallback = list(range(len(crops)))
+
+    if crops and plate_ocr_available():
+        reads = model_registry.get('plate_ocr').recognize(crops)
+        fallback = []
+        for i, (crop, read) in enumerate(zip(crops, reads)):
+            if read.text and read.confidence >= settings.plate_ocr_min_confidence:
+                height, width = crop.shape[:2]
+                box = [[0, 0], [width, 0], [width, height], [0, height]]
+                results[i] = [(box, read.text, read.confidence)]
+            else:
+                fallback.append(i)
+
+    found = recognize_text_easy_batch([crops[i] for i in fallback])
+    for i, items in zip(fallback, found):
+        results[i] = items
+    return results
+
+
+def image_buffer(image):
+    """
+        Wraps encoded image bytes in a numpy array without copying them.
+
+        Args:
+            image (bytes): The encoded image; any buffer such as bytearray or memoryview works.
+
+        Returns:
+            numpy.ndarray: A read-only uint8 view of the bytes.
+        """
+    return np.frombuffer(image, np.uint8)
+
+
+def jpeg_size(buffer):
+    """
+        Reads the dimensions of a JPEG from its frame header without decoding it.
+
+        Args:
+            buffer (numpy.ndarray): The encoded image as uint8 array.
+
+        Returns:
+            tuple: (width, height), or None if the buffer is not a JPEG.
+        """
+    data = buffer.data
+    if len(data) < 4 or data[0] != 0xFF or data[1] != 0xD8:
+        return None
+
+    i = 2
+    while i + 9 < len(data):
+        if data[i] != 0xFF:
+            return None
+        marker = data[i + 1]
+        if marker == 0xFF:
+            i += 1
+            continue
+        if marker in _JPEG_SOF_MARKERS:
+            height = (data[i + 5] << 8) | data[i + 6]
+            width = (data[i + 7] << 8) | data[i + 8]
+            return width, height
+        if marker == 0x01 or 0xD0 <= marker <= 0xD9:
+            i += 2
+            continue
+        i += 2 + ((data[i + 2] << 8) | data[i + 3])
+    return None
+
+
+def frame_hash(image):
+    """
+        Computes a 64-bit difference hash (dHash) of a frame.
+
+        The frame is decoded at 1/8 resolution in grey, shrunk to 9x8 pixels and
+        every bit tells whether a pixel is brighter than its right neighbour.
+        Near-identical frames, such as repeated triggers of a camera while a
+        car waits, differ in only a few bits.
+
+        Args:
+            image (bytes): The encoded frame.
+
+        Returns:
+            int: The hash, or None if the bytes are not a valid image.
+        """
+    buffer = image_buffer(image)
+    flag = cv2.IMREAD_REDUCED_GRAYSCALE_8 if jpeg_size(buffer) else cv2.IMREAD_GRAYSCALE
+    grey = cv2.imdecode(buffer, flag)
+    if grey is None:
+        return None
+    small = cv2.resize(grey, (9, 8), interpolation=cv2.INTER_AREA)
+    bits = small[:, 1:] > small[:, :-1]
+    return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
+
+def decode_image(image):
+    """
+        Decodes an uploaded image at full resolution.
+
+        Args:
+            image (bytes): The encoded image.
+
+        Returns:
+            numpy.ndarray: The decoded image, or None if the bytes are not a valid image.
+        """
+    return cv2.imdecode(image_buffer(image), cv2.IMREAD_ANYCOLOR)
+
+
+def decode_frame(image, target_size=None):
+    """
+        Decodes an uploaded frame at the lowest resolution the detector can use.
+
+        JPEG frames much larger than the detector input are decoded with
+        libjpeg's DCT scaling (``IMREAD_REDUCED_COLOR_2/4/8``), which skips most
+        of the decoding work and memory; the detector letterboxes its input to
+        ``target_size`` anyway. Other formats are decoded at full resolution.
+
+        Args:
+            image (bytes): The encoded frame.
+            target_size (int): Detector input size; the reduced frame keeps its
+                longest side at least this long. Defaults to ``settings.detector_input_size``.
+
+        Returns:
+            DecodedFrame: The decoded image, the factor it was reduced by and the
+                          encoded buffer, or None if the bytes are not a valid image.
+        """
+    if target_size is None:
+        target_size = settings.detector_input_size
+    buffer = image_buffer(image)
+
+    flag, scale = cv2.IMREAD_ANYCOLOR, 1
+    size = jpeg_size(buffer)
+    if size is not None:
+        for factor, reduced_flag in _REDUCED_FLAGS:
+            if max(size) // factor >= target_size:
+                flag, scale = reduced_flag, factor
+                break
+
+    decoded = cv2.imdecode(buffer, flag)
+    if decoded is None:
+        return None
+    return DecodedFrame(decoded, scale, buffer)
+
+
+def plate_crop(frame, box, min_height=None):
+    """
+        Cuts the plate out of a frame at the resolution OCR needs.
+
+        The crop is taken from the reduced frame when it is already tall enough;
+        otherwise the frame is decoded at full resolution, the plate region is
+        copied out and the full frame is released right away.
+
+        Args:
+            frame (DecodedFrame): The frame returned by ``decode_frame``.
+            box (tuple): Plate box (x1, y1, x2, y2) in the reduced frame coordinates.
+            min_height (int): Smallest crop height in pixels accepted for OCR.
+                Defaults to ``settings.ocr_min_plate_height``.
+
+        Returns:
+            numpy.ndarray: The plate crop, or None if there is no box.
+        """
+    if box is None:
+        return None
+    if min_height is None:
+        min_height = settings.ocr_min_plate_height
+
+    crop = extract_license_plate(frame.image, box)
+    if frame.scale == 1 or crop.shape[0] >= min_height:
+        return crop
+
+    full = cv2.imdecode(frame.buffer, cv2.IMREAD_ANYCOLOR)
+    if full is None:
+        return crop
+    height, width = full.shape[:2]
+    scale_y = height / frame.image.shape[0]
+    scale_x = width / frame.image.shape[1]
+    x1, y1, x2, y2 = box
+    full_box = (int(x1 * scale_x), int(y1 * scale_y),
+                min(int(round(x2 * scale_x)), width),
+                min(int(round(y2 * scale_y)), height))
+    return extract_license_plate(full, full_box).copy()
+
+
+def recognize_frame_plates(frames) -> List[List[PlateObservation]]:
+    """
+        Detects and reads license plates on a batch of decoded frames, keeping
+        the reads of every detected box together.
+
+        All frames go through one detector forward pass and the crops of every
+        plate candidate through one recognizer call, so a false positive as the
+        most confident box does not hide the real plate. The list is emptied
+        once the plates are cut out, so the frames are released before OCR.
+
+        Args:
+            frames (List[DecodedFrame]): The frames; None entries yield no plates.
+                Frames captured from a video stream are wrapped as
+                ``DecodedFrame(image, 1, None)``.
+
+        Returns:
+            List[List[PlateObservation]]: For every frame, the detector box and
+                                          confidence of every plate candidate with
+                                          its recognized texts, most confident box first.
+        """
+    valid = [i for i, frame in enumerate(frames) if frame is not None]
+    candidates = detect_license_plates_batch([frames[i].image for i in valid]) if valid else []
+
+    crops, owners = [], []
+    for i, found in zip(valid, candidates):
+        for candidate in found:
+            plate_img = plate_crop(frames[i], candidate.box)
+            if plate_img is not None and plate_img.size > 0:
+                crops.append(plate_img)
+                owners.append((i, candidate))
+    count = len(frames)
+    frames.clear()
+
+    plates = [[] for _ in range(count)]
+    for (i, candidate), found in zip(owners, recognize_plates(crops)):
+        plates[i].append(PlateObservation(candidate.box,
+                                          candidate.confidence,
+                                          [Recognition(*item) for item in found]))
+
+    return plates
+
+
+def recognize_frames(frames) -> List[List[Recognition]]:
+    """
+        Detects and recognizes license plates on a batch of decoded frames.
+
+        Args:
+            frames (List[DecodedFrame]): The frames, see ``recognize_frame_plates``.
+
+        Returns:
+            List[List[Recognition]]: For every frame, the recognized license plate texts,
+                                     candidates of the most confident box first.
+                                     An empty list means no plate was found.
+        """
+    return [[read for observation in found for read in observation.reads]
+            for found in recognize_frame_plates(frames)]
+
+
+def get_plate_numbers(images) -> List[List[Recognition]]:
+    """
+        Detects and recognizes license plates on a batch of images.
+
+        Frames are decoded at reduced resolution for detection; only the plate
+        regions are taken at full resolution for OCR (see ``recognize_frames``).
+
+        Args:
+            images (List[bytes]): The input images in byte format.
+
+        Returns:
+            List[List[Recognition]]: For every image, the recognized license plate texts,
+                                     candidates of the most confident box first.
+                                     An empty list means no plate was found.
+        """
+    return recognize_frames([decode_frame(image) for image in images])
+
+
 def get_plate_number(image) -> List[Recognition]:
     """
         Processes the input image to detect, extract, and recognize the license plate number.
@@ -95,16 +565,24 @@ def get_plate_number(image) -> List[Recognition]:
         Returns:
             List[Recognition]: A list of recognized license plate text and bounding boxes.
         """
-    nparr = np.fromstring(image, np.uint8)  
-    image = cv2.imdecode(nparr, cv2.IMREAD_ANYCOLOR)
-    box = detect_license_plates(image)
-    plate_img = extract_license_plate(image, box)
-    
-    # license_plate = recognize_text_tes(plate_img)
-    license_plate = [Recognition(*i) for i in recognize_text_easy(plate_img)]
-    print(license_plate[0].text)
-    
-    return license_plate
+    return get_plate_numbers([image])[0]
+
+
+def warm_up() -> None:
+    """
+        Loads the detector and the OCR readers and runs the readers once so the
+        first car does not pay the load cost.
+
+        Intended to be called once per worker at application startup.
+        """
+    model_registry.load('detector')
+    if plate_ocr_available():
+        model_registry.load('plate_ocr')
+    reader_pool.warm_up()
+    blank = np.zeros((32, 128, 3), dtype=np.uint8)
+    for _ in range(reader_pool.size):
+        with reader_pool.checkout() as reader:
+            reader.readtext(blank, paragraph=False)
 
 
 if __name__ == '__main__':
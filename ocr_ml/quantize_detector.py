@@ -0,0 +1,276 @@
+"""
+INT8 post-training quantisation of the plate detector with ONNX Runtime.
+
+Usage:
+    python -m ocr_ml.quantize_detector --calib path/to/gate/frames \\
+        --val path/to/dataset/images
+
+The FP32 ONNX model (``export.py --include onnx``) is calibrated on
+representative gate frames read with ``utils.dataloaders.LoadImages`` and
+quantised to a QDQ INT8 model staged as ``best_int8.unvalidated.onnx``. Both
+models are then evaluated on a labelled validation set in the YOLO layout
+(``images/`` and ``labels/``) the way ``segment/val.py`` scores boxes, and the
+mAP and latency deltas are reported. Only a model losing at most
+``--max-map-drop`` mAP@0.5 is moved to ``best_int8.onnx``, where
+``DETECTOR_BACKEND=onnx_int8`` or ``auto`` picks it up; any other is renamed
+to ``*.rejected.onnx`` so it is never loaded.
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from ocr_ml.plate_recognition import onnx_int8_path, onnx_path, weights_path  # noqa: E402
+
+
+class LoadImagesCalibrationReader:
+    """
+        Feeds letterboxed gate frames to the ONNX Runtime calibrator.
+
+        Args:
+            frames (Path): Directory, glob or list file of calibration frames.
+            input_name (str): Name of the model input.
+            img_size (int): Square input size the model is calibrated at.
+            limit (int): Maximum number of frames used; 0 uses all of them.
+        """
+
+    def __init__(self, frames, input_name, img_size=640, limit=0):
+        from utils.dataloaders import LoadImages
+
+        self.input_name = input_name
+        self.limit = limit
+        # auto=False pads every frame to img_size x img_size, the calibration shape
+        self._loader = iter(LoadImages(str(frames), img_size=img_size, auto=False))
+        self._count = 0
+
+    def get_next(self):
+        """Returns the next calibration batch, or None when the frames run out."""
+        if self.limit and self._count >= self.limit:
+            return None
+        try:
+            _, im, _, _, _ = next(self._loader)
+        except StopIteration:
+            return None
+        self._count += 1
+        return {self.input_name: (im[None].astype(np.float32) / 255)}
+
+
+def quantize(model_input, model_output, calib, img_size=640, limit=0,
+             per_channel=True, exclude_nodes=()):
+    """
+        Quantises an FP32 ONNX detector to a static QDQ INT8 model.
+
+        Args:
+            model_input (Path): The FP32 ONNX model.
+            model_output (Path): Where to write the INT8 model.
+            calib (Path): Calibration frames, anything ``LoadImages`` accepts.
+            img_size (int): Calibration input size.
+            limit (int): Maximum number of calibration frames.
+            per_channel (bool): Quantise weights per output channel.
+            exclude_nodes (tuple): Names of nodes kept in FP32, e.g. the detection head.
+
+        Returns:
+            Path: The INT8 model.
+        """
+    import onnxruntime
+    from onnxruntime.quantization import (CalibrationMethod, QuantFormat,
+                                          QuantType, quantize_static)
+    from onnxruntime.quantization.shape_inference import quant_pre_process
+
+    prepared = model_output.with_name(f'{model_output.stem}.prep.onnx')
+    quant_pre_process(str(model_input), str(prepared), skip_symbolic_shape=True)
+
+    session = onnxruntime.InferenceSession(str(prepared),
+                                           providers=['CPUExecutionProvider'])
+    reader = LoadImagesCalibrationReader(calib,
+                                         session.get_inputs()[0].name,
+                                         img_size, limit)
+    quantize_static(str(prepared),
+                    str(model_output),
+                    reader,
+                    quant_format=QuantFormat.QDQ,
+                    per_channel=per_channel,
+                    activation_type=QuantType.QUInt8,
+                    weight_type=QuantType.QInt8,
+                    calibrate_method=CalibrationMethod.MinMax,
+                    nodes_to_exclude=list(exclude_nodes))
+    prepared.unlink(missing_ok=True)
+    return model_output
+
+
+def _correct(detections, labels, iouv):
+    """
+        Matches detections to labels at every IoU threshold, as ``segment/val.py`` does for boxes.
+
+        Args:
+            detections (torch.Tensor): Rows of (x1, y1, x2, y2, conf, class).
+            labels (torch.Tensor): Rows of (class, x1, y1, x2, y2).
+            iouv (torch.Tensor): IoU thresholds.
+
+        Returns:
+            numpy.ndarray: Boolean matrix of shape (len(detections), len(iouv)).
+        """
+    import torch
+    from utils.metrics import box_iou
+
+    correct = np.zeros((detections.shape[0], iouv.shape[0])).astype(bool)
+    if not len(labels) or not len(detections):
+        return correct
+    iou = box_iou(labels[:, 1:], detections[:, :4])
+    correct_class = labels[:, 0:1] == detections[:, 5]
+    for i in range(len(iouv)):
+        x = torch.where((iou >= iouv[i]) & correct_class)
+        if x[0].shape[0]:
+            matches = torch.cat((torch.stack(x, 1), iou[x[0], x[1]][:, None]), 1).cpu().numpy()
+            if x[0].shape[0] > 1:
+                matches = matches[matches[:, 2].argsort()[::-1]]
+                matches = matches[np.unique(matches[:, 1], return_index=True)[1]]
+                matches = matches[np.unique(matches[:, 0], return_index=True)[1]]
+            correct[matches[:, 1].astype(int), i] = True
+    return correct
+
+
+def evaluate(model_file, images):
+    """
+        Scores a detector on a labelled dataset.
+
+        Args:
+            model_file (Path): Model file ``DetectMultiBackend`` can load.
+            images (Path): The ``images`` directory of a YOLO-layout dataset.
+
+        Returns:
+            dict: mAP@0.5, mAP@0.5:0.95 and mean latency in milliseconds.
+        """
+    import torch
+    from models.common import AutoShape, DetectMultiBackend
+    from utils.dataloaders import LoadImages, img2label_paths
+    from utils.general import xywhn2xyxy
+    from utils.metrics import ap_per_class
+
+    model = AutoShape(DetectMultiBackend(str(model_file), device=torch.device('cpu')),
+                      verbose=False)
+    iouv = torch.linspace(0.5, 0.95, 10)
+    stats, timings = [], []
+    for path, _, im0, _, _ in LoadImages(str(images)):
+        label_file = Path(img2label_paths([path])[0])
+        labels = np.zeros((0, 5), dtype=np.float32)
+        if label_file.exists():
+            rows = np.loadtxt(label_file, ndmin=2, dtype=np.float32)
+            if rows.size:
+                labels = rows[:, :5]
+        height, width = im0.shape[:2]
+        labels = torch.from_numpy(labels)
+        labels[:, 1:] = xywhn2xyxy(labels[:, 1:], w=width, h=height)
+
+        t0 = time.perf_counter()
+        detections = model(im0[..., ::-1]).xyxy[0].cpu()
+        timings.append(time.perf_counter() - t0)
+
+        stats.append((_correct(detections, labels, iouv),
+                      detections[:, 4].numpy(),
+                      detections[:, 5].numpy(),
+                      labels[:, 0].numpy()))
+
+    tp, conf, pred_cls, target_cls = (np.concatenate(x, 0) for x in zip(*stats))
+    if not len(target_cls) or not tp.any():
+        map50 = map50_95 = 0.0
+    else:
+        _, _, _, _, _, ap, _ = ap_per_class(tp, conf, pred_cls, target_cls)
+        map50, map50_95 = float(ap[:, 0].mean()), float(ap.mean(1).mean())
+    # the first frames include session warm-up
+    steady = timings[2:] or timings
+    return {'map50': map50,
+            'map50_95': map50_95,
+            'mean_ms': float(np.mean(steady) * 1000)}
+
+
+def run(calib, val, model_input=onnx_path, model_output=onnx_int8_path,
+        img_size=640, limit=0, per_channel=True, exclude_nodes=(), max_map_drop=0.01):
+    """
+        Quantises the detector and compares it with the FP32 model.
+
+        The INT8 model is written under a staging name and only moved to
+        ``model_output`` once it passed the accuracy check, so the detector
+        never loads an unvalidated model.
+
+        Args:
+            calib (Path): Calibration frames.
+            val (Path): The ``images`` directory of a labelled dataset.
+            model_input (Path): The FP32 ONNX model; exported from ``best.pt`` if missing.
+            model_output (Path): Where the accepted INT8 model is moved.
+            img_size (int): Calibration input size.
+            limit (int): Maximum number of calibration frames.
+            per_channel (bool): Quantise weights per output channel.
+            exclude_nodes (tuple): Nodes kept in FP32.
+            max_map_drop (float): Largest accepted mAP@0.5 loss.
+
+        Returns:
+            dict: The quantisation report.
+        """
+    model_input, model_output = Path(model_input), Path(model_output)
+    if not model_input.exists():
+        import export
+
+        export.run(weights=weights_path, imgsz=(img_size, img_size), include=('onnx',))
+        model_input = weights_path.with_suffix('.onnx')
+
+    staged = model_output.with_name(f'{model_output.stem}.unvalidated.onnx')
+    quantize(model_input, staged, calib, img_size, limit,
+             per_channel, exclude_nodes)
+    report = {
+        'fp32_model': str(model_input),
+        'int8_model': str(staged),
+        'fp32_mb': model_input.stat().st_size / 2 ** 20,
+        'int8_mb': staged.stat().st_size / 2 ** 20,
+    }
+
+    fp32 = evaluate(model_input, val)
+    int8 = evaluate(staged, val)
+    report.update({
+        'fp32': fp32,
+        'int8': int8,
+        'map50_delta': int8['map50'] - fp32['map50'],
+        'map50_95_delta': int8['map50_95'] - fp32['map50_95'],
+        'speedup': fp32['mean_ms'] / int8['mean_ms'] if int8['mean_ms'] else None,
+    })
+    report['accepted'] = -report['map50_delta'] <= max_map_drop
+    if report['accepted']:
+        staged.replace(model_output)
+        report['int8_model'] = str(model_output)
+    else:
+        rejected = model_output.with_name(f'{model_output.stem}.rejected.onnx')
+        staged.replace(rejected)
+        report['int8_model'] = str(rejected)
+    return report
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--calib', type=Path, required=True,
+                        help='representative gate frames for calibration')
+    parser.add_argument('--val', type=Path, required=True,
+                        help='images directory of a labelled YOLO dataset')
+    parser.add_argument('--input', type=Path, default=onnx_path)
+    parser.add_argument('--output', type=Path, default=onnx_int8_path)
+    parser.add_argument('--img-size', type=int, default=640)
+    parser.add_argument('--limit', type=int, default=0,
+                        help='maximum number of calibration frames')
+    parser.add_argument('--per-tensor', action='store_true',
+                        help='quantise weights per tensor instead of per channel')
+    parser.add_argument('--exclude-nodes', nargs='*', default=[],
+                        help='nodes kept in FP32, e.g. the detection head')
+    parser.add_argument('--max-map-drop', type=float, default=0.01)
+    args = parser.parse_args()
+
+    report = run(args.calib, args.val, args.input, args.output, args.img_size,
+                 args.limit, not args.per_tensor, tuple(args.exclude_nodes),
+                 args.max_map_drop)
+    print(json.dumps(report, indent=2))
+    sys.exit(0 if report['accepted'] else 1)
@@ -0,0 +1,116 @@
+import logging
+import threading
+from contextlib import contextmanager
+from queue import Queue, Empty
+from typing import TYPE_CHECKING, Iterator, List, Optional
+
+from settings import settings
+
+if TYPE_CHECKING:
+    import easyocr
+
+logger = logging.getLogger(__name__)
+
+
+class ReaderPool:
+    """
+        Process-wide pool of EasyOCR readers.
+
+        Building an ``easyocr.Reader`` loads the CRAFT detector and the
+        recognizer weights from disk, so readers are created once per worker
+        and handed out to callers one at a time. A reader is not safe to use
+        from several threads at once, hence the checkout semantics.
+
+        Attributes:
+            languages (List[str]): Languages passed to every reader.
+            size (int): Maximum number of readers kept by the pool.
+            gpu (bool): Whether readers are allowed to use the GPU.
+        """
+
+    def __init__(self,
+                 languages: List[str],
+                 size: int = 1,
+                 gpu: bool = False) -> None:
+        if size < 1:
+            raise ValueError("Reader pool size must be at least 1")
+        self.languages = languages
+        self.size = size
+        self.gpu = gpu
+        self._idle: Queue = Queue(maxsize=size)
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def _create_reader(self) -> 'easyocr.Reader':
+        """Builds a new reader, loading the model weights from disk."""
+        import easyocr
+
+        logger.info("Loading EasyOCR reader %d/%d", self._created + 1, self.size)
+        return easyocr.Reader(self.languages, gpu=self.gpu, verbose=False)
+
+    def _acquire(self, timeout: Optional[float] = None) -> 'easyocr.Reader':
+        """
+            Takes an idle reader, creating a new one while the pool is not full.
+
+            Args:
+                timeout (Optional[float]): Seconds to wait for a reader to be
+                    released when every reader is busy. None waits forever.
+
+            Returns:
+                easyocr.Reader: A reader owned by the caller until released.
+
+            Raises:
+                TimeoutError: If no reader became available in time.
+        """
+        try:
+            return self._idle.get_nowait()
+        except Empty:
+            pass
+
+        with self._lock:
+            create = self._created < self.size
+            if create:
+                self._created += 1
+        if create:
+            try:
+                return self._create_reader()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+
+        try:
+            return self._idle.get(timeout=timeout)
+        except Empty:
+            raise TimeoutError("No EasyOCR reader available") from None
+
+    def _release(self, reader: 'easyocr.Reader') -> None:
+        """Returns a reader to the pool."""
+        self._idle.put_nowait(reader)
+
+    @contextmanager
+    def checkout(self, timeout: Optional[float] = None) -> Iterator['easyocr.Reader']:
+        """
+            Lends a reader for the duration of a ``with`` block.
+
+            Args:
+                timeout (Optional[float]): Seconds to wait for a free reader.
+
+            Yields:
+                easyocr.Reader: The reader to use inside the block.
+        """
+        reader = self._acquire(timeout)
+        try:
+            yield reader
+        finally:
+            self._release(reader)
+
+    def warm_up(self) -> None:
+        """Creates every reader of the pool up front."""
+        readers = [self._acquire() for _ in range(self.size)]
+        for reader in readers:
+            self._release(reader)
+
+
+reader_pool = ReaderPool(['en'],
+                         size=settings.ocr_reader_pool_size,
+                         gpu=settings.ocr_use_gpu)
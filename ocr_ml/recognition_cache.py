@@ -0,0 +1,96 @@
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, List, NamedTuple, Optional, Tuple
+
+from settings import settings
+from ocr_ml.plate_recognition import Recognition
+
+
+class CacheStats(NamedTuple):
+    """
+        Counters of the recognition cache.
+
+        Attributes:
+            hits (int): Frames answered from the cache.
+            misses (int): Frames that went through recognition.
+            entries (int): Results currently kept.
+        """
+    hits: int
+    misses: int
+    entries: int
+
+
+class RecognitionCache:
+    """
+        Short-lived cache of plate reads keyed by camera and frame hash.
+
+        A camera re-triggers several times while a car waits at the barrier,
+        sending near-identical frames. Each camera keeps its last few results
+        with the perceptual hash of their frame; a new frame whose hash is
+        within ``max_distance`` bits of a fresh entry gets that result back
+        without running recognition.
+
+        Attributes:
+            ttl (float): Seconds a result stays valid.
+            max_distance (int): Largest Hamming distance between frame hashes
+                treated as the same scene.
+            size (int): Results kept per camera.
+        """
+
+    def __init__(self, ttl: float = 5.0, max_distance: int = 6, size: int = 4) -> None:
+        self.ttl = ttl
+        self.max_distance = max_distance
+        self.size = size
+        self._entries: Dict[str, Deque[Tuple[float, int, List[Recognition]]]] = {}
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, camera: str, frame_hash: int) -> Optional[List[Recognition]]:
+        """
+            Returns the result of a recent frame similar to this one.
+
+            Args:
+                camera (str): Identifier of the camera.
+                frame_hash (int): Perceptual hash of the frame.
+
+            Returns:
+                Optional[List[Recognition]]: The cached result, or None on a miss.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entries = self._entries.get(camera)
+            if entries:
+                while entries and now - entries[0][0] > self.ttl:
+                    entries.popleft()
+                for _, cached_hash, result in reversed(entries):
+                    if (cached_hash ^ frame_hash).bit_count() <= self.max_distance:
+                        self._hits += 1
+                        return result
+            self._misses += 1
+            return None
+
+    def put(self, camera: str, frame_hash: int, result: List[Recognition]) -> None:
+        """Stores the result of a frame."""
+        with self._lock:
+            entries = self._entries.setdefault(camera, deque(maxlen=self.size))
+            entries.append((time.monotonic(), frame_hash, result))
+
+    def clear(self) -> None:
+        """Drops every cached result."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> CacheStats:
+        """Returns the hit and miss counters."""
+        now = time.monotonic()
+        with self._lock:
+            entries = sum(1 for camera in self._entries.values()
+                          for created, _, _ in camera
+                          if now - created <= self.ttl)
+            return CacheStats(self._hits, self._misses, entries)
+
+
+recognition_cache = RecognitionCache(ttl=settings.recognition_cache_ttl,
+                                     max_distance=settings.recognition_cache_distance)
@@ -0,0 +1,215 @@
+"""
+Train the plate CRNN recognizer on license plate crops.
+
+Usage:
+    $ python -m ocr_ml.train_plate_ocr --data path/to/crops --epochs 60
+
+Dataset layout: ``path/to/crops/train`` and ``path/to/crops/val`` hold plate
+crops named after the plate they show, optionally with a suffix after an
+underscore, e.g. ``AA1234BB.jpg`` or ``AA1234BB_0042.jpg``. Crops can be cut
+from gate frames with the YOLO detector (``ocr_ml.plate_recognition``).
+
+The loop mirrors ``classify/train.py``: smart optimizer, linear LR decay, EMA
+weights and ``last.pt``/``best.pt`` checkpoints selected by exact plate accuracy
+on the validation split. Copy ``best.pt`` to ``ocr_ml/model/plate_crnn.pt`` to use it.
+"""
+import argparse
+import re
+import sys
+import time
+from copy import deepcopy
+from datetime import datetime
+from pathlib import Path
+
+import cv2
+import numpy as np
+import torch
+import torch.optim.lr_scheduler as lr_scheduler
+from torch.utils.data import DataLoader, Dataset
+from tqdm import tqdm
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from ocr_ml.plate_ocr import (PLATE_ALPHABET, PlateCRNN, ctc_greedy_decode,  # noqa: E402
+                              encode, preprocess)
+from utils.general import LOGGER, TQDM_BAR_FORMAT, colorstr, increment_path, init_seeds  # noqa: E402
+from utils.torch_utils import ModelEMA, select_device, smart_optimizer  # noqa: E402
+
+IMAGE_SUFFIXES = {'.jpg', '.jpeg', '.png', '.bmp'}
+
+
+class PlateCropDataset(Dataset):
+    """
+        Plate crops labelled by their file names.
+
+        Args:
+            root (Path): Directory with the crops.
+            augment (bool): Apply light photometric and geometric jitter.
+        """
+
+    def __init__(self, root, augment=False):
+        self.files = [path for path in sorted(Path(root).rglob('*'))
+                      if path.suffix.lower() in IMAGE_SUFFIXES]
+        self.labels = [re.sub(r'[^0-9A-Z]', '', path.stem.split('_')[0].upper())
+                       for path in self.files]
+        self.augment = augment
+        assert self.files, f'No plate crops found in {root}'
+
+    def __len__(self):
+        return len(self.files)
+
+    def _jitter(self, image):
+        """Randomly shifts brightness and contrast and slightly rotates and crops the plate."""
+        alpha = np.random.uniform(0.7, 1.3)
+        beta = np.random.uniform(-30, 30)
+        image = cv2.convertScaleAbs(image, alpha=alpha, beta=beta)
+        height, width = image.shape[:2]
+        matrix = cv2.getRotationMatrix2D((width / 2, height / 2), np.random.uniform(-3, 3), 1.0)
+        image = cv2.warpAffine(image, matrix, (width, height), borderMode=cv2.BORDER_REPLICATE)
+        dx, dy = int(width * 0.04), int(height * 0.08)
+        x1, y1 = np.random.randint(0, dx + 1), np.random.randint(0, dy + 1)
+        x2, y2 = width - np.random.randint(0, dx + 1), height - np.random.randint(0, dy + 1)
+        return image[y1:y2, x1:x2]
+
+    def __getitem__(self, i):
+        image = cv2.imread(str(self.files[i]), cv2.IMREAD_GRAYSCALE)
+        if self.augment:
+            image = self._jitter(image)
+        return image, self.labels[i]
+
+
+def collate(batch):
+    """Builds the inputs, concatenated targets and target lengths CTC loss expects."""
+    images, labels = zip(*batch)
+    targets = [encode(label) for label in labels]
+    return (preprocess(list(images)),
+            torch.tensor([c for target in targets for c in target], dtype=torch.long),
+            torch.tensor([len(target) for target in targets], dtype=torch.long),
+            list(labels))
+
+
+@torch.inference_mode()
+def validate(model, dataloader, criterion, device):
+    """
+        Scores the recognizer on a validation loader.
+
+        Returns:
+            tuple: Exact plate accuracy, character accuracy and mean CTC loss.
+        """
+    model.eval()
+    exact, chars, total_chars, loss, n = 0, 0, 0, 0.0, 0
+    for images, targets, lengths, labels in dataloader:
+        log_probs = model(images.to(device))
+        input_lengths = torch.full((images.shape[0],), log_probs.shape[0], dtype=torch.long)
+        loss += criterion(log_probs.float().cpu(), targets, input_lengths, lengths).item()
+        for read, label in zip(ctc_greedy_decode(log_probs, PLATE_ALPHABET), labels):
+            exact += read.text == label
+            chars += sum(a == b for a, b in zip(read.text, label))
+            total_chars += max(len(label), len(read.text))
+        n += 1
+    return (exact / len(dataloader.dataset),
+            chars / max(total_chars, 1),
+            loss / max(n, 1))
+
+
+def train(opt):
+    """Trains the plate recognizer and saves ``last.pt`` and ``best.pt`` to the run directory."""
+    init_seeds(opt.seed, deterministic=True)
+    device = select_device(opt.device, batch_size=opt.batch_size)
+    save_dir = Path(increment_path(Path(opt.project) / opt.name, exist_ok=opt.exist_ok))
+    (save_dir / 'weights').mkdir(parents=True, exist_ok=True)
+    last, best = save_dir / 'weights' / 'last.pt', save_dir / 'weights' / 'best.pt'
+
+    data = Path(opt.data)
+    trainloader = DataLoader(PlateCropDataset(data / 'train', augment=True),
+                             batch_size=opt.batch_size, shuffle=True,
+                             num_workers=opt.workers, collate_fn=collate)
+    valloader = DataLoader(PlateCropDataset(data / 'val'),
+                           batch_size=opt.batch_size * 2, shuffle=False,
+                           num_workers=opt.workers, collate_fn=collate)
+
+    model = PlateCRNN().to(device)
+    optimizer = smart_optimizer(model, opt.optimizer, opt.lr0, momentum=0.9, decay=opt.decay)
+    lrf = 0.01  # final lr (fraction of lr0)
+
+    def lf(x):
+        """Linear learning rate scheduler function, scaling learning rate from initial value to `lrf` over `epochs`."""
+        return (1 - x / opt.epochs) * (1 - lrf) + lrf  # linear
+
+    scheduler = lr_scheduler.LambdaLR(optimizer, lr_lambda=lf)
+    ema = ModelEMA(model)
+    criterion = torch.nn.CTCLoss(blank=0, zero_infinity=True)
+
+    t0 = time.time()
+    best_fitness = 0.0
+    LOGGER.info(
+        f"Logging results to {colorstr('bold', save_dir)}\n"
+        f"Training plate recognizer on {len(trainloader.dataset)} crops for {opt.epochs} epochs...\n\n"
+        f"{'Epoch':>10}{'train_loss':>12}{'val_loss':>12}{'plate_acc':>12}{'char_acc':>12}"
+    )
+    for epoch in range(opt.epochs):
+        model.train()
+        tloss = 0.0
+        pbar = tqdm(enumerate(trainloader), total=len(trainloader), bar_format=TQDM_BAR_FORMAT)
+        for i, (images, targets, lengths, _) in pbar:
+            log_probs = model(images.to(device))
+            input_lengths = torch.full((images.shape[0],), log_probs.shape[0], dtype=torch.long)
+            loss = criterion(log_probs.float().cpu(), targets, input_lengths, lengths)
+
+            loss.backward()
+            torch.nn.utils.clip_grad_norm_(model.parameters(), max_norm=10.0)  # clip gradients
+            optimizer.step()
+            optimizer.zero_grad()
+            ema.update(model)
+
+            tloss = (tloss * i + loss.item()) / (i + 1)  # update mean losses
+            pbar.desc = f"{f'{epoch + 1}/{opt.epochs}':>10}{tloss:>12.3g}" + " " * 36
+
+        scheduler.step()
+        fitness, char_acc, vloss = validate(ema.ema, valloader, criterion, device)
+        LOGGER.info(f"{f'{epoch + 1}/{opt.epochs}':>10}{tloss:>12.3g}{vloss:>12.3g}{fitness:>12.3g}{char_acc:>12.3g}")
+
+        best_fitness = max(best_fitness, fitness)
+        ckpt = {
+            'epoch': epoch,
+            'best_fitness': best_fitness,
+            'model': deepcopy(ema.ema).float().state_dict(),
+            'alphabet': PLATE_ALPHABET,
+            'opt': vars(opt),
+            'date': datetime.now().isoformat(),
+        }
+        torch.save(ckpt, last)
+        if best_fitness == fitness:
+            torch.save(ckpt, best)
+        del ckpt
+
+    LOGGER.info(
+        f'\nTraining complete ({(time.time() - t0) / 3600:.3f} hours), best plate accuracy {best_fitness:.3f}'
+        f"\nResults saved to {colorstr('bold', save_dir)}"
+        f'\nDeploy:          cp {best} ocr_ml/model/plate_crnn.pt'
+    )
+    return best
+
+
+def parse_opt(known=False):
+    """Parses command-line arguments for plate recognizer training."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--data', type=str, required=True, help='directory with train/ and val/ crops')
+    parser.add_argument('--epochs', type=int, default=60, help='total training epochs')
+    parser.add_argument('--batch-size', type=int, default=64, help='batch size')
+    parser.add_argument('--workers', type=int, default=4, help='max dataloader workers')
+    parser.add_argument('--device', default='', help='cuda device, i.e. 0 or cpu')
+    parser.add_argument('--optimizer', choices=['SGD', 'Adam', 'AdamW', 'RMSProp'], default='AdamW', help='optimizer')
+    parser.add_argument('--lr0', type=float, default=0.001, help='initial learning rate')
+    parser.add_argument('--decay', type=float, default=5e-5, help='weight decay')
+    parser.add_argument('--project', default=ROOT / 'runs' / 'train-plate-ocr', help='save to project/name')
+    parser.add_argument('--name', default='exp', help='save to project/name')
+    parser.add_argument('--exist-ok', action='store_true', help='existing project/name ok, do not increment')
+    parser.add_argument('--seed', type=int, default=0, help='Global training seed')
+    return parser.parse_known_args()[0] if known else parser.parse_args()
+
+
+if __name__ == '__main__':
+    train(parse_opt())
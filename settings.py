@@ -24,9 +24,59 @@ class EnvSettings(BaseSettings):
     postgres_db: str
     postgres_port: int
     database_url: str
+    database_read_url: str = ''
     access_token_expire_minutes: int
     refresh_token_expire_days: int
     total_spots: int = 30
+    preload_models: bool = True
+    ocr_reader_pool_size: int = 1
+    ocr_use_gpu: bool = False
+    inference_workers: int = 1
+    inference_queue_size: int = 4
+    inference_queue_timeout: float = 2.0
+    inference_timeout: float = 15.0
+    inference_batch_size: int = 4
+    inference_batch_wait_ms: int = 50
+    plate_registry_ttl: int = 60
+    principal_cache_ttl: float = 30.0
+    plate_match_distance: float = 0.5
+    plate_match_edits: bool = False
+    tariff_cache_ttl: int = 300
+    lot_counter_ttl: int = 30
+    detector_input_size: int = 640
+    ocr_min_plate_height: int = 48
+    detector_backend: str = 'auto'
+    plate_top_k: int = 3
+    plate_min_confidence: float = 0.25
+    plate_min_aspect: float = 1.0
+    plate_max_aspect: float = 6.0
+    plate_ocr_enabled: bool = True
+    plate_ocr_min_confidence: float = 0.8
+    recognition_cache_ttl: float = 5.0
+    recognition_cache_distance: int = 6
+    camera_frame_max_bytes: int = 8 * 2 ** 20
+    camera_frame_buffers: int = 8
+    camera_enter_sources: str = ''
+    camera_leave_sources: str = ''
+    camera_vid_stride: int = 2
+    motion_threshold: float = 0.01
+    motion_pixel_delta: int = 25
+    camera_roi_file: str = ''
+    motion_report_interval: float = 60.0
+    gate_cooldown: float = 15.0
+    track_iou_threshold: float = 0.2
+    track_max_age: float = 1.5
+    track_min_reads: int = 3
+    track_min_agreement: float = 0.7
+    db_echo: bool = False
+    db_pool_size: int = 10
+    db_max_overflow: int = 10
+    db_pool_timeout: float = 10.0
+    db_pool_recycle: int = 1800
+    db_pool_pre_ping: bool = True
+    db_statement_cache_size: int = 100
+    db_read_pool_size: int = 5
+    db_read_max_overflow: int = 5
 
 
 # production environment
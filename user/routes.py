@@ -1,7 +1,7 @@
 from typing import Annotated, Any, Optional
 import re
 
-from fastapi import Request, Response, Depends, Cookie, Form
+from fastapi import Request, Response, Depends, Form
 from fastapi.routing import APIRouter
 from fastapi.responses import HTMLResponse
 from sqlalchemy import select
@@ -9,7 +9,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
 from frontend.routes import templates
-from auth.auth import Authentication
+from auth.principal import Principal, get_principal, principal_cache
 from schemas.auth import User
 from schemas.cars import (
     CarInfo,
@@ -26,11 +26,10 @@ from db_models.orms import (
     ServiceMessageORM
 )
 from db_models.db import get_session
+from cameras.plate_registry import plate_registry
 
 NON_CHARS_REGEXP = r"[^a-zA-Z0-9]"
 
-auth = Authentication()
-
 router = APIRouter(prefix='/user',
                    default_response_class=HTMLResponse,
                    include_in_schema=False)
@@ -39,30 +38,25 @@ router = APIRouter(prefix='/user',
 @router.get('/')
 async def get_user_page(
         request: Request,
-        db: Annotated[AsyncSession, Depends(get_session)],
-        access_token: Annotated[str | None, Cookie()] = None
+        principal: Annotated[Optional[Principal], Depends(get_principal)]
 ) -> Any:
     """
         Renders the user page if the user is authenticated, otherwise redirects to the login page.
 
         Args:
             request (Request): The current HTTP request object.
-            db (AsyncSession): The asynchronous database session dependency.
-            access_token (str | None, optional): The JWT access token stored in a cookie. Defaults to None.
+            principal (Optional[Principal]): The signed-in user, None without an access token.
 
         Returns:
             TemplateResponse: Renders the user page with user information if authenticated,
                               otherwise renders the login form.
         """
-    user = None
-    if access_token:
-        username = auth.get_current_user(request)
-        user = User(username=username)
-
-    stmnt = select(UserORM).where(UserORM.username == user.username)
-    res = await db.execute(stmnt)
-    user_db = res.scalar_one_or_none()
-    user.is_admin = user_db.is_admin
+    if principal is None:
+        return templates.TemplateResponse('auth/login_form.html',
+                                          {'request': request,
+                                           'user': None})
+    user = User(username=principal.username,
+                is_admin=principal.is_admin)
 
     return templates.TemplateResponse('user/user.html',
                                       {'request': request,
@@ -102,7 +96,7 @@ async def get_car_status(
 async def get_user_cars(
         request: Request,
         db: Annotated[AsyncSession, Depends(get_session)],
-        access_token: Annotated[str | None, Cookie()] = None
+        principal: Annotated[Optional[Principal], Depends(get_principal)]
 ) -> Any:
     """
         Retrieves the list of cars owned by the authenticated user and displays their statuses.
@@ -110,27 +104,20 @@ async def get_user_cars(
         Args:
             request (Request): The current HTTP request object.
             db (AsyncSession): The asynchronous database session dependency.
-            access_token (str | None, optional): The JWT access token stored in a cookie. Defaults to None.
+            principal (Optional[Principal]): The signed-in user, None without an access token.
 
         Returns:
             TemplateResponse: Renders the car list page if the user is authenticated, otherwise
                               renders the login form.
         """
-    user = None
-    if access_token:
-        username = auth.get_current_user(request)
-        user = User(username=username)
-
-    if user is None:
+    if principal is None:
         return templates.TemplateResponse('auth/login_form.html',
                                           {'request': request,
-                                           'user': user})
-    stmnt = (
-        select(UserORM).where(UserORM.username == user.username)
-        .options(selectinload(UserORM.cars))
-    )
+                                           'user': None})
+    user = User(username=principal.username)
+    stmnt = select(CarORM).where(CarORM.user_id == principal.id)
     res = await db.execute(stmnt)
-    cars_db = res.scalar().cars
+    cars_db = res.scalars().all()
     cars_info = []
     for car in cars_db:
         status = await get_car_status(db, car.id)
@@ -147,28 +134,23 @@ async def get_user_cars(
 @router.get('/add_car')
 async def get_add_car_form(
         request: Request,
-        access_token: Annotated[str | None, Cookie()] = None
+        principal: Annotated[Optional[Principal], Depends(get_principal)]
 ) -> Any:
     """Renders the 'Add Car' form if the user is authenticated.
 
         Args:
             request (Request): The HTTP request object.
-            access_token (str, optional): The JWT access token stored in a cookie.
-                Defaults to None.
+            principal (Optional[Principal]): The signed-in user, None without an access token.
 
         Returns:
             TemplateResponse: The 'login_form.html' if the user is not authenticated,
                 otherwise the 'add_car_form.html' is rendered.
         """
-    user = None
-    if access_token:
-        username = auth.get_current_user(request)
-        user = User(username=username)
-
-    if user is None:
+    if principal is None:
         return templates.TemplateResponse('auth/login_form.html',
                                           {'request': request,
-                                           'user': user})
+                                           'user': None})
+    user = User(username=principal.username)
 
     return templates.TemplateResponse('user/add_car_form.html',
                                       {'request': request,
@@ -180,7 +162,7 @@ async def post_add_car(
         request: Request,
         db: Annotated[AsyncSession, Depends(get_session)],
         car_plate: Annotated[str, Form()],
-        access_token: Annotated[Optional[str], Cookie()] = None
+        principal: Annotated[Optional[Principal], Depends(get_principal)]
 ) -> Any:
     """Handles the submission of a new car registration by a user.
 
@@ -188,25 +170,20 @@ async def post_add_car(
             request (Request): The HTTP request object.
             db (AsyncSession): The database session for executing queries.
             car_plate (str): The car's license plate input from the form.
-            access_token (Optional[str]): The JWT access token stored in a cookie.
-                Defaults to None.
+            principal (Optional[Principal]): The signed-in user, None without an access token.
 
         Returns:
             TemplateResponse: Renders 'login_form.html' if the user is not authenticated,
                 'add_car_form.html' with an error message if the car is already registered,
                 or 'user.html' on successful car registration.
         """
-    user = None
     car_plate = car_plate.upper()
     car_plate = re.sub(NON_CHARS_REGEXP, "", car_plate)
-    if access_token:
-        username = auth.get_current_user(request)
-        user = User(username=username)
-
-    if user is None:
+    if principal is None:
         return templates.TemplateResponse('auth/login_form.html',
                                           {'request': request,
-                                           'user': user})
+                                           'user': None})
+    user = User(username=principal.username)
     stmnt = select(CarORM).where(CarORM.car_plate == car_plate)
     res = await db.execute(stmnt)
     car = res.scalar_one_or_none()
@@ -217,13 +194,10 @@ async def post_add_car(
              'user': user,
              'error': f"Car with {car.car_plate} already registered."})
 
-    stmnt = select(UserORM).where(UserORM.username == user.username)
-    res = await db.execute(stmnt)
-    user_db = res.scalar_one()
-    new_car = CarORM(car_plate=car_plate)
-    new_car.owner = user_db
+    new_car = CarORM(car_plate=car_plate, user_id=principal.id)
     db.add(new_car)
     await db.commit()
+    plate_registry.add_car(new_car.car_plate, new_car.id, principal)
     return templates.TemplateResponse('user/user.html',
                                       {'request': request,
                                        'user': user})
@@ -233,36 +207,28 @@ async def post_add_car(
 async def get_user_bills(
         request: Request,
         db: Annotated[AsyncSession, Depends(get_session)],
-        access_token: Annotated[Optional[str], Cookie()] = None
+        principal: Annotated[Optional[Principal], Depends(get_principal)]
 ) -> Any:
     """Displays the list of bills for the authenticated user.
 
         Args:
             request (Request): The HTTP request object.
             db (AsyncSession): The database session for executing queries.
-            access_token (Optional[str]): The JWT access token stored in a cookie.
-                Defaults to None.
+            principal (Optional[Principal]): The signed-in user, None without an access token.
 
         Returns:
             TemplateResponse: Renders 'login_form.html' if the user is not authenticated,
                 otherwise renders 'bill_list.html' with the user's bills.
         """
-    user = None
-    if access_token:
-        username = auth.get_current_user(request)
-        user = User(username=username)
-    if user is None:
+    if principal is None:
         return templates.TemplateResponse('auth/login_form.html',
                                           {'request': request,
-                                           'user': user})
-
-    stmnt = select(UserORM).where(UserORM.username == user.username)
-    res = await db.execute(stmnt)
-    user_db = res.scalar_one_or_none()
+                                           'user': None})
+    user = User(username=principal.username)
 
     stmnt = (
         select(BillingORM)
-        .where(BillingORM.user_id == user_db.id,
+        .where(BillingORM.user_id == principal.id,
                BillingORM.is_sent.is_(True))
         .options(selectinload(BillingORM.user),
                  selectinload(BillingORM.history),
@@ -314,7 +280,7 @@ async def get_car_bills(
         request: Request,
         db: Annotated[AsyncSession, Depends(get_session)],
         car_plate: str,
-        access_token: Annotated[Optional[str], Cookie()] = None
+        principal: Annotated[Optional[Principal], Depends(get_principal)]
 ) -> Any:
     """
         Retrieves and displays the billing information for a car associated with the
@@ -324,7 +290,7 @@ async def get_car_bills(
             request (Request): The incoming request object.
             db (AsyncSession): The database session dependency.
             car_plate (str): The license plate of the car.
-            access_token (Optional[str], optional): The JWT access token, retrieved from cookies. Defaults to None.
+            principal (Optional[Principal]): The signed-in user, None without an access token.
 
         Returns:
             Any: The response template rendering the car bills or an error message if the car is not registered
@@ -337,22 +303,15 @@ async def get_car_bills(
             - If the user is not logged in, the login form will be displayed.
             - The user's bills are retrieved from the database and displayed along with relevant parking history.
         """
-    user = None
-    if access_token:
-        username = auth.get_current_user(request)
-        user = User(username=username)
-    if user is None:
+    if principal is None:
         return templates.TemplateResponse('auth/login_form.html',
                                           {'request': request,
-                                           'user': user})
-
-    stmnt = select(UserORM).where(UserORM.username == user.username)
-    res = await db.execute(stmnt)
-    user_db = res.scalar_one_or_none()
+                                           'user': None})
+    user = User(username=principal.username)
 
     stmnt = select(CarORM).where(
         CarORM.car_plate == car_plate,
-        CarORM.user_id == user_db.id
+        CarORM.user_id == principal.id
     )
     res = await db.execute(stmnt)
     car_db = res.scalar_one_or_none()
@@ -419,7 +378,7 @@ async def get_car_parkings(
         request: Request,
         db: Annotated[AsyncSession, Depends(get_session)],
         car_plate: str,
-        access_token: Annotated[Optional[str], Cookie()] = None
+        principal: Annotated[Optional[Principal], Depends(get_principal)]
 ) -> Any:
     """
         Retrieves and displays the parking history for a car associated with the
@@ -429,7 +388,7 @@ async def get_car_parkings(
             request (Request): The incoming request object.
             db (AsyncSession): The database session dependency.
             car_plate (str): The license plate of the car.
-            access_token (Optional[str], optional): The JWT access token, retrieved from cookies. Defaults to None.
+            principal (Optional[Principal]): The signed-in user, None without an access token.
 
         Returns:
             Any: The response template rendering the car parkings or an error message if the car is not registered
@@ -442,22 +401,15 @@ async def get_car_parkings(
             - If the user is not logged in, the login form will be displayed.
             - The parking history is retrieved from the database and displayed with billing information.
         """
-    user = None
-    if access_token:
-        username = auth.get_current_user(request)
-        user = User(username=username)
-    if user is None:
+    if principal is None:
         return templates.TemplateResponse('auth/login_form.html',
                                           {'request': request,
-                                           'user': user})
-
-    stmnt = select(UserORM).where(UserORM.username == user.username)
-    res = await db.execute(stmnt)
-    user_db = res.scalar_one_or_none()
+                                           'user': None})
+    user = User(username=principal.username)
 
     stmnt = select(CarORM).where(
         CarORM.car_plate == car_plate,
-        CarORM.user_id == user_db.id
+        CarORM.user_id == principal.id
     )
     res = await db.execute(stmnt)
     car_db = res.scalar_one_or_none()
@@ -525,7 +477,7 @@ async def get_car_delete_form(
         request: Request,
         car_plate: str,
         db: Annotated[AsyncSession, Depends(get_session)],
-        access_token: Annotated[Optional[str], Cookie()] = None
+        principal: Annotated[Optional[Principal], Depends(get_principal)]
 ) -> Any:
     """
         Renders a form to delete a user's car.
@@ -534,28 +486,21 @@ async def get_car_delete_form(
             request (Request): The HTTP request object.
             car_plate (str): The license plate of the car to delete.
             db (AsyncSession): The database session for querying and interacting with the database.
-            access_token (Optional[str], optional): JWT access token from a cookie, defaults to None.
+            principal (Optional[Principal]): The signed-in user, None without an access token.
 
         Returns:
             TemplateResponse: Renders a form to delete the car if the car exists and belongs to the user.
                               Otherwise, renders an error or login page.
         """
-    user = None
-    if access_token:
-        username = auth.get_current_user(request)
-        user = User(username=username)
-    if user is None:
+    if principal is None:
         return templates.TemplateResponse('auth/login_form.html',
                                           {'request': request,
-                                           'user': user})
-
-    stmnt = select(UserORM).where(UserORM.username == user.username)
-    res = await db.execute(stmnt)
-    user_db = res.scalar_one_or_none()
+                                           'user': None})
+    user = User(username=principal.username)
 
     stmnt = select(CarORM).where(
         CarORM.car_plate == car_plate,
-        CarORM.user_id == user_db.id
+        CarORM.user_id == principal.id
     )
     res = await db.execute(stmnt)
     car_db = res.scalar_one_or_none()
@@ -584,7 +529,7 @@ async def delete_car(
         request: Request,
         car_plate: str,
         db: Annotated[AsyncSession, Depends(get_session)],
-        access_token: Annotated[Optional[str], Cookie()] = None
+        principal: Annotated[Optional[Principal], Depends(get_principal)]
 ) -> Any:
     """
         Deletes the user's car from the database if no unpaid bills exist.
@@ -593,29 +538,21 @@ async def delete_car(
             request (Request): The HTTP request object.
             car_plate (str): The license plate of the car to delete.
             db (AsyncSession): The database session for querying and interacting with the database.
-            access_token (Optional[str], optional): JWT access token from a cookie, defaults to None.
+            principal (Optional[Principal]): The signed-in user, None without an access token.
 
         Returns:
             TemplateResponse: Renders a confirmation page if the car is successfully deleted.
                               Otherwise, renders an error or login page.
         """
-    user = None
-    if access_token:
-        username = auth.get_current_user(request)
-        user = User(username=username)
-
-    if user is None:
+    if principal is None:
         return templates.TemplateResponse('auth/login_form.html',
                                           {'request': request,
-                                           'user': user})
-
-    stmnt = select(UserORM).where(UserORM.username == user.username)
-    res = await db.execute(stmnt)
-    user_db = res.scalar_one_or_none()
+                                           'user': None})
+    user = User(username=principal.username)
 
     stmnt = select(CarORM).where(
         CarORM.car_plate == car_plate,
-        CarORM.user_id == user_db.id
+        CarORM.user_id == principal.id
     )
     res = await db.execute(stmnt)
     car_db = res.scalar_one_or_none()
@@ -643,6 +580,7 @@ async def delete_car(
 
     await db.delete(car_db)
     await db.commit()
+    plate_registry.remove_car(car_db.car_plate)
 
     return templates.TemplateResponse(
         'user/car_deleted.html',
@@ -658,7 +596,7 @@ async def delete_car(
 async def get_user_messages(
         request: Request,
         db: Annotated[AsyncSession, Depends(get_session)],
-        access_token: Annotated[Optional[str], Cookie()] = None
+        principal: Annotated[Optional[Principal], Depends(get_principal)]
 ) -> Any:
     """
         Retrieves and displays active messages for the current user.
@@ -666,25 +604,21 @@ async def get_user_messages(
         Args:
             request (Request): The HTTP request object.
             db (AsyncSession): The database session for querying and interacting with the database.
-            access_token (Optional[str], optional): JWT access token from a cookie, defaults to None.
+            principal (Optional[Principal]): The signed-in user, None without an access token.
 
         Returns:
             TemplateResponse: Renders a list of active service messages for the user or prompts login if unauthorized.
         """
-    user = None
-    if access_token:
-        username = auth.get_current_user(request)
-        user = User(username=username)
-    if user is None:
+    if principal is None:
         return templates.TemplateResponse('auth/login_form.html',
                                           {'request': request,
-                                           'user': user})
+                                           'user': None})
+    user = User(username=principal.username)
 
     stmnt = (
         select(ServiceMessageORM)
-        .join(UserORM)
         .where(
-            UserORM.username == user.username,
+            ServiceMessageORM.user_id == principal.id,
             ServiceMessageORM.is_active.is_(True)
         )
         .options(
@@ -719,7 +653,7 @@ async def get_paybill(
         request: Request,
         bill_id: int,
         db: Annotated[AsyncSession, Depends(get_session)],
-        access_token: Annotated[Optional[str], Cookie()] = None
+        principal: Annotated[Optional[Principal], Depends(get_principal)]
 ) -> Any:
     """
         Retrieve the billing details for a specific bill and render the payment page.
@@ -728,7 +662,7 @@ async def get_paybill(
             request (Request): The HTTP request object.
             bill_id (int): The ID of the bill to retrieve.
             db (AsyncSession): The asynchronous database session.
-            access_token (Optional[str]): The access token stored in the user's cookies, used for authentication. Defaults to None.
+            principal (Optional[Principal]): The signed-in user, None without an access token.
 
         Returns:
             Any: A template response displaying the bill payment form if the user is authenticated, or the login form if not.
@@ -740,15 +674,11 @@ async def get_paybill(
             If the user is authenticated and the bill is found, a form with bill details is rendered for payment.
             If the user is not authenticated, a login form is presented.
         """
-    user = None
-    if access_token:
-        username = auth.get_current_user(request)
-        user = User(username=username)
-
-    if user is None:
+    if principal is None:
         return templates.TemplateResponse('auth/login_form.html',
                                           {'request': request,
-                                           'user': user})
+                                           'user': None})
+    user = User(username=principal.username)
 
     stmnt = (
         select(BillingORM)
@@ -785,7 +715,7 @@ async def post_paybill(
         request: Request,
         bill_id: int,
         db: Annotated[AsyncSession, Depends(get_session)],
-        access_token: Annotated[Optional[str], Cookie()] = None
+        principal: Annotated[Optional[Principal], Depends(get_principal)]
 ) -> Any:
     """
         Process the payment of a specific bill and update the bill status.
@@ -794,7 +724,7 @@ async def post_paybill(
             request (Request): The HTTP request object.
             bill_id (int): The ID of the bill to pay.
             db (AsyncSession): The asynchronous database session.
-            access_token (Optional[str]): The access token stored in the user's cookies, used for authentication. Defaults to None.
+            principal (Optional[Principal]): The signed-in user, None without an access token.
 
         Returns:
             Any: A template response displaying the user dashboard after processing the payment, or the login form if the user is not authenticated.
@@ -806,15 +736,11 @@ async def post_paybill(
             If the payment is successful, the bill is marked as paid, and any bans related to unpaid bills are removed.
             If the user is not authenticated, a login form is presented.
         """
-    user = None
-    if access_token:
-        username = auth.get_current_user(request)
-        user = User(username=username)
-
-    if user is None:
+    if principal is None:
         return templates.TemplateResponse('auth/login_form.html',
                                           {'request': request,
-                                           'user': user})
+                                           'user': None})
+    user = User(username=principal.username)
 
     stmnt = (
         select(BillingORM)
@@ -839,7 +765,7 @@ async def post_paybill(
             select(UserORM)
             .join(BillingORM)
             .where(
-                UserORM.username == user.username,
+                UserORM.id == principal.id,
                 BillingORM.is_ban.is_(True),
                 BillingORM.is_paid.is_not(True)
             )
@@ -849,13 +775,17 @@ async def post_paybill(
         user_db = res.scalars().first()
 
         if user_db is None:
-            stmnt = select(UserORM).where(UserORM.username == user.username)
+            stmnt = select(UserORM).where(UserORM.id == principal.id)
             res = await db.execute(stmnt)
             user_db = res.scalar_one()
             user_db.is_banned = False
 
     await db.commit()
 
+    if bill_is_ban and user_db.is_banned is False:
+        plate_registry.update_user(user_db.id, is_banned=False)
+        principal_cache.invalidate(user_db.id)
+
     return templates.TemplateResponse(
         'user/user.html',
         {